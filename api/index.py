@@ -1,4 +1,4 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
@@ -9,14 +9,16 @@ from dotenv import load_dotenv
 # Adicionar o diretório backend ao path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
-from database import engine, get_db
-from models import Base
-from routers import auth, accounts, transactions
+from database import engine, async_engine, get_db
+from services.password_hashing import PasswordHashingBusy
+from services.query_instrumentation import query_instrumentation, QueryInstrumentationMiddleware
+from services.metrics import register_metrics
+from services.startup import startup
 
 load_dotenv()
 
-# Criar tabelas
-Base.metadata.create_all(bind=engine)
+# Criar tabelas (só em desenvolvimento; fora dele o schema vem das migrações)
+startup.create_tables()
 
 # Inicializar FastAPI
 app = FastAPI(
@@ -52,12 +54,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Query-Count", "Server-Timing"],
 )
 
-# Incluir routers
-app.include_router(auth.router)
-app.include_router(accounts.router)
-app.include_router(transactions.router)
+# Consultas SQL por requisição: X-Query-Count, Server-Timing e orçamento por rota
+query_instrumentation.instrument(engine)
+query_instrumentation.instrument(async_engine.sync_engine)
+app.add_middleware(QueryInstrumentationMiddleware)
+
+# Latência, status e erros por rota e GET /metrics (token opcional em METRICS_TOKEN)
+register_metrics(app)
+
+# Incluir routers (fora de desenvolvimento, na primeira requisição a cada prefixo)
+startup.register_routers(app, ["auth", "accounts", "transactions"])
 
 # Rotas básicas
 @app.get("/")
@@ -84,6 +93,15 @@ def health_check(db: Session = Depends(get_db)):
             }
         )
 
+# Pool de bcrypt saturado: back-pressure em vez de enfileirar sem limite
+@app.exception_handler(PasswordHashingBusy)
+async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusy):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many authentication requests, try again shortly"},
+        headers={"Retry-After": "1"}
+    )
+
 # Handler global de exceções
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
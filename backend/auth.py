@@ -11,6 +11,7 @@ from dotenv import load_dotenv
 from database import get_db
 from models import User
 from schemas import TokenData
+from services.auth_cache import auth_user_cache, AuthenticatedUser
 
 load_dotenv()
 
@@ -78,8 +79,13 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
         return None
     return user
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)) -> User:
-    """Obtém o usuário atual a partir do token JWT"""
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)) -> AuthenticatedUser:
+    """Obtém o usuário atual a partir do token JWT
+    
+    Retorna a projeção AuthenticatedUser (id, email, full_name, company_id,
+    role, is_active), servida pelo auth_user_cache; o banco só é consultado
+    quando o subject do token não está no cache.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -90,9 +96,16 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     if token_data is None:
         raise credentials_exception
         
-    user = db.query(User).filter(User.email == token_data.email).first()
+    user = auth_user_cache.get(token_data.email)
     if user is None:
-        raise credentials_exception
+        row = db.query(
+            User.id, User.email, User.full_name, User.company_id, User.role, User.is_active
+        ).filter(User.email == token_data.email).first()
+        if row is None:
+            raise credentials_exception
+        
+        user = AuthenticatedUser(*row)
+        auth_user_cache.set(token_data.email, user)
         
     if not user.is_active:
         raise HTTPException(
@@ -102,7 +115,7 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
         
     return user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_user(current_user: AuthenticatedUser = Depends(get_current_user)) -> AuthenticatedUser:
     """Obtém o usuário ativo atual"""
     if not current_user.is_active:
         raise HTTPException(
@@ -0,0 +1,282 @@
+"""Benchmark dos endpoints mais usados contra SQLite ou PostgreSQL
+
+Gera os dados com benchmarks.synthetic_data (ou reaproveita um banco já
+populado com --reuse), autentica com um token real e mede cada cenário
+pela aplicação completa (TestClient: middlewares, auth, serialização):
+
+- transactions_list       GET /transactions/
+- dashboard_consolidated  GET /dashboard/consolidated
+- monthly_report          GET /reports/monthly/{ano}/{mês}
+- cash_flow               GET /reports/cash-flow?days=90
+- bank_import             POST /bank-import/upload-extract/nubank + execução do job
+- batch_categorize        POST /bank-import/categorize-all + execução do job
+
+Antes de cada iteração das leituras a versão do cache de respostas da
+empresa é incrementada, então o tempo medido é o de montar a resposta.
+Os cenários de escrita usam a última empresa, as leituras a primeira.
+
+O resultado (p50/p95/média por cenário, banco e tamanho dos dados) é
+gravado em JSON com --output; --compare confronta com um baseline e
+termina com código 1 se algum p50 piorar além da tolerância.
+
+O baseline versionado é benchmarks/baselines/sqlite.json (SQLite, 3
+empresas × 50.000 transações); o JSON registra máquina, versão do Python
+e parâmetros. Compare na mesma máquina e com os mesmos parâmetros, e gere
+de novo (comitando o JSON) quando uma mudança alterar o desempenho de
+propósito ou o hardware de referência mudar.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_endpoints --transactions 50000 --compare benchmarks/baselines/sqlite.json
+    python -m benchmarks.bench_endpoints --transactions 50000 --output benchmarks/baselines/sqlite.json
+    python -m benchmarks.bench_endpoints --database-url postgresql://.../saas_bench --output benchmarks/baselines/postgres.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+class Scenario(NamedTuple):
+    name: str
+    run: Callable[[], None]
+    setup: Optional[Callable[[], None]] = None
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def measure(scenario: Scenario, iterations: int, warmup: int) -> Dict[str, float]:
+    """Executa o cenário e resume os tempos (ms); setup fica fora da medição"""
+    timings = []
+    for iteration in range(warmup + iterations):
+        if scenario.setup:
+            scenario.setup()
+        started = time.perf_counter()
+        scenario.run()
+        elapsed = (time.perf_counter() - started) * 1000
+        if iteration >= warmup:
+            timings.append(elapsed)
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(timings, 0.5), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3)
+    }
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> int:
+    """Imprime a diferença por cenário; retorna quantos pioraram além da tolerância"""
+    regressions = 0
+    print(f"\n{'cenário':24} {'baseline p50':>13} {'atual p50':>10} {'variação':>9}")
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            print(f"{name:24} {'-':>13} {current['p50_ms']:>10.1f}     (novo)")
+            continue
+        change = current["p50_ms"] / previous["p50_ms"] - 1 if previous["p50_ms"] else 0.0
+        regressed = change > tolerance
+        regressions += regressed
+        print(f"{name:24} {previous['p50_ms']:>13.1f} {current['p50_ms']:>10.1f} {change:>+8.0%}"
+              f"{'  REGRESSÃO' if regressed else ''}")
+    if baseline.get("dataset") != results["dataset"]:
+        print("\natenção: os dados do baseline são diferentes dos atuais")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None,
+                        help="Banco vazio (ou já populado, com --reuse); padrão: SQLite temporário")
+    parser.add_argument("--reuse", action="store_true", help="Não gera dados: usa os já existentes no banco")
+    parser.add_argument("--companies", type=int, default=3)
+    parser.add_argument("--transactions", type=int, default=50000, help="Transações por empresa")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--anchor-date", type=date.fromisoformat, default=None,
+                        help="Data mais recente dos dados (padrão: hoje)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--import-rows", type=int, default=1000, help="Linhas do extrato no cenário bank_import")
+    parser.add_argument("--categorize-rows", type=int, default=5000,
+                        help="Transações sem categoria no cenário batch_categorize")
+    parser.add_argument("--scenarios", default=None, help="Lista separada por vírgulas (padrão: todos)")
+    parser.add_argument("--output", default=None, help="Grava o resultado em JSON (baseline)")
+    parser.add_argument("--compare", default=None, help="Baseline JSON para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Piora aceitável do p50 (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    # O engine da aplicação é criado no import de database.py: configurar antes
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'benchmark.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("MODEL_ARTIFACT_DIR", tempfile.mkdtemp(prefix="benchmark_models_"))
+    # Os jobs rodam no próprio cenário, não em background
+    os.environ["JOB_INLINE_BUDGET_SECONDS"] = "0"
+
+    import logging
+    from fastapi.testclient import TestClient
+    from sqlalchemy import func, select, update
+
+    from database import Base, SessionLocal, engine
+    from models import Company, Transaction, User, UserRole
+    from auth import create_access_token
+    from benchmarks.synthetic_data import SyntheticTenantGenerator
+    from services.job_queue import job_queue
+    from services.ledger_rollup import ledger_rollup
+    from services.response_cache import response_cache
+    import main as application
+
+    # main.py configura o log em INFO; uma linha por requisição distorceria a medição
+    logging.getLogger().setLevel(logging.WARNING)
+    Base.metadata.create_all(bind=engine)
+
+    generator = SyntheticTenantGenerator(seed=args.seed, anchor=args.anchor_date)
+    if not args.reuse:
+        started = time.perf_counter()
+        with engine.begin() as connection:
+            generator.populate(connection, args.companies, args.transactions)
+        print(f"dados gerados em {time.perf_counter() - started:.1f}s")
+
+    db = SessionLocal()
+    company_ids = db.scalars(select(Company.id).order_by(Company.id)).all()
+    if not company_ids:
+        print("banco sem empresas: rode sem --reuse")
+        return 1
+    admins = {
+        company_id: db.scalar(select(User).where(User.company_id == company_id, User.role == UserRole.ADMIN).order_by(User.id))
+        for company_id in (company_ids[0], company_ids[-1])
+    }
+    transactions_total = db.scalar(select(func.count(Transaction.id)))
+    db.close()
+
+    read_company, write_company = company_ids[0], company_ids[-1]
+    client = TestClient(application.app)
+
+    def headers(company_id: int) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {create_access_token({'sub': admins[company_id].email})}"}
+
+    read_headers, write_headers = headers(read_company), headers(write_company)
+
+    def get(path: str) -> Callable[[], None]:
+        def run():
+            response = client.get(path, headers=read_headers)
+            if response.status_code != 200:
+                raise RuntimeError(f"GET {path}: {response.status_code} {response.text[:200]}")
+        return run
+
+    def invalidate_read_cache():
+        response_cache.bump_tenant_version(read_company)
+
+    def run_job(response) -> None:
+        if response.status_code != 202:
+            raise RuntimeError(f"{response.request.url}: {response.status_code} {response.text[:200]}")
+        job_id = response.json()["id"]
+        job_queue.run_pending(job_id=job_id)
+        status_response = client.get(f"/jobs/{job_id}", headers=write_headers).json()
+        if status_response["status"] != "succeeded":
+            raise RuntimeError(f"job {job_id}: {status_response['status']} {status_response.get('error')}")
+
+    with SessionLocal() as session:
+        import_account = session.scalar(
+            select(Transaction.to_account_id).where(
+                Transaction.company_id == write_company, Transaction.to_account_id.is_not(None)
+            ).limit(1)
+        )
+    import_round = [0]
+
+    def bank_import():
+        # Descrições novas a cada rodada: todas as linhas são inseridas
+        import_round[0] += 1
+        today = datetime.now().date()
+        lines = ["date,description,amount"]
+        for row in range(args.import_rows):
+            amount = (row % 97 + 1) * (1 if row % 3 == 0 else -1) * 1.37
+            lines.append(f"{today - timedelta(days=row % 30)},COMPRA CARTAO LOJA {import_round[0]}-{row},{amount:.2f}")
+        run_job(client.post(
+            f"/bank-import/upload-extract/nubank?account_id={import_account}",
+            files={"file": ("extrato.csv", "\n".join(lines).encode("utf-8"), "text/csv")},
+            headers=write_headers
+        ))
+
+    def reset_categories():
+        with SessionLocal() as session:
+            ids = session.scalars(
+                select(Transaction.id).where(Transaction.company_id == write_company)
+                .order_by(Transaction.id).limit(args.categorize_rows)
+            ).all()
+            session.execute(
+                update(Transaction).where(Transaction.id.in_(ids))
+                .values(category=None, ml_confidence=None)
+                .execution_options(synchronize_session=False)
+            )
+            ledger_rollup.rebuild(session, write_company)
+            session.commit()
+
+    def batch_categorize():
+        run_job(client.post("/bank-import/categorize-all", headers=write_headers))
+
+    today = generator.anchor.date()
+    scenarios = [
+        Scenario("transactions_list", get("/transactions/?limit=100"), invalidate_read_cache),
+        Scenario("dashboard_consolidated", get("/dashboard/consolidated"), invalidate_read_cache),
+        Scenario("monthly_report", get(f"/reports/monthly/{today.year}/{today.month}"), invalidate_read_cache),
+        Scenario("cash_flow", get("/reports/cash-flow?days=90"), invalidate_read_cache),
+        Scenario("bank_import", bank_import),
+        Scenario("batch_categorize", batch_categorize, reset_categories),
+    ]
+    if args.scenarios:
+        selected = set(args.scenarios.split(","))
+        scenarios = [scenario for scenario in scenarios if scenario.name in selected]
+
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "database": engine.dialect.name,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "dataset": {
+            "companies": len(company_ids),
+            "transactions": transactions_total,
+            "seed": args.seed,
+            "anchor_date": today.isoformat()
+        },
+        "parameters": {
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "import_rows": args.import_rows,
+            "categorize_rows": args.categorize_rows
+        },
+        "scenarios": {}
+    }
+
+    print(f"{'cenário':24} {'p50 ms':>9} {'p95 ms':>9} {'média ms':>9}")
+    for scenario in scenarios:
+        summary = measure(scenario, args.iterations, args.warmup)
+        results["scenarios"][scenario.name] = summary
+        print(f"{scenario.name:24} {summary['p50_ms']:>9.1f} {summary['p95_ms']:>9.1f} {summary['mean_ms']:>9.1f}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"\nresultado gravado em {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{regressions} cenário(s) com regressão acima de {args.tolerance:.0%}")
+            return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
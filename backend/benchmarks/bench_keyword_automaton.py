@@ -0,0 +1,75 @@
+"""Micro-benchmark: pontuação de palavras-chave com e sem o KeywordAutomaton
+
+Gera descrições sintéticas, confere que os scores são idênticos aos da
+implementação de referência (`_calculate_keyword_score`) e mede o tempo
+médio por descrição.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_keyword_automaton --count 100000
+"""
+
+import argparse
+import random
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.ml_categorization import MLCategorizationService
+
+MERCHANT_PREFIXES = ["PIX ENVIADO", "COMPRA CARTAO", "DEBITO AUT", "PAG BOLETO", "TED RECEBIDA", "UBER *TRIP"]
+NOISE_WORDS = ["sao paulo", "ltda", "me", "loja", "centro", "br", "online", "app", "pagamento", "filial"]
+
+def generate_descriptions(service: MLCategorizationService, count: int, seed: int = 42):
+    """Gera descrições no formato de extratos bancários brasileiros"""
+    rnd = random.Random(seed)
+    keywords = [keyword for keywords in service.category_keywords.values() for keyword in keywords]
+
+    descriptions = []
+    for _ in range(count):
+        parts = [rnd.choice(MERCHANT_PREFIXES)]
+        parts.extend(rnd.sample(keywords, rnd.randint(0, 2)))
+        parts.extend(rnd.sample(NOISE_WORDS, rnd.randint(0, 3)))
+        parts.append(str(rnd.randint(1, 9999)))
+        descriptions.append(" ".join(parts).upper())
+    return descriptions
+
+def reference_scores(service: MLCategorizationService, description_clean: str):
+    scores = {}
+    for category, keywords in service.category_keywords.items():
+        score = service._calculate_keyword_score(description_clean, keywords)
+        if score > 0:
+            scores[category] = score
+    return scores
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    service = MLCategorizationService()
+    automaton = service._keyword_automaton
+    cleaned = [service._clean_description(d) for d in generate_descriptions(service, args.count, args.seed)]
+
+    start = time.perf_counter()
+    expected = [reference_scores(service, d) for d in cleaned]
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = [automaton.scores(d) for d in cleaned]
+    automaton_time = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(expected, actual) if a != b)
+
+    print(f"descrições:          {args.count}")
+    print(f"referência:          {reference_time:.2f}s ({reference_time / args.count * 1e6:.1f} µs/descrição)")
+    print(f"autômato:            {automaton_time:.2f}s ({automaton_time / args.count * 1e6:.1f} µs/descrição)")
+    print(f"speedup:             {reference_time / automaton_time:.1f}x")
+    print(f"scores divergentes:  {mismatches}")
+
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
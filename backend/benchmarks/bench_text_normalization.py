@@ -0,0 +1,85 @@
+"""Micro-benchmark: classificadores com a normalização memoizada
+
+Simula a carga de uma importação (poucos descritores distintos repetidos
+em muitas linhas), roda os dois classificadores com os memos desligados e
+ligados, confere que os resultados são idênticos e mostra as taxas de
+acerto de cada memo.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_text_normalization --rows 50000 --distinct 2000
+"""
+
+import argparse
+import random
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.bench_keyword_automaton import generate_descriptions
+from models import TransactionType
+from services.ml_categorization import MLCategorizationService
+from services.personal_business_separator import PersonalBusinessSeparator
+from services.text_normalization import TextNormalizationService
+import services.ml_categorization
+import services.personal_business_separator
+
+def generate_rows(service: MLCategorizationService, rows: int, distinct: int, seed: int):
+    rnd = random.Random(seed)
+    descriptions = generate_descriptions(service, distinct, seed)
+    start = datetime(2024, 1, 1)
+    return [
+        (
+            rnd.choice(descriptions),
+            Decimal(rnd.randint(100, 900000)) / 100,
+            rnd.choice([TransactionType.INCOME, TransactionType.EXPENSE]),
+            start + timedelta(minutes=rnd.randint(0, 525600))
+        )
+        for _ in range(rows)
+    ]
+
+def classify_all(rows, max_size: int):
+    """Classifica as linhas com serviços novos usando memos de `max_size` entradas"""
+    normalizer = TextNormalizationService(max_size=max_size)
+    services.ml_categorization.text_normalizer = normalizer
+    services.personal_business_separator.text_normalizer = normalizer
+    categorizer, separator = MLCategorizationService(), PersonalBusinessSeparator()
+
+    start = time.perf_counter()
+    results = [
+        (
+            categorizer.categorize_transaction(description, amount, transaction_type),
+            separator.classify_transaction(description, amount, transaction_date, transaction_type)
+        )
+        for description, amount, transaction_type, transaction_date in rows
+    ]
+    return results, time.perf_counter() - start, normalizer.stats()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--distinct", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rows = generate_rows(MLCategorizationService(), args.rows, args.distinct, args.seed)
+
+    # max_size=0 desliga o memo (lru_cache sem entradas)
+    uncached, uncached_time, _ = classify_all(rows, max_size=0)
+    cached, cached_time, stats = classify_all(rows, max_size=10000)
+
+    print(f"linhas:              {args.rows} ({args.distinct} descritores distintos)")
+    print(f"sem memo:            {uncached_time:.2f}s ({uncached_time / args.rows * 1e6:.1f} µs/linha)")
+    print(f"com memo:            {cached_time:.2f}s ({cached_time / args.rows * 1e6:.1f} µs/linha)")
+    print(f"speedup:             {uncached_time / cached_time:.1f}x")
+    for name, memo in stats.items():
+        print(f"{name + ':':<38} {memo['hit_ratio']:.1%} de acerto ({memo['hits']} acertos, {memo['misses']} faltas)")
+    print(f"resultados iguais:   {uncached == cached}")
+
+    return 0 if uncached == cached else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
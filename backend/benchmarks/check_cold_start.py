@@ -0,0 +1,203 @@
+"""Tempo de cold start da API: import de main.py e de api/index.py
+
+Cada alvo é importado em processos novos com `python -X importtime`; o
+tempo do import (mediana das rodadas) é o que uma função serverless paga
+antes da primeira requisição. O relatório lista os módulos mais caros
+(tempo acumulado e próprio) da rodada mediana.
+
+A checagem falha (código 1) quando:
+- um módulo pesado é carregado na subida: pandas e numpy nunca; no modo
+  de routers sob demanda (services/startup.py), nenhum router;
+- o tempo passa de --max-ms ou piora além da tolerância em relação ao
+  baseline de --compare.
+
+Por padrão os alvos rodam com ENVIRONMENT=production, o modo de cold
+start; --environment development mede a subida com todos os routers.
+
+O baseline versionado é benchmarks/baselines/cold_start.json (modo
+production, 5 rodadas); o JSON registra máquina e versão do Python.
+Compare na mesma máquina e gere de novo (comitando o JSON) quando uma
+mudança alterar a subida de propósito ou o hardware de referência mudar.
+
+Uso (a partir de backend/):
+    python -m benchmarks.check_cold_start --compare benchmarks/baselines/cold_start.json --max-ms 2500
+    python -m benchmarks.check_cold_start --output benchmarks/baselines/cold_start.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Tuple
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+API_DIR = os.path.abspath(os.path.join(BACKEND_DIR, '..', 'api'))
+
+sys.path.insert(0, BACKEND_DIR)
+
+# Alvo -> (diretório de trabalho, módulo importado)
+TARGETS: Dict[str, Tuple[str, str]] = {
+    "main": (BACKEND_DIR, "main"),
+    "api": (API_DIR, "index"),
+}
+
+# Módulos que não podem ser carregados na subida em nenhum modo
+HEAVY_MODULES = ("pandas", "numpy")
+
+# Marcador da linha com o tempo total medido pelo próprio processo
+WALL_MARKER = "cold-start-ms:"
+
+class ImportRecord(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """Linhas "import time: self | cumulative | módulo" do -X importtime"""
+    records = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        records.append(ImportRecord(name.strip(), int(self_us), int(cumulative_us), depth))
+    return records
+
+def run_once(directory: str, module: str, env: Dict[str, str]) -> Tuple[float, List[ImportRecord]]:
+    """Importa o módulo num processo novo; retorna (ms, módulos importados)"""
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"import {module}; "
+        f"print('{WALL_MARKER}', (time.perf_counter() - started) * 1000)"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=directory, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} falhou:\n{completed.stderr[-2000:]}")
+
+    wall_line = next(line for line in completed.stdout.splitlines() if line.startswith(WALL_MARKER))
+    return float(wall_line.split()[-1]), parse_importtime(completed.stderr)
+
+def imported_by(records: List[ImportRecord], module: str) -> List[ImportRecord]:
+    """Registros do import do alvo (os filhos vêm antes dele, com profundidade maior)"""
+    end = next(index for index, record in enumerate(records) if record.module == module and record.depth == 0)
+    start = end
+    while start > 0 and records[start - 1].depth > 0:
+        start -= 1
+    return records[start:end + 1]
+
+def forbidden_modules(records: List[ImportRecord], lazy_routers: bool) -> List[str]:
+    prefixes = HEAVY_MODULES + (("routers",) if lazy_routers else ())
+    return sorted({
+        record.module for record in records
+        if any(record.module == prefix or record.module.startswith(prefix + ".") for prefix in prefixes)
+    })
+
+def measure(name: str, runs: int, env: Dict[str, str], lazy_routers: bool, top: int) -> Dict:
+    directory, module = TARGETS[name]
+    samples = [run_once(directory, module, env) for _ in range(runs)]
+    samples.sort(key=lambda sample: sample[0])
+    records = samples[len(samples) // 2][1]
+    # Só o que o import do alvo carregou (fora a inicialização do interpretador)
+    records = imported_by(records, module)
+    ranked = [record for record in records if record.depth == 1]
+    return {
+        "runs": runs,
+        "median_ms": round(statistics.median(sample[0] for sample in samples), 1),
+        "min_ms": round(samples[0][0], 1),
+        "max_ms": round(samples[-1][0], 1),
+        "modules_imported": len(records),
+        "forbidden_modules": forbidden_modules(records, lazy_routers),
+        "top_cumulative": [
+            {"module": record.module, "ms": round(record.cumulative_us / 1000, 1)}
+            for record in sorted(ranked, key=lambda record: -record.cumulative_us)[:top]
+        ],
+        "top_self": [
+            {"module": record.module, "ms": round(record.self_us / 1000, 1)}
+            for record in sorted(records, key=lambda record: -record.self_us)[:top]
+        ]
+    }
+
+def report(name: str, summary: Dict) -> None:
+    print(f"\n== {name}: mediana {summary['median_ms']:.0f} ms "
+          f"(mín {summary['min_ms']:.0f}, máx {summary['max_ms']:.0f}; "
+          f"{summary['modules_imported']} módulos)")
+    print(f"{'acumulado':32} {'ms':>8}   {'próprio':32} {'ms':>8}")
+    for cumulative, own in zip(summary["top_cumulative"], summary["top_self"]):
+        print(f"{cumulative['module'][:32]:32} {cumulative['ms']:>8.1f}   {own['module'][:32]:32} {own['ms']:>8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", default=",".join(TARGETS), help="Lista separada por vírgulas (padrão: todos)")
+    parser.add_argument("--environment", default="production", help="ENVIRONMENT dos processos medidos")
+    parser.add_argument("--database-url", default=None, help="Padrão: SQLite temporário (o import não conecta)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12, help="Módulos listados no relatório")
+    parser.add_argument("--max-ms", type=float, default=None, help="Limite da mediana por alvo")
+    parser.add_argument("--output", default=None, help="Grava o resultado em JSON (baseline)")
+    parser.add_argument("--compare", default=None, help="Baseline JSON para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Piora aceitável da mediana (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    env = {
+        **os.environ,
+        "ENVIRONMENT": args.environment,
+        "DATABASE_URL": args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'cold_start.db')}",
+        "PYTHONDONTWRITEBYTECODE": "1"
+    }
+    from services.startup import StartupService, env_flag
+    lazy_routers = StartupService(environment=args.environment, lazy_routers=env_flag("LAZY_ROUTERS")).lazy_routers
+
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "environment": args.environment,
+        "lazy_routers": lazy_routers,
+        "targets": {}
+    }
+    failures = []
+
+    for name in args.targets.split(","):
+        summary = measure(name, args.runs, env, lazy_routers, args.top)
+        results["targets"][name] = summary
+        report(name, summary)
+
+        if summary["forbidden_modules"]:
+            failures.append(f"{name}: carregado na subida: {', '.join(summary['forbidden_modules'])}")
+        if args.max_ms is not None and summary["median_ms"] > args.max_ms:
+            failures.append(f"{name}: {summary['median_ms']:.0f} ms acima do limite de {args.max_ms:.0f} ms")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"\nresultado gravado em {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        for name, current in results["targets"].items():
+            previous = baseline.get("targets", {}).get(name)
+            if previous is None:
+                continue
+            change = current["median_ms"] / previous["median_ms"] - 1
+            print(f"{name}: baseline {previous['median_ms']:.0f} ms, atual {current['median_ms']:.0f} ms ({change:+.0%})")
+            if change > args.tolerance:
+                failures.append(f"{name}: mediana {change:+.0%} em relação ao baseline")
+
+    if failures:
+        print("\nFALHOU:\n" + "\n".join(failures))
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
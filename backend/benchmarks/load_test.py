@@ -0,0 +1,281 @@
+"""Teste de carga: várias empresas ao mesmo tempo contra um uvicorn local
+
+Usuários virtuais (asyncio + httpx) repetem um mix ponderado de chamadas
+(login, criação e listagem de transações, dashboards e importação de
+extrato), cada um autenticado como o admin de uma das N empresas
+sintéticas. A carga sobe em estágios de concorrência (--concurrency
+1,8,32): em cada estágio cada usuário faz uma chamada atrás da outra
+durante --duration segundos.
+
+Em paralelo, uma sonda chama GET / (não toca no banco) a cada 100 ms:
+se a latência dela sobe junto com a carga, alguma rota async está
+bloqueando o event loop. O resumo (JSON com --output) traz por estágio
+p50/p95/p99 por rota, taxa de erro, requisições por segundo e a sonda,
+e no fim o teto de throughput (o estágio com mais requisições/s).
+
+Sem --base-url, gera os dados (benchmarks.synthetic_data) num SQLite
+temporário ou em --database-url e sobe `uvicorn main:app` com
+--server-workers processos. Com --base-url, o servidor já deve ter sido
+populado pelo synthetic_data (e-mails admin@empresaN.com.br).
+
+Requer httpx (pip install httpx).
+
+Uso (a partir de backend/):
+    python -m benchmarks.load_test --tenants 20 --concurrency 1,8,32,64 --duration 20 --output /tmp/carga.json
+    python -m benchmarks.load_test --base-url http://localhost:8000 --tenants 5 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import httpx
+
+from benchmarks.synthetic_data import BENCHMARK_PASSWORD, fill, money, EXPENSE_MERCHANTS
+
+# Operação -> peso no mix de tráfego
+TRAFFIC_MIX = {
+    "login": 3,
+    "transaction_create": 15,
+    "transaction_list": 35,
+    "dashboard_consolidated": 15,
+    "dashboard_quick_stats": 15,
+    "accounts_overview": 12,
+    "bank_import": 5,
+}
+PROBE_INTERVAL_SECONDS = 0.1
+
+class Tenant(NamedTuple):
+    email: str
+    headers: Dict[str, str]
+    account_id: int
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def summarize(timings: List[float], errors: int) -> Dict[str, float]:
+    return {
+        "requests": len(timings),
+        "errors": errors,
+        "error_rate": round(errors / len(timings), 4) if timings else 0.0,
+        "p50_ms": round(percentile(timings, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(timings, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(timings, 0.99) * 1000, 2),
+        "max_ms": round(max(timings, default=0.0) * 1000, 2)
+    }
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, tenants: List[Tenant], seed: int, import_rows: int):
+        self.client = client
+        self.tenants = tenants
+        self.random = random.Random(seed)
+        self.import_rows = import_rows
+        self.timings: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.probe_timings: List[float] = []
+        self.import_round = 0
+
+    async def login(self, tenant: Tenant) -> httpx.Response:
+        return await self.client.post("/auth/login", json={"email": tenant.email, "password": BENCHMARK_PASSWORD})
+
+    async def transaction_create(self, tenant: Tenant) -> httpx.Response:
+        templates, (low, high) = EXPENSE_MERCHANTS[self.random.choice(list(EXPENSE_MERCHANTS))]
+        return await self.client.post("/transactions/", headers=tenant.headers, json={
+            "description": fill(self.random.choice(templates), self.random),
+            "amount": str(money(self.random, low, high)),
+            "transaction_type": "expense",
+            "transaction_date": datetime.now().isoformat(),
+            "from_account_id": tenant.account_id
+        })
+
+    async def transaction_list(self, tenant: Tenant) -> httpx.Response:
+        return await self.client.get("/transactions/?limit=50", headers=tenant.headers)
+
+    async def dashboard_consolidated(self, tenant: Tenant) -> httpx.Response:
+        return await self.client.get("/dashboard/consolidated", headers=tenant.headers)
+
+    async def dashboard_quick_stats(self, tenant: Tenant) -> httpx.Response:
+        return await self.client.get("/dashboard/quick-stats", headers=tenant.headers)
+
+    async def accounts_overview(self, tenant: Tenant) -> httpx.Response:
+        return await self.client.get("/dashboard/accounts-overview", headers=tenant.headers)
+
+    async def bank_import(self, tenant: Tenant) -> httpx.Response:
+        self.import_round += 1
+        today = date.today()
+        lines = ["date,description,amount"] + [
+            f"{today - timedelta(days=row % 30)},PIX ENVIADO CARGA {self.import_round}-{row},-{(row % 50 + 1) * 1.5:.2f}"
+            for row in range(self.import_rows)
+        ]
+        return await self.client.post(
+            f"/bank-import/upload-extract/nubank?account_id={tenant.account_id}",
+            headers=tenant.headers,
+            files={"file": ("extrato.csv", "\n".join(lines).encode("utf-8"), "text/csv")}
+        )
+
+    async def virtual_user(self, index: int, deadline: float) -> None:
+        tenant = self.tenants[index % len(self.tenants)]
+        operations = list(TRAFFIC_MIX)
+        weights = list(TRAFFIC_MIX.values())
+        while time.monotonic() < deadline:
+            operation = self.random.choices(operations, weights)[0]
+            started = time.perf_counter()
+            try:
+                response = await getattr(self, operation)(tenant)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            self.timings.setdefault(operation, []).append(time.perf_counter() - started)
+            if failed:
+                self.errors[operation] = self.errors.get(operation, 0) + 1
+
+    async def probe(self, deadline: float) -> None:
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                await self.client.get("/")
+            except httpx.HTTPError:
+                pass
+            self.probe_timings.append(time.perf_counter() - started)
+            await asyncio.sleep(PROBE_INTERVAL_SECONDS)
+
+    async def run_stage(self, concurrency: int, duration: float) -> Dict:
+        self.timings, self.errors, self.probe_timings = {}, {}, []
+        started = time.monotonic()
+        deadline = started + duration
+        await asyncio.gather(
+            self.probe(deadline),
+            *(self.virtual_user(index, deadline) for index in range(concurrency))
+        )
+        elapsed = time.monotonic() - started
+
+        all_timings = [value for values in self.timings.values() for value in values]
+        total_errors = sum(self.errors.values())
+        return {
+            "concurrency": concurrency,
+            "duration_seconds": round(elapsed, 2),
+            "throughput_rps": round(len(all_timings) / elapsed, 2),
+            **summarize(all_timings, total_errors),
+            "routes": {
+                operation: summarize(self.timings[operation], self.errors.get(operation, 0))
+                for operation in TRAFFIC_MIX if operation in self.timings
+            },
+            "event_loop_probe": summarize(self.probe_timings, 0)
+        }
+
+async def authenticate(client: httpx.AsyncClient, tenants: int) -> List[Tenant]:
+    result = []
+    for number in range(1, tenants + 1):
+        email = f"admin@empresa{number}.com.br"
+        response = await client.post("/auth/login", json={"email": email, "password": BENCHMARK_PASSWORD})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        accounts = (await client.get("/accounts/", headers=headers)).json()
+        result.append(Tenant(email, headers, accounts[0]["id"]))
+    return result
+
+async def run(args, base_url: str) -> Dict:
+    limits = httpx.Limits(max_connections=max(args.stages) + 10, max_keepalive_connections=max(args.stages) + 10)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        tenants = await authenticate(client, args.tenants)
+        load_test = LoadTest(client, tenants, args.seed, args.import_rows)
+
+        stages = []
+        for concurrency in args.stages:
+            stage = await load_test.run_stage(concurrency, args.duration)
+            stages.append(stage)
+            print(f"concorrência {concurrency:>4}: {stage['throughput_rps']:>8.1f} req/s  "
+                  f"p50 {stage['p50_ms']:>7.1f} ms  p95 {stage['p95_ms']:>7.1f} ms  p99 {stage['p99_ms']:>7.1f} ms  "
+                  f"erros {stage['error_rate']:.1%}  sonda p95 {stage['event_loop_probe']['p95_ms']:.1f} ms")
+
+    ceiling = max(stages, key=lambda stage: stage["throughput_rps"])
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "base_url": base_url,
+        "tenants": args.tenants,
+        "traffic_mix": TRAFFIC_MIX,
+        "stages": stages,
+        "throughput_ceiling": {
+            "throughput_rps": ceiling["throughput_rps"],
+            "concurrency": ceiling["concurrency"],
+            "p99_ms": ceiling["p99_ms"]
+        }
+    }
+
+def start_server(args) -> subprocess.Popen:
+    """Gera os dados e sobe o uvicorn; retorna o processo já respondendo"""
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load_test.db')}"
+    backend_dir = os.path.join(os.path.dirname(__file__), '..')
+
+    subprocess.run([
+        sys.executable, "-m", "benchmarks.synthetic_data", "--database-url", database_url,
+        "--companies", str(args.tenants), "--transactions", str(args.transactions), "--seed", str(args.seed)
+    ], cwd=backend_dir, check=True)
+
+    environment = {**os.environ, "DATABASE_URL": database_url, "JOB_INLINE_BUDGET_SECONDS": "0"}
+    server = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.port),
+        "--workers", str(args.server_workers), "--log-level", "warning", "--no-access-log"
+    ], cwd=backend_dir, env=environment)
+
+    for _ in range(100):
+        try:
+            if httpx.get(f"http://127.0.0.1:{args.port}/", timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn terminou antes de responder")
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("uvicorn não respondeu a tempo")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=None, help="Servidor já rodando (padrão: sobe um uvicorn local)")
+    parser.add_argument("--database-url", default=None, help="Banco vazio para o uvicorn local (padrão: SQLite temporário)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--server-workers", type=int, default=1)
+    parser.add_argument("--tenants", type=int, default=10)
+    parser.add_argument("--transactions", type=int, default=20000, help="Transações por empresa geradas")
+    parser.add_argument("--concurrency", default="1,8,32", help="Estágios de concorrência (usuários virtuais)")
+    parser.add_argument("--duration", type=float, default=15.0, help="Segundos por estágio")
+    parser.add_argument("--import-rows", type=int, default=200, help="Linhas por extrato importado")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Grava o resumo em JSON")
+    args = parser.parse_args()
+    args.stages = [int(value) for value in args.concurrency.split(",")]
+
+    server = None if args.base_url else start_server(args)
+    try:
+        summary = asyncio.run(run(args, args.base_url or f"http://127.0.0.1:{args.port}"))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    ceiling = summary["throughput_ceiling"]
+    print(f"\nteto de throughput: {ceiling['throughput_rps']:.1f} req/s com {ceiling['concurrency']} usuários virtuais")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(summary, file, indent=2)
+        print(f"resumo gravado em {args.output}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,377 @@
+"""Gerador determinístico de dados sintéticos por empresa (escala de produção)
+
+Popula empresas, usuários, contas, transações (com descrições no formato
+dos extratos brasileiros: PIX, boletos, cartão, maquininhas), dívidas,
+metas e alertas seguindo models.py, e recalcula o daily_ledger_rollup.
+A mesma semente e a mesma data de referência geram exatamente os mesmos
+dados; as transações são inseridas em blocos, então milhões de linhas
+não ficam todas em memória.
+
+Todos os usuários gerados têm a senha BENCHMARK_PASSWORD.
+
+Uso (a partir de backend/):
+    python -m benchmarks.synthetic_data --companies 10 --transactions 200000
+    python -m benchmarks.synthetic_data --database-url postgresql://.../saas_bench --companies 5 --transactions 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+
+from database import Base
+from models import (
+    Company, User, Account, Transaction, Debt, FinancialGoal, Alert,
+    UserRole, AccountType, TransactionType, DebtType, DebtStatus, GoalStatus, AlertType
+)
+from services.ledger_rollup import ledger_rollup
+from services.transaction_fingerprint import fingerprint_service
+
+BENCHMARK_PASSWORD = "benchmark123"
+
+CITIES = [
+    "SAO PAULO", "RIO DE JANEIRO", "BELO HORIZONTE", "CURITIBA", "PORTO ALEGRE",
+    "RECIFE", "SALVADOR", "FORTALEZA", "CAMPINAS", "GOIANIA", "BRASILIA", "FLORIANOPOLIS"
+]
+PEOPLE = [
+    "MARIA SILVA", "JOAO SANTOS", "ANA OLIVEIRA", "PEDRO SOUZA", "JULIANA LIMA", "CARLOS PEREIRA",
+    "FERNANDA COSTA", "LUCAS RODRIGUES", "PATRICIA ALMEIDA", "RAFAEL NASCIMENTO", "BRUNA ARAUJO"
+]
+COMPANY_NAMES = [
+    "Padaria Pão Dourado", "Oficina Mecânica Dois Irmãos", "Studio Bella Estética", "Mercadinho Bom Preço",
+    "Consultoria Horizonte", "Pet Shop Amigo Fiel", "Restaurante Sabor Caseiro", "Loja Moda Viva",
+    "Clínica Sorriso", "Distribuidora Norte Sul", "Academia Corpo em Forma", "Gráfica Ponto Certo"
+]
+BANKS = ["Nubank", "Itaú", "Bradesco", "Santander", "Banco do Brasil", "Caixa", "Inter", "C6 Bank"]
+
+# Categoria -> (modelos de descrição, faixa de valor em reais)
+EXPENSE_MERCHANTS: Dict[str, Tuple[List[str], Tuple[float, float]]] = {
+    "Alimentação": ([
+        "COMPRA CARTAO SUPERMERCADO {chain} {city}", "IFOOD *{restaurant}", "PADARIA {name} {city}",
+        "RESTAURANTE {name}", "UBER EATS *PEDIDO", "PIX ENVIADO HORTIFRUTI {name}", "RAPPI*{restaurant}"
+    ], (8, 900)),
+    "Transporte": ([
+        "UBER *TRIP", "99 *POP {city}", "POSTO {fuel} {city}", "AUTO POSTO {name} COMBUSTIVEL",
+        "ESTACIONAMENTO {name}", "SEM PARAR PEDAGIO", "METRO {city}"
+    ], (5, 450)),
+    "Saúde": ([
+        "DROGASIL {city}", "DROGA RAIA {number}", "FARMACIA PAGUE MENOS", "LABORATORIO FLEURY EXAME",
+        "CLINICA {name} CONSULTA", "DENTISTA {person}"
+    ], (15, 1200)),
+    "Lazer": ([
+        "NETFLIX.COM", "SPOTIFY BRASIL", "CINEMARK {city}", "INGRESSO.COM SHOW", "SMARTFIT ACADEMIA",
+        "BAR DO {name}"
+    ], (20, 400)),
+    "Casa": ([
+        "DEBITO AUT ENEL ENERGIA", "DEBITO AUT SABESP AGUA", "COMGAS GAS", "VIVO FIBRA INTERNET",
+        "PAG BOLETO ALUGUEL {person}", "PAG BOLETO CONDOMINIO {name}", "CLARO TELEFONE"
+    ], (60, 4500)),
+    "Educação": ([
+        "UDEMY CURSO", "ALURA ASSINATURA", "LIVRARIA CULTURA LIVRO", "PAG BOLETO ESCOLA {name} MENSALIDADE"
+    ], (30, 2500)),
+    "Vestuário": ([
+        "COMPRA CARTAO RENNER ROUPA", "C&A {city}", "CENTAURO TENIS", "RIACHUELO {city}", "NIKE STORE"
+    ], (40, 800)),
+    "Tecnologia": ([
+        "MERCADOLIVRE*{name} CELULAR", "KABUM NOTEBOOK", "MICROSOFT 365", "GOOGLE WORKSPACE",
+        "AMAZON AWS SISTEMA", "APPLE.COM/BILL APP"
+    ], (10, 6000)),
+    "Impostos": ([
+        "PAG BOLETO SIMPLES NACIONAL DAS", "DARF IRPJ", "GUIA ISS {city}", "IPVA {city}"
+    ], (80, 9000)),
+    "Serviços": ([
+        "PIX ENVIADO CONTABILIDADE {name}", "MANUTENCAO AR CONDICIONADO", "ELETRICISTA {person}",
+        "SERVICO DE LIMPEZA {name}"
+    ], (50, 3000)),
+}
+# Descrições que nenhum classificador reconhece (ficam sem categoria)
+UNCATEGORIZED_EXPENSES = ["PIX ENVIADO {person}", "TED ENVIADA {person}", "COMPRA CARTAO LOJA {number}", "SAQUE 24H {city}"]
+INCOME_SOURCES = [
+    "PIX RECEBIDO {person}", "TED RECEBIDA {name} LTDA", "VENDA CIELO CREDITO", "VENDA STONE DEBITO",
+    "PAGSEGURO VENDAS", "GETNET ANTECIPACAO", "RENDIMENTO POUPANCA", "DEPOSITO {person}"
+]
+FILLERS = {
+    "chain": ["CARREFOUR", "PAO DE ACUCAR", "ASSAI ATACADISTA", "ATACADAO", "EXTRA", "DIA"],
+    "restaurant": ["PIZZARIA BELLA", "HAMBURGUERIA 10", "SUSHI YAMA", "LANCHONETE DO ZE"],
+    "fuel": ["SHELL", "IPIRANGA", "PETROBRAS", "ALE"],
+    "name": ["CENTRAL", "BOA VISTA", "SAO JORGE", "PRIMAVERA", "ESPERANCA", "AURORA", "DO PORTO"],
+}
+
+DEBT_CREDITORS = ["Banco do Brasil", "Caixa", "Nubank", "Itaú", "Santander", "Financeira Omni"]
+GOALS = [("Reserva de emergência", "emergência"), ("Troca de equipamentos", "equipamentos"),
+         ("Reforma da loja", "reforma"), ("Capital de giro", "capital de giro"), ("Viagem", "viagem")]
+
+def fill(template: str, rnd: random.Random) -> str:
+    return template.format(
+        city=rnd.choice(CITIES), person=rnd.choice(PEOPLE), number=rnd.randint(1, 9999),
+        **{key: rnd.choice(values) for key, values in FILLERS.items()}
+    )
+
+def money(rnd: random.Random, low: float, high: float) -> Decimal:
+    """Valor com mais massa nas faixas baixas (como em extratos reais)"""
+    value = low + (high - low) * rnd.random() ** 2.5
+    return Decimal(f"{value:.2f}")
+
+class SyntheticTenantGenerator:
+    """Gera os dados de cada empresa a partir de uma semente
+
+    Cada empresa usa a sua própria sequência aleatória (semente + índice),
+    então gerar 10 empresas ou só a 7ª produz os mesmos dados para ela.
+    """
+
+    def __init__(self, seed: int = 42, anchor: Optional[date] = None, days: int = 365,
+                 chunk_size: int = 10000):
+        self.seed = seed
+        self.anchor = datetime.combine(anchor or date.today(), datetime.min.time()) + timedelta(hours=23)
+        self.days = days
+        self.chunk_size = chunk_size
+        self._password_hash: Optional[str] = None
+
+    def populate(self, connection, companies: int, transactions_per_company: int,
+                 users_per_company: int = 2, accounts_per_company: int = 3) -> Dict[str, int]:
+        """Gera todas as empresas; retorna as contagens inseridas"""
+        totals = {"companies": 0, "users": 0, "accounts": 0, "transactions": 0,
+                  "debts": 0, "goals": 0, "alerts": 0}
+        for index in range(companies):
+            counts = self.populate_company(connection, index, transactions_per_company,
+                                           users_per_company, accounts_per_company)
+            for key, value in counts.items():
+                totals[key] += value
+        if connection.dialect.name in ("postgresql", "sqlite"):
+            connection.execute(text("ANALYZE"))
+        return totals
+
+    def populate_company(self, connection, index: int, transactions: int,
+                         users: int = 2, accounts: int = 3) -> Dict[str, int]:
+        rnd = random.Random(f"{self.seed}:{index}")
+
+        company_id = connection.execute(insert(Company).returning(Company.id), {
+            "name": f"{COMPANY_NAMES[index % len(COMPANY_NAMES)]} {index + 1}",
+            "cnpj": self._cnpj(index),
+            "email": f"contato@empresa{index + 1}.com.br",
+            "phone": f"(11) 9{rnd.randint(1000, 9999)}-{rnd.randint(1000, 9999)}"
+        }).scalar_one()
+
+        user_ids = connection.execute(insert(User).returning(User.id, sort_by_parameter_order=True), [
+            {
+                "email": f"{'admin' if number == 0 else f'usuario{number}'}@empresa{index + 1}.com.br",
+                "hashed_password": self.password_hash,
+                "full_name": rnd.choice(PEOPLE).title(),
+                "role": UserRole.ADMIN if number == 0 else UserRole.USER,
+                "company_id": company_id
+            }
+            for number in range(users)
+        ]).scalars().all()
+
+        account_types = [AccountType.BANK, AccountType.CREDIT_CARD, AccountType.CASH]
+        account_rows = [
+            {
+                "name": f"Conta {number + 1}" if account_types[number % 3] != AccountType.CASH else "Caixa da loja",
+                "account_type": account_types[number % 3],
+                "balance": money(rnd, 500, 80000),
+                "bank_name": rnd.choice(BANKS) if account_types[number % 3] != AccountType.CASH else None,
+                "account_number": f"{rnd.randint(10000, 99999)}-{rnd.randint(0, 9)}",
+                "company_id": company_id
+            }
+            for number in range(accounts)
+        ]
+        account_ids = connection.execute(
+            insert(Account).returning(Account.id, sort_by_parameter_order=True), account_rows
+        ).scalars().all()
+        income_accounts = [
+            account_id for account_id, row in zip(account_ids, account_rows)
+            if row["account_type"] == AccountType.BANK
+        ] or list(account_ids)
+
+        inserted = 0
+        for chunk in self._transactions(rnd, company_id, user_ids, account_ids, income_accounts, transactions):
+            connection.execute(insert(Transaction), chunk)
+            inserted += len(chunk)
+
+        debts = self._debts(rnd, company_id, user_ids[0])
+        goals = self._goals(rnd, company_id, user_ids[0], account_ids[0])
+        alerts = self._alerts(rnd, company_id, user_ids[0], max(transactions // 500, 3))
+        for model, rows in ((Debt, debts), (FinancialGoal, goals), (Alert, alerts)):
+            if rows:
+                connection.execute(insert(model), rows)
+
+        with Session(bind=connection) as db:
+            ledger_rollup.rebuild(db, company_id)
+
+        return {"companies": 1, "users": len(user_ids), "accounts": len(account_ids),
+                "transactions": inserted, "debts": len(debts), "goals": len(goals), "alerts": len(alerts)}
+
+    @property
+    def password_hash(self) -> str:
+        if self._password_hash is None:
+            from auth import get_password_hash
+            self._password_hash = get_password_hash(BENCHMARK_PASSWORD)
+        return self._password_hash
+
+    def _transactions(self, rnd: random.Random, company_id: int, user_ids, account_ids,
+                      income_accounts, count: int) -> Iterator[List[dict]]:
+        categories = list(EXPENSE_MERCHANTS)
+        # Peso de cada categoria no volume de despesas
+        weights = [30, 18, 6, 6, 8, 3, 4, 6, 4, 5]
+        occurrences: Dict[str, int] = {}
+        chunk: List[dict] = []
+
+        for _ in range(count):
+            # Horário comercial mais frequente, mais movimento em datas recentes
+            moment = self.anchor - timedelta(
+                days=int(self.days * rnd.random() ** 1.3),
+                minutes=rnd.choice([rnd.randint(0, 1439), rnd.randint(600, 1080)])
+            )
+
+            if rnd.random() < 0.35:
+                transaction_type = TransactionType.INCOME
+                description = fill(rnd.choice(INCOME_SOURCES), rnd)
+                amount = money(rnd, 20, 15000)
+                category = "Vendas" if rnd.random() < 0.7 else None
+                account_id = rnd.choice(income_accounts)
+            else:
+                transaction_type = TransactionType.EXPENSE
+                account_id = rnd.choice(account_ids)
+                if rnd.random() < 0.12:
+                    description = fill(rnd.choice(UNCATEGORIZED_EXPENSES), rnd)
+                    amount = money(rnd, 5, 2000)
+                    category = None
+                else:
+                    category = rnd.choices(categories, weights)[0]
+                    templates, (low, high) = EXPENSE_MERCHANTS[category]
+                    description = fill(rnd.choice(templates), rnd)
+                    amount = money(rnd, low, high)
+                    # Parte das despesas ainda não foi categorizada
+                    if rnd.random() < 0.15:
+                        category = None
+
+            normalized = fingerprint_service.normalize_description(description)
+            key = f"{account_id}|{moment.date()}|{amount}|{transaction_type.name}|{normalized}"
+            occurrence = occurrences.get(key, 0)
+            occurrences[key] = occurrence + 1
+
+            chunk.append({
+                "description": description,
+                "amount": amount,
+                "transaction_type": transaction_type,
+                "category": category,
+                "transaction_date": moment,
+                "from_account_id": account_id if transaction_type == TransactionType.EXPENSE else None,
+                "to_account_id": account_id if transaction_type == TransactionType.INCOME else None,
+                "is_personal": None if rnd.random() < 0.3 else rnd.random() < 0.25,
+                "ml_confidence": Decimal(f"0.{rnd.randint(40, 99)}") if category and rnd.random() < 0.5 else None,
+                "is_recurring": "DEBITO AUT" in description,
+                "fingerprint": fingerprint_service.compute(
+                    company_id, account_id, moment, amount, transaction_type, normalized, occurrence
+                ),
+                "company_id": company_id,
+                "user_id": rnd.choice(user_ids)
+            })
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+    def _debts(self, rnd: random.Random, company_id: int, user_id: int) -> List[dict]:
+        rows = []
+        for _ in range(rnd.randint(1, 5)):
+            installments = rnd.choice([6, 12, 24, 36, 48])
+            paid = rnd.randint(0, installments - 1)
+            installment_amount = money(rnd, 150, 5000)
+            due_day = rnd.randint(1, 28)
+            rows.append({
+                "name": rnd.choice(["Empréstimo capital de giro", "Financiamento do veículo",
+                                    "Maquininha parcelada", "Cartão empresarial", "Consórcio"]),
+                "debt_type": rnd.choice(list(DebtType)),
+                "total_amount": installment_amount * installments,
+                "remaining_amount": installment_amount * (installments - paid),
+                "interest_rate": Decimal(f"0.0{rnd.randint(10, 99)}"),
+                "installments_total": installments,
+                "installments_paid": paid,
+                "installment_amount": installment_amount,
+                "due_day": due_day,
+                "next_due_date": self.anchor.replace(day=due_day, hour=0) + timedelta(days=rnd.choice([-35, 0, 30])),
+                "status": rnd.choices([DebtStatus.ACTIVE, DebtStatus.PAID, DebtStatus.OVERDUE], [7, 2, 1])[0],
+                "creditor": rnd.choice(DEBT_CREDITORS),
+                "company_id": company_id,
+                "user_id": user_id
+            })
+        return rows
+
+    def _goals(self, rnd: random.Random, company_id: int, user_id: int, account_id: int) -> List[dict]:
+        rows = []
+        for name, category in rnd.sample(GOALS, rnd.randint(0, 4)):
+            target = money(rnd, 2000, 100000)
+            rows.append({
+                "name": name,
+                "target_amount": target,
+                "current_amount": (target * Decimal(rnd.random())).quantize(Decimal("0.01")),
+                "target_date": self.anchor + timedelta(days=rnd.randint(30, 720)),
+                "status": rnd.choices([GoalStatus.ACTIVE, GoalStatus.COMPLETED, GoalStatus.PAUSED], [6, 2, 1])[0],
+                "category": category,
+                "monthly_target": (target / 12).quantize(Decimal("0.01")),
+                "company_id": company_id,
+                "user_id": user_id,
+                "account_id": account_id
+            })
+        return rows
+
+    def _alerts(self, rnd: random.Random, company_id: int, user_id: int, count: int) -> List[dict]:
+        rows = []
+        for _ in range(count):
+            alert_type = rnd.choice(list(AlertType))
+            rows.append({
+                "title": f"Alerta: {alert_type.value.replace('_', ' ')}",
+                "message": "Alerta gerado para o benchmark",
+                "alert_type": alert_type,
+                "is_read": rnd.random() < 0.8,
+                "priority": rnd.randint(1, 3),
+                "company_id": company_id,
+                "user_id": user_id,
+                "created_at": self.anchor - timedelta(hours=rnd.randint(0, 24 * 90))
+            })
+        return rows
+
+    def _cnpj(self, index: int) -> str:
+        digits = f"{self.seed % 100:02d}{index:06d}0001"
+        return f"{digits[:2]}.{digits[2:5]}.{digits[5:8]}/{digits[8:12]}-{index % 100:02d}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    parser.add_argument("--companies", type=int, default=5)
+    parser.add_argument("--transactions", type=int, default=100000, help="Transações por empresa")
+    parser.add_argument("--users", type=int, default=2, help="Usuários por empresa")
+    parser.add_argument("--accounts", type=int, default=3, help="Contas por empresa")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--anchor-date", type=date.fromisoformat, default=None,
+                        help="Data mais recente dos dados (padrão: hoje)")
+    parser.add_argument("--days", type=int, default=365, help="Período coberto pelas transações")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(bind=engine)
+
+    generator = SyntheticTenantGenerator(seed=args.seed, anchor=args.anchor_date, days=args.days)
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        totals = generator.populate(connection, args.companies, args.transactions, args.users, args.accounts)
+    elapsed = time.perf_counter() - started
+
+    for key, value in totals.items():
+        print(f"{key + ':':15} {value}")
+    print(f"{'tempo:':15} {elapsed:.1f}s ({totals['transactions'] / elapsed:.0f} transações/s)")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -39,6 +41,36 @@ engine = create_engine(DATABASE_URL, **engine_config)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def build_async_database_url(database_url: str):
+    """Converte a URL síncrona para o driver assíncrono (asyncpg ou aiosqlite)
+
+    O asyncpg não aceita os parâmetros libpq da URL (sslmode, channel_binding);
+    eles são removidos e o SSL passa a ser configurado em connect_args.
+    Retorna (url, connect_args).
+    """
+    url = make_url(database_url)
+    connect_args = {}
+
+    if url.get_backend_name() == "postgresql":
+        sslmode = url.query.get("sslmode")
+        url = url.set(drivername="postgresql+asyncpg").difference_update_query(["sslmode", "channel_binding"])
+        if (sslmode and sslmode != "disable") or engine_config.get("connect_args", {}).get("sslmode") == "require":
+            connect_args["ssl"] = "require"
+    elif url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+
+    return url, connect_args
+
+ASYNC_DATABASE_URL, async_connect_args = build_async_database_url(DATABASE_URL)
+
+async_engine_config = {key: value for key, value in engine_config.items() if key != "connect_args"}
+if async_connect_args:
+    async_engine_config["connect_args"] = async_connect_args
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **async_engine_config)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Dependency
@@ -47,4 +79,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependency para rotas async (não bloqueia o event loop)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
\ No newline at end of file
@@ -7,11 +7,11 @@ import os
 import logging
 from dotenv import load_dotenv
 
-from database import engine, get_db
-from models import Base
-from routers import auth
-from routers import accounts, transactions
-from routers import bank_import, debts, goals, reports, gamification, permissions, dashboard
+from database import engine, async_engine, get_db
+from services.password_hashing import PasswordHashingBusy
+from services.query_instrumentation import query_instrumentation, QueryInstrumentationMiddleware
+from services.metrics import register_metrics
+from services.startup import startup
 
 load_dotenv()
 
@@ -19,8 +19,8 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Criar tabelas
-Base.metadata.create_all(bind=engine)
+# Criar tabelas (só em desenvolvimento; fora dele o schema vem das migrações)
+startup.create_tables()
 
 # Inicializar FastAPI
 app = FastAPI(
@@ -56,19 +56,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Query-Count", "Server-Timing"],
 )
 
-# Incluir routers
-app.include_router(auth.router)
-app.include_router(accounts.router)
-app.include_router(transactions.router)
-app.include_router(bank_import.router)
-app.include_router(debts.router)
-app.include_router(goals.router)
-app.include_router(reports.router)
-app.include_router(gamification.router)
-app.include_router(permissions.router)
-app.include_router(dashboard.router)
+# Consultas SQL por requisição: X-Query-Count, Server-Timing e orçamento por rota
+query_instrumentation.instrument(engine)
+query_instrumentation.instrument(async_engine.sync_engine)
+app.add_middleware(QueryInstrumentationMiddleware)
+
+# Latência, status e erros por rota e GET /metrics (token opcional em METRICS_TOKEN)
+register_metrics(app)
+
+# Incluir routers (fora de desenvolvimento, na primeira requisição a cada prefixo)
+startup.register_routers(app, [
+    "auth", "accounts", "transactions", "bank_import", "debts", "goals",
+    "reports", "gamification", "permissions", "dashboard", "jobs"
+])
 
 # Rota de health check
 @app.get("/")
@@ -105,6 +108,15 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         content={"detail": exc.errors()}
     )
 
+@app.exception_handler(PasswordHashingBusy)
+async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusy):
+    # Pool de bcrypt saturado: back-pressure em vez de enfileirar sem limite
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many authentication requests, try again shortly"},
+        headers={"Retry-After": "1"}
+    )
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     logging.error(f"Global exception on {request.method} {request.url}: {str(exc)}")
@@ -0,0 +1,60 @@
+"""Migração para a varredura agendada de alertas
+
+Esta migração adiciona:
+- Coluna alerts.dedupe_key e índice único (company_id, dedupe_key): a
+  varredura insere com INSERT ... SELECT ... ON CONFLICT DO NOTHING nesse
+  índice, ignorando alertas já gravados
+- Tabela alert_settings com a configuração da varredura por empresa
+- Tabela alert_sweep_runs com as execuções (slot único por intervalo) e
+  suas métricas de tempo
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_alert_sweeper'
+down_revision = 'add_jobs_table'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('alerts', sa.Column('dedupe_key', sa.String(100), nullable=True))
+    op.create_index('ux_alerts_company_dedupe_key', 'alerts', ['company_id', 'dedupe_key'], unique=True)
+
+    op.create_table(
+        'alert_settings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('sweep_enabled', sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column('overdue_debts_enabled', sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column('spending_spikes_enabled', sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column('spike_threshold', sa.Numeric(5, 2), nullable=False, server_default='1.5'),
+        sa.Column('spike_min_amount', sa.Numeric(15, 2), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('company_id')
+    )
+    op.create_index('ix_alert_settings_id', 'alert_settings', ['id'])
+
+    op.create_table(
+        'alert_sweep_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('slot', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('metrics', sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('slot')
+    )
+    op.create_index('ix_alert_sweep_runs_id', 'alert_sweep_runs', ['id'])
+
+def downgrade():
+    op.drop_index('ix_alert_sweep_runs_id', table_name='alert_sweep_runs')
+    op.drop_table('alert_sweep_runs')
+    op.drop_index('ix_alert_settings_id', table_name='alert_settings')
+    op.drop_table('alert_settings')
+    op.drop_index('ux_alerts_company_dedupe_key', table_name='alerts')
+    op.drop_column('alerts', 'dedupe_key')
@@ -0,0 +1,77 @@
+"""Migração para adicionar o agregado diário de lançamentos
+
+Esta migração adiciona:
+- Tabela daily_ledger_rollup com totais e quantidades por
+  (company_id, day, transaction_type, category, is_personal, account_id)
+- Carga inicial do agregado a partir das transações existentes
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from sqlalchemy import text
+
+# revision identifiers
+revision = 'add_daily_ledger_rollup'
+down_revision = 'add_advanced_features'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    transaction_type = postgresql.ENUM(name='transactiontype', create_type=False)
+
+    # Criar tabela do agregado diário
+    op.create_table(
+        'daily_ledger_rollup',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('transaction_type', transaction_type, nullable=False),
+        sa.Column('category', sa.String(100), nullable=True),
+        sa.Column('is_personal', sa.Boolean(), nullable=True),
+        sa.Column('account_id', sa.Integer(), nullable=True),
+        sa.Column('total_amount', sa.Numeric(18, 2), default=0, nullable=False),
+        sa.Column('transaction_count', sa.Integer(), default=0, nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_daily_ledger_rollup_id', 'daily_ledger_rollup', ['id'])
+    op.create_index(
+        'ix_daily_ledger_rollup_key', 'daily_ledger_rollup',
+        ['company_id', 'day', 'transaction_type', 'category', 'is_personal', 'account_id']
+    )
+
+    # Carga inicial a partir das transações existentes
+    op.execute(
+        text("""
+        INSERT INTO daily_ledger_rollup (
+            company_id, day, transaction_type, category, is_personal,
+            account_id, total_amount, transaction_count, updated_at
+        )
+        SELECT
+            company_id,
+            date(transaction_date),
+            transaction_type,
+            category,
+            is_personal,
+            CASE WHEN transaction_type = 'INCOME' THEN to_account_id ELSE from_account_id END,
+            sum(amount),
+            count(id),
+            now()
+        FROM transactions
+        GROUP BY
+            company_id,
+            date(transaction_date),
+            transaction_type,
+            category,
+            is_personal,
+            CASE WHEN transaction_type = 'INCOME' THEN to_account_id ELSE from_account_id END
+        """)
+    )
+
+def downgrade():
+    op.drop_index('ix_daily_ledger_rollup_key', table_name='daily_ledger_rollup')
+    op.drop_index('ix_daily_ledger_rollup_id', table_name='daily_ledger_rollup')
+    op.drop_table('daily_ledger_rollup')
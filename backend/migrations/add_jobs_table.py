@@ -0,0 +1,60 @@
+"""Migração para adicionar a fila de jobs em segundo plano
+
+Esta migração adiciona:
+- Tabela jobs (tipo, status, parâmetros, arquivo de entrada, cursor de
+  retomada, progresso, resultado, lease do worker)
+- Índices (status, scheduled_at) para a reserva de jobs pelos workers e
+  (company_id, created_at) para a listagem por empresa
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers
+revision = 'add_jobs_table'
+down_revision = 'add_transaction_category_manual'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    job_status = postgresql.ENUM('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED', name='jobstatus')
+    job_status.create(op.get_bind(), checkfirst=True)
+
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_type', sa.String(50), nullable=False),
+        sa.Column('status', postgresql.ENUM(name='jobstatus', create_type=False), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('input_data', sa.Text(), nullable=True),
+        sa.Column('cursor', sa.JSON(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('progress_current', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('progress_total', sa.Integer(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='3'),
+        sa.Column('scheduled_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('locked_by', sa.String(100), nullable=True),
+        sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_jobs_id', 'jobs', ['id'])
+    op.create_index('ix_jobs_status_scheduled', 'jobs', ['status', 'scheduled_at'])
+    op.create_index('ix_jobs_company_created', 'jobs', ['company_id', 'created_at'])
+
+def downgrade():
+    op.drop_index('ix_jobs_company_created', table_name='jobs')
+    op.drop_index('ix_jobs_status_scheduled', table_name='jobs')
+    op.drop_index('ix_jobs_id', table_name='jobs')
+    op.drop_table('jobs')
+    postgresql.ENUM(name='jobstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,38 @@
+"""Migração para adicionar índices compostos das consultas por empresa
+
+Esta migração adiciona:
+- transactions (company_id, transaction_type, transaction_date)
+- transactions (company_id, category)
+- alerts (company_id, is_read, created_at)
+- debts (company_id, status, next_due_date)
+
+O caminho (company_id, transaction_date) já é atendido pelo índice
+ix_transactions_company_date_id (add_transactions_keyset_index).
+No PostgreSQL os índices são criados com CONCURRENTLY, sem bloquear escritas.
+"""
+
+from alembic import op
+
+# revision identifiers
+revision = 'add_tenant_composite_indexes'
+down_revision = 'add_transactions_keyset_index'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_transactions_company_type_date', 'transactions', ['company_id', 'transaction_type', 'transaction_date']),
+    ('ix_transactions_company_category', 'transactions', ['company_id', 'category']),
+    ('ix_alerts_company_read_created', 'alerts', ['company_id', 'is_read', 'created_at']),
+    ('ix_debts_company_status_due', 'debts', ['company_id', 'status', 'next_due_date']),
+]
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY não pode rodar dentro de uma transação
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
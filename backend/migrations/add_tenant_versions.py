@@ -0,0 +1,29 @@
+"""Migração para o ETag das listagens por versão do tenant
+
+Esta migração adiciona:
+- Tabela tenant_versions (uma linha por empresa), incrementada a cada
+  escrita; o ETag passa a ser uma leitura pela chave primária em vez de
+  agregar as tabelas do tenant a cada requisição
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_tenant_versions'
+down_revision = 'add_alert_sweeper'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'tenant_versions',
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('company_id')
+    )
+
+def downgrade():
+    op.drop_table('tenant_versions')
@@ -0,0 +1,34 @@
+"""Migração para marcar as categorias definidas manualmente
+
+Esta migração adiciona:
+- Coluna transactions.category_manual (categoria definida ou corrigida pelo
+  usuário), usada como base de treino do categorizador por empresa e para
+  que a categorização automática não sobrescreva escolhas do usuário
+- Carga inicial: transações com categoria e sem ml_confidence (criadas pela
+  API com categoria informada) são consideradas manuais
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+# revision identifiers
+revision = 'add_transaction_category_manual'
+down_revision = 'add_tenant_composite_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column(
+        'transactions',
+        sa.Column('category_manual', sa.Boolean(), nullable=False, server_default=sa.false())
+    )
+
+    op.get_bind().execute(text("""
+        UPDATE transactions
+        SET category_manual = TRUE
+        WHERE category IS NOT NULL AND ml_confidence IS NULL
+    """))
+
+def downgrade():
+    op.drop_column('transactions', 'category_manual')
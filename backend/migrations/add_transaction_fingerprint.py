@@ -0,0 +1,86 @@
+"""Migração para adicionar o fingerprint de conteúdo das transações
+
+Esta migração adiciona:
+- Coluna transactions.fingerprint (SHA-256 de empresa, conta, dia, valor,
+  descrição normalizada e ocorrência)
+- Carga dos fingerprints das transações existentes, por empresa e em
+  blocos com commit por bloco
+- Índice único (company_id, fingerprint) usado na deduplicação de importações
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+from models import TransactionType
+from services.transaction_fingerprint import fingerprint_service
+
+# revision identifiers
+revision = 'add_transaction_fingerprint'
+down_revision = 'add_daily_ledger_rollup'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+def upgrade():
+    op.add_column('transactions', sa.Column('fingerprint', sa.String(64), nullable=True))
+
+    # Carga dos fingerprints por empresa, em blocos de BACKFILL_BATCH_SIZE
+    # lidos por id e gravados com commit por bloco: nem a tabela nem a
+    # migração inteira ficam em memória ou numa única transação
+    with op.get_context().autocommit_block():
+        _backfill_fingerprints(op.get_bind())
+
+    op.create_index(
+        'ux_transactions_company_fingerprint', 'transactions',
+        ['company_id', 'fingerprint'], unique=True
+    )
+
+def _backfill_fingerprints(connection):
+    """Transações idênticas recebem ocorrências 0, 1, 2... por id, dentro da empresa"""
+    company_ids = connection.execute(text("SELECT id FROM companies ORDER BY id")).scalars().all()
+    for company_id in company_ids:
+        # As chaves incluem a empresa: as ocorrências não passam de uma empresa para outra
+        occurrences = {}
+        last_id = 0
+        while True:
+            rows = connection.execute(
+                text("""
+                SELECT id, company_id, from_account_id, to_account_id, transaction_date,
+                       amount, transaction_type, description
+                FROM transactions
+                WHERE company_id = :company_id AND id > :last_id
+                ORDER BY id
+                LIMIT :limit
+                """).columns(transaction_date=sa.DateTime(timezone=True), amount=sa.Numeric(15, 2)),
+                {"company_id": company_id, "last_id": last_id, "limit": BACKFILL_BATCH_SIZE}
+            ).all()
+            if not rows:
+                break
+
+            batch = []
+            for row in rows:
+                transaction_type = TransactionType[row.transaction_type]
+                account_id = row.to_account_id if transaction_type == TransactionType.INCOME else row.from_account_id
+                normalized_description = fingerprint_service.normalize_description(row.description)
+
+                key = (row.company_id, account_id, row.transaction_date.date(),
+                       row.amount, transaction_type, normalized_description)
+                occurrence = occurrences.get(key, 0)
+                occurrences[key] = occurrence + 1
+
+                batch.append({
+                    "transaction_id": row.id,
+                    "fingerprint": fingerprint_service.compute(*key, occurrence)
+                })
+
+            connection.execute(
+                text("UPDATE transactions SET fingerprint = :fingerprint WHERE id = :transaction_id"),
+                batch
+            )
+            last_id = rows[-1].id
+
+def downgrade():
+    op.drop_index('ux_transactions_company_fingerprint', table_name='transactions')
+    op.drop_column('transactions', 'fingerprint')
@@ -0,0 +1,24 @@
+"""Migração para a paginação por chave (cursor) das transações
+
+Esta migração adiciona:
+- Índice composto (company_id, transaction_date DESC, id DESC) em transactions,
+  usado por GET /transactions com o parâmetro cursor
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_transactions_keyset_index'
+down_revision = 'add_transaction_fingerprint'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index(
+        'ix_transactions_company_date_id', 'transactions',
+        ['company_id', sa.text('transaction_date DESC'), sa.text('id DESC')]
+    )
+
+def downgrade():
+    op.drop_index('ix_transactions_company_date_id', table_name='transactions')
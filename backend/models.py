@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Enum, Numeric, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Date, Boolean, ForeignKey, Text, Enum, Numeric, JSON, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, false
 from database import Base
 import enum
 
@@ -65,6 +65,12 @@ class AchievementType(enum.Enum):
     STREAK_TRACKING = "streak_tracking"
     BUDGET_ADHERENCE = "budget_adherence"
 
+class JobStatus(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
 class SubscriptionPlan(enum.Enum):
     FREE = "free"
     PRO_MONTHLY = "pro_monthly"
@@ -142,12 +148,21 @@ class Transaction(Base):
     category_id = Column(Integer, ForeignKey("transaction_categories.id"), nullable=True)  # nova categoria
     is_personal = Column(Boolean, nullable=True)  # separação pessoal/empresarial
     ml_confidence = Column(Numeric(3, 2), nullable=True)  # confiança da categorização automática
+    category_manual = Column(Boolean, nullable=False, default=False, server_default=false())  # categoria definida/corrigida pelo usuário
     is_recurring = Column(Boolean, default=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     notes = Column(Text, nullable=True)
+    fingerprint = Column(String(64), nullable=True)  # hash de conteúdo para deduplicar importações
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    __table_args__ = (
+        Index("ux_transactions_company_fingerprint", "company_id", "fingerprint", unique=True),
+        Index("ix_transactions_company_date_id", company_id, transaction_date.desc(), id.desc()),
+        Index("ix_transactions_company_type_date", "company_id", "transaction_type", "transaction_date"),
+        Index("ix_transactions_company_category", "company_id", "category"),
+    )
+    
     # Relationships
     company = relationship("Company", back_populates="transactions")
     user = relationship("User", back_populates="transactions")
@@ -275,6 +290,10 @@ class Debt(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    __table_args__ = (
+        Index("ix_debts_company_status_due", "company_id", "status", "next_due_date"),
+    )
+    
     # Relationships
     company = relationship("Company")
     user = relationship("User")
@@ -314,10 +333,16 @@ class Alert(Base):
     is_active = Column(Boolean, default=True)
     priority = Column(Integer, default=1)  # 1=baixa, 2=média, 3=alta
     alert_metadata = Column(JSON, nullable=True)  # dados específicos do alerta
+    dedupe_key = Column(String(100), nullable=True)  # um alerta por evento (ex.: "spending_spike:2024-05-01")
     company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        Index("ix_alerts_company_read_created", "company_id", "is_read", "created_at"),
+        Index("ux_alerts_company_dedupe_key", "company_id", "dedupe_key", unique=True),
+    )
+    
     # Relationships
     company = relationship("Company")
     user = relationship("User")
@@ -364,4 +389,109 @@ class Budget(Base):
     
     # Relationships
     company = relationship("Company")
-    user = relationship("User")
\ No newline at end of file
+    user = relationship("User")
+
+# Agregados para relatórios
+
+class DailyLedgerRollup(Base):
+    """Totais diários por empresa, mantidos incrementalmente a cada escrita de transação.
+
+    Pode haver mais de uma linha para a mesma chave (escritas concorrentes);
+    as leituras sempre agregam com SUM, então o resultado continua correto.
+    """
+    __tablename__ = "daily_ledger_rollup"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    transaction_type = Column(Enum(TransactionType), nullable=False)
+    category = Column(String(100), nullable=True)
+    is_personal = Column(Boolean, nullable=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=True)
+    total_amount = Column(Numeric(18, 2), nullable=False, default=0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        Index("ix_daily_ledger_rollup_key", "company_id", "day", "transaction_type", "category", "is_personal", "account_id"),
+    )
+
+# Fila de jobs em segundo plano
+
+class Job(Base):
+    """Job em segundo plano (importações e lotes), processado por services/job_queue.py
+
+    O próprio banco é a fila: um worker reserva o job com um lease
+    (locked_by/locked_until) e grava o cursor a cada bloco processado, na
+    mesma transação do bloco. Se o worker cair, o lease expira e outro
+    worker continua do último cursor gravado.
+    """
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String(50), nullable=False)
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    payload = Column(JSON, nullable=True)  # parâmetros do job
+    input_data = Column(Text, nullable=True)  # arquivo enviado (ex.: CSV do extrato)
+    cursor = Column(JSON, nullable=True)  # ponto de retomada e totais parciais
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    progress_current = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)  # execuções que falharam
+    max_attempts = Column(Integer, nullable=False, default=3)
+    scheduled_at = Column(DateTime(timezone=True), nullable=False)  # não executar antes (retentativas)
+    locked_by = Column(String(100), nullable=True)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    __table_args__ = (
+        Index("ix_jobs_status_scheduled", "status", "scheduled_at"),
+        Index("ix_jobs_company_created", "company_id", "created_at"),
+    )
+    
+    # Relationships
+    company = relationship("Company")
+    user = relationship("User")
+
+# Varredura agendada de alertas
+
+class AlertSettings(Base):
+    """Configuração da varredura de alertas por empresa (sem linha = valores padrão)"""
+    __tablename__ = "alert_settings"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False, unique=True)
+    sweep_enabled = Column(Boolean, nullable=False, default=True)
+    overdue_debts_enabled = Column(Boolean, nullable=False, default=True)
+    spending_spikes_enabled = Column(Boolean, nullable=False, default=True)
+    spike_threshold = Column(Numeric(5, 2), nullable=False, default=1.5)  # gasto do dia / média diária
+    spike_min_amount = Column(Numeric(15, 2), nullable=False, default=0)  # ignora dias com gasto menor
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Relationships
+    company = relationship("Company")
+
+class AlertSweepRun(Base):
+    """Execução da varredura de alertas; `slot` único garante uma execução por intervalo"""
+    __tablename__ = "alert_sweep_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    slot = Column(Integer, nullable=False, unique=True)  # epoch // intervalo
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    metrics = Column(JSON, nullable=True)  # tempos e contagens da execução
+
+class TenantVersion(Base):
+    """Versão de escrita do tenant: incrementada a cada alteração dos seus dados (ETag das listagens e cache de respostas)"""
+    __tablename__ = "tenant_versions"
+    
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
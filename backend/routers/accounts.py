@@ -7,10 +7,12 @@ from database import get_db
 from models import Account, User
 from schemas import Account as AccountSchema, AccountCreate, AccountUpdate
 from auth import get_current_active_user
+from services.response_cache import response_cache
+from services.tenant_etag import conditional_get
 
 router = APIRouter(prefix="/accounts", tags=["accounts"])
 
-@router.get("/", response_model=List[AccountSchema])
+@router.get("/", response_model=List[AccountSchema], dependencies=[Depends(conditional_get(Account))])
 def get_accounts(
     skip: int = 0,
     limit: int = 100,
@@ -72,6 +74,7 @@ def create_account(
     
     db.add(account)
     db.commit()
+    response_cache.bump_tenant_version(current_user.company_id)
     db.refresh(account)
     
     return account
@@ -117,6 +120,7 @@ def update_account(
         setattr(account, field, value)
     
     db.commit()
+    response_cache.bump_tenant_version(current_user.company_id)
     db.refresh(account)
     
     return account
@@ -143,6 +147,7 @@ def delete_account(
     # Soft delete - apenas marca como inativa
     account.is_active = False
     db.commit()
+    response_cache.bump_tenant_version(current_user.company_id)
     
     return {"message": "Account deactivated successfully"}
 
@@ -1,46 +1,53 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from datetime import datetime, timedelta
 
-from database import get_db
+from database import get_db, get_async_db
 from models import User, Company, Subscription, SubscriptionPlan, SubscriptionStatus, UserRole
 from schemas import UserLogin, UserRegister, Token, LoginResponse, User as UserSchema
 from auth import (
-    authenticate_user, 
     create_access_token, 
     create_refresh_token, 
-    get_password_hash,
     verify_token,
     security,
     get_current_active_user
 )
+from services.password_hashing import password_hasher
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 @router.post("/register", response_model=dict)
-def register(user_data: UserRegister, db: Session = Depends(get_db)):
-    """Registra um novo usuário e empresa"""
+async def register(user_data: UserRegister, db: AsyncSession = Depends(get_async_db)):
+    """Registra um novo usuário e empresa
+    
+    Sessão assíncrona: durante um pico de logins nem o banco nem o bcrypt
+    (pool dedicado) bloqueiam o event loop.
+    """
     
     # Verifica se o email já existe
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
+    # Hash da senha no pool dedicado (antes de gravar, para não deixar empresa órfã em caso de 429)
+    hashed_password = await password_hasher.hash(user_data.password)
+    
     # Cria a empresa
     company = Company(
         name=user_data.company_name,
         cnpj=user_data.company_cnpj
     )
     db.add(company)
-    db.commit()
-    db.refresh(company)
+    await db.commit()
+    await db.refresh(company)
     
     # Cria o usuário admin da empresa
-    hashed_password = get_password_hash(user_data.password)
     user = User(
         email=user_data.email,
         hashed_password=hashed_password,
@@ -49,8 +56,8 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
         company_id=company.id
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     
     # Cria assinatura trial de 14 dias
     trial_end = datetime.utcnow() + timedelta(days=14)
@@ -61,7 +68,7 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
         company_id=company.id
     )
     db.add(subscription)
-    db.commit()
+    await db.commit()
     
     return {
         "message": "User and company created successfully",
@@ -71,11 +78,13 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
     }
 
 @router.post("/login", response_model=LoginResponse)
-def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Autentica usuário e retorna tokens JWT"""
     
-    user = authenticate_user(db, user_credentials.email, user_credentials.password)
-    if not user:
+    user = await db.scalar(select(User).where(User.email == user_credentials.email))
+    
+    # Verificação do bcrypt no pool dedicado
+    if not user or not await password_hasher.verify(user_credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -130,9 +139,13 @@ def refresh_token(credentials: HTTPAuthorizationCredentials = Depends(security),
     }
 
 @router.get("/me", response_model=UserSchema)
-def get_current_user_info(current_user: User = Depends(get_current_active_user)):
+def get_current_user_info(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
     """Retorna informações do usuário atual"""
-    return current_user
+    # current_user é a projeção em cache; o perfil completo vem do banco
+    return db.query(User).filter(User.id == current_user.id).first()
 
 @router.post("/logout")
 def logout():
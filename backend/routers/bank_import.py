@@ -1,29 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, func, select
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
 from datetime import datetime, timedelta
-import pandas as pd
+import csv
 import io
 import re
+import os
 from decimal import Decimal
 
-from database import get_db
+from database import get_db, get_async_db
 from models import (
     BankConnection, Transaction, Account, User, TransactionType,
-    BankConnectionStatus, TransactionCategory
+    BankConnectionStatus, TransactionCategory, Job
 )
 from schemas_advanced import (
     BankConnection as BankConnectionSchema,
     BankConnectionCreate, BankConnectionUpdate,
-    BankImportResult, AutoCategorizationResult
+    BankImportResult, AutoCategorizationResult, Job as JobSchema
 )
 from auth import get_current_active_user
-from services.ml_categorization import ml_service
-from services.personal_business_separator import separator_service
+from services.ledger_rollup import ledger_rollup
+from services.transaction_fingerprint import fingerprint_service
+from services.response_cache import response_cache
+from services.transaction_batch_update import transaction_batch_updater
+from services.job_queue import job_queue, JobContext
+from services.category_corrections import category_corrections
+
+# pandas e os classificadores (numpy) são importados dentro das funções que
+# os usam: as rotas de conexões e a validação do upload não pagam esse import
+if TYPE_CHECKING:
+    import pandas as pd
 
 router = APIRouter(prefix="/bank-import", tags=["bank-import"])
 
+# Linhas por bloco na importação de extratos
+IMPORT_CHUNK_SIZE = int(os.getenv("BANK_IMPORT_CHUNK_SIZE", "1000"))
+
+# Transações por bloco nos jobs de categorização/classificação
+BATCH_JOB_CHUNK_SIZE = int(os.getenv("BATCH_JOB_CHUNK_SIZE", "1000"))
+
 # Configurações de bancos suportados
 BANK_CONFIGS = {
     "nubank": {
@@ -106,6 +124,7 @@ def create_bank_connection(
     
     db.add(db_connection)
     db.commit()
+    response_cache.bump_tenant_version(current_user.company_id)
     db.refresh(db_connection)
     
     return db_connection
@@ -137,6 +156,7 @@ def update_bank_connection(
         setattr(db_connection, field, value)
     
     db.commit()
+    response_cache.bump_tenant_version(current_user.company_id)
     db.refresh(db_connection)
     
     return db_connection
@@ -164,18 +184,24 @@ def delete_bank_connection(
     
     db.delete(db_connection)
     db.commit()
+    response_cache.bump_tenant_version(current_user.company_id)
     
     return {"message": "Conexão bancária removida com sucesso"}
 
-@router.post("/upload-extract/{bank_name}", response_model=BankImportResult)
+@router.post("/upload-extract/{bank_name}", response_model=JobSchema, status_code=status.HTTP_202_ACCEPTED)
 async def upload_bank_extract(
     bank_name: str,
     account_id: int,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Faz upload e processa extrato bancário"""
+    """Recebe o extrato bancário e enfileira a importação
+    
+    Responde na hora com o job (202); o processamento roda em segundo plano
+    e o resultado (BankImportResult) fica em GET /jobs/{id}.
+    """
     
     if bank_name.lower() not in BANK_CONFIGS:
         raise HTTPException(
@@ -184,12 +210,12 @@ async def upload_bank_extract(
         )
     
     # Verificar se a conta existe
-    account = db.query(Account).filter(
-        and_(
+    account = await db.scalar(
+        select(Account).where(
             Account.id == account_id,
             Account.company_id == current_user.company_id
         )
-    ).first()
+    )
     
     if not account:
         raise HTTPException(
@@ -197,99 +223,247 @@ async def upload_bank_extract(
             detail="Conta não encontrada"
         )
     
+    # Validar o arquivo (codificação e colunas) antes de enfileirar
     try:
-        # Ler arquivo CSV
-        content = await file.read()
-        df = pd.read_csv(io.StringIO(content.decode('utf-8')))
-        
-        # Processar transações
-        result = await process_bank_extract(df, bank_name, account_id, current_user, db)
-        
-        return result
-        
+        content = (await file.read()).decode('utf-8')
+        header = next(csv.reader(io.StringIO(content)))
+    except StopIteration:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Erro ao processar arquivo: arquivo vazio"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Erro ao processar arquivo: {str(e)}"
         )
-
-async def process_bank_extract(
-    df: pd.DataFrame,
-    bank_name: str,
-    account_id: int,
-    current_user: User,
-    db: Session
-) -> BankImportResult:
-    """Processa o extrato bancário e cria transações"""
     
     config = BANK_CONFIGS[bank_name.lower()]
-    transactions_imported = 0
-    transactions_duplicated = 0
-    errors = []
+    missing = [
+        column for column in (config["date_column"], config["description_column"], config["amount_column"])
+        if column not in header
+    ]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Erro ao processar arquivo: colunas ausentes {', '.join(missing)}"
+        )
     
-    for index, row in df.iterrows():
+    job = await db.run_sync(
+        job_queue.submit, current_user, "bank_import",
+        {"bank_name": bank_name.lower(), "account_id": account_id}, content
+    )
+    job_queue.start_in_background(background_tasks, job.id)
+    
+    return job
+
+@job_queue.handler("bank_import")
+def run_bank_import_job(db: Session, job: Job, context: JobContext) -> Optional[dict]:
+    """Processa o extrato do job e cria as transações
+    
+    Datas e valores são convertidos por coluna e cada linha recebe um
+    fingerprint de conteúdo; a inserção é feita em lote, um bloco de
+    IMPORT_CHUNK_SIZE linhas por vez, com INSERT ... ON CONFLICT DO NOTHING
+    sobre o índice único (company_id, fingerprint) descartando as
+    duplicatas. Cada bloco é confirmado junto com o cursor; ao retomar, a
+    conversão (determinística) é refeita e só os blocos restantes são
+    gravados.
+    """
+    
+    import pandas as pd
+    from services.category_model import category_model_service
+    
+    company_id, user_id = job.company_id, job.user_id
+    account_id = job.payload["account_id"]
+    config = BANK_CONFIGS[job.payload["bank_name"]]
+    
+    df = pd.read_csv(io.StringIO(job.input_data))
+    # Modelo treinado com as correções da empresa (em memória após o primeiro uso)
+    model = category_model_service.model_for(db, company_id)
+    valid_rows, errors = prepare_bank_extract(df, config, company_id, account_id, model)
+    
+    cursor = {"offset": 0, "imported": 0, "duplicated": 0, "errors": [], **context.cursor}
+    
+    while cursor["offset"] < len(valid_rows):
+        if context.should_stop():
+            return None
+        
+        chunk = valid_rows.iloc[cursor["offset"]:cursor["offset"] + IMPORT_CHUNK_SIZE]
+        new_rows = build_import_rows(chunk, account_id, company_id, user_id)
+        
         try:
-            # Extrair dados da linha
-            date_str = str(row[config["date_column"]])
-            description = str(row[config["description_column"]])
-            amount_str = str(row[config["amount_column"]])
-            
-            # Converter data
-            transaction_date = datetime.strptime(date_str, config["date_format"])
-            
-            # Converter valor
-            amount = Decimal(amount_str.replace(',', '.').replace('R$', '').strip())
-            
-            # Determinar tipo de transação
-            transaction_type = TransactionType.EXPENSE if amount < 0 else TransactionType.INCOME
-            amount = abs(amount)
-            
-            # Verificar se transação já existe (evitar duplicatas)
-            existing = db.query(Transaction).filter(
-                and_(
-                    Transaction.company_id == current_user.company_id,
-                    Transaction.transaction_date == transaction_date,
-                    Transaction.amount == amount,
-                    Transaction.description.ilike(f"%{description[:50]}%")
-                )
-            ).first()
-            
-            if existing:
-                transactions_duplicated += 1
-                continue
-            
-            # Categorização automática
-            category, confidence = auto_categorize_transaction(description)
-            
-            # Criar transação
-            transaction = Transaction(
-                transaction_type=transaction_type,
-                amount=amount,
-                description=description,
-                transaction_date=transaction_date,
-                category=category,
-                ml_confidence=confidence,
-                from_account_id=account_id if transaction_type == TransactionType.EXPENSE else None,
-                to_account_id=account_id if transaction_type == TransactionType.INCOME else None,
-                company_id=current_user.company_id,
-                user_id=current_user.id
-            )
-            
-            db.add(transaction)
-            transactions_imported += 1
-            
+            inserted_count = insert_import_chunk(db, new_rows)
+            cursor["imported"] += inserted_count
+            cursor["duplicated"] += len(new_rows) - inserted_count
         except Exception as e:
-            errors.append(f"Linha {index + 1}: {str(e)}")
-    
-    db.commit()
+            db.rollback()
+            first_line, last_line = chunk.index[0] + 1, chunk.index[-1] + 1
+            cursor["errors"] = cursor["errors"] + [f"Linhas {first_line}-{last_line}: {str(e)}"]
+        
+        cursor["offset"] += len(chunk)
+        context.checkpoint(dict(cursor), progress_current=cursor["offset"], progress_total=len(valid_rows))
     
-    return BankImportResult(
+    errors = errors + cursor["errors"]
+    return jsonable_encoder(BankImportResult(
         success=len(errors) == 0,
-        transactions_imported=transactions_imported,
-        transactions_duplicated=transactions_duplicated,
+        transactions_imported=cursor["imported"],
+        transactions_duplicated=cursor["duplicated"],
         errors=errors,
         last_import_date=datetime.now()
+    ))
+
+def build_import_rows(chunk: "pd.DataFrame", account_id: int, company_id: int, user_id: int) -> List[dict]:
+    """Linhas de um bloco do extrato prontas para insert_import_chunk"""
+    return [
+        {
+            "transaction_type": transaction_type,
+            "amount": amount,
+            "description": description,
+            "transaction_date": transaction_date,
+            "category": category,
+            "ml_confidence": confidence,
+            "is_personal": None,
+            "from_account_id": account_id if transaction_type == TransactionType.EXPENSE else None,
+            "to_account_id": account_id if transaction_type == TransactionType.INCOME else None,
+            "company_id": company_id,
+            "user_id": user_id,
+            "fingerprint": fingerprint
+        }
+        for transaction_date, description, amount, transaction_type, category, confidence, fingerprint in zip(
+            chunk["transaction_date"], chunk["description"], chunk["amount"], chunk["transaction_type"],
+            chunk["category"], chunk["ml_confidence"], chunk["fingerprint"]
+        )
+    ]
+
+def prepare_bank_extract(
+    df: "pd.DataFrame",
+    config: dict,
+    company_id: int,
+    account_id: int,
+    model=None
+) -> Tuple["pd.DataFrame", List[str]]:
+    """Converte o extrato e calcula fingerprint e categoria de cada linha válida
+    
+    Retorna (linhas válidas, erros por linha). Só CPU, sem acesso ao banco.
+    Com o modelo da empresa (category_model_service), a categoria prevista
+    por ele substitui a das palavras-chave onde ele está confiante.
+    """
+    
+    from services.category_model import category_model_service
+    
+    errors = []
+    rows = parse_bank_extract(df, config)
+    
+    # Linhas inválidas (data ou valor)
+    for index, message in rows.loc[rows["error"].notna(), "error"].items():
+        errors.append(f"Linha {index + 1}: {message}")
+    
+    valid_rows = rows[rows["error"].isna()].copy()
+    
+    # Fingerprint de conteúdo; linhas idênticas no mesmo extrato são numeradas
+    valid_rows["normalized_description"] = valid_rows["description"].map(
+        fingerprint_service.normalize_description
     )
+    valid_rows["occurrence"] = valid_rows.groupby(
+        ["transaction_date", "amount", "transaction_type", "normalized_description"], sort=False
+    ).cumcount()
+    valid_rows["fingerprint"] = [
+        fingerprint_service.compute(
+            company_id, account_id, transaction_date, amount,
+            transaction_type, normalized_description, occurrence
+        )
+        for transaction_date, amount, transaction_type, normalized_description, occurrence in zip(
+            valid_rows["transaction_date"], valid_rows["amount"], valid_rows["transaction_type"],
+            valid_rows["normalized_description"], valid_rows["occurrence"]
+        )
+    ]
+    
+    # Categorização automática (uma vez por descrição distinta)
+    categories = {
+        description: auto_categorize_transaction(description)
+        for description in valid_rows["description"].unique()
+    }
+    labels = [categories[description][0] for description in valid_rows["description"]]
+    confidences = [categories[description][1] for description in valid_rows["description"]]
+    
+    if category_model_service.is_warm(model):
+        feature_lists = [
+            category_model_service.features(description, amount, transaction_type)
+            for description, amount, transaction_type in zip(
+                valid_rows["description"], valid_rows["amount"], valid_rows["transaction_type"]
+            )
+        ]
+        labels, confidences = category_model_service.blend(model, feature_lists, labels, confidences)
+        labels, confidences = list(labels), [round(float(confidence), 2) for confidence in confidences]
+    
+    valid_rows["category"] = labels
+    valid_rows["ml_confidence"] = confidences
+    
+    return valid_rows, errors
+
+def insert_import_chunk(db: Session, new_rows: List[dict]) -> int:
+    """Grava um bloco do extrato e atualiza o agregado diário; retorna quantas linhas eram novas
+    
+    Chamado pelo job de importação a cada bloco. Não faz commit.
+    """
+    
+    # INSERT ... ON CONFLICT DO NOTHING em lote
+    inserted = fingerprint_service.insert_new(db, new_rows)
+    inserted_rows = [row for row in new_rows if row["fingerprint"] in inserted]
+    
+    # Atualizar agregado diário do bloco
+    ledger_rollup.record_rows(db, inserted_rows)
+    
+    return len(inserted_rows)
+
+def parse_bank_extract(df: "pd.DataFrame", config: dict) -> "pd.DataFrame":
+    """Converte as colunas do extrato (data, descrição, valor) de forma vetorizada
+    
+    Retorna um DataFrame com o mesmo índice do extrato e as colunas
+    transaction_date, description, amount (Decimal positivo),
+    transaction_type e error (mensagem para linhas inválidas).
+    """
+    
+    import pandas as pd
+    
+    date_str = df[config["date_column"]].astype(str)
+    amount_str = (
+        df[config["amount_column"]].astype(str)
+        .str.replace(',', '.', regex=False)
+        .str.replace('R$', '', regex=False)
+        .str.strip()
+    )
+    
+    transaction_dates = pd.to_datetime(date_str, format=config["date_format"], errors="coerce")
+    numeric_amounts = pd.to_numeric(amount_str, errors="coerce")
+    
+    invalid_date = transaction_dates.isna()
+    invalid_amount = numeric_amounts.isna() & ~invalid_date
+    
+    error = pd.Series(None, index=df.index, dtype=object)
+    error[invalid_date] = "Data inválida '" + date_str[invalid_date] + "' (formato " + config["date_format"] + ")"
+    error[invalid_amount] = "Valor inválido '" + amount_str[invalid_amount] + "'"
+    
+    valid = error.isna()
+    dates = pd.Series(None, index=df.index, dtype=object)
+    dates[valid] = [value.to_pydatetime() for value in transaction_dates[valid]]
+    
+    amounts = pd.Series(None, index=df.index, dtype=object)
+    amounts[valid] = [abs(Decimal(value)) for value in amount_str[valid]]
+    
+    transaction_types = pd.Series(None, index=df.index, dtype=object)
+    transaction_types[valid] = [
+        TransactionType.EXPENSE if value < 0 else TransactionType.INCOME
+        for value in numeric_amounts[valid]
+    ]
+    
+    return pd.DataFrame({
+        "transaction_date": dates,
+        "description": df[config["description_column"]].astype(str),
+        "amount": amounts,
+        "transaction_type": transaction_types,
+        "error": error
+    }, index=df.index)
 
 def auto_categorize_transaction(description: str) -> Tuple[str, float]:
     """Categoriza automaticamente uma transação baseada na descrição"""
@@ -335,10 +509,21 @@ def auto_categorize_single_transaction(
     
     category, confidence = auto_categorize_transaction(transaction.description)
     
+    # Uma categoria escolhida pelo usuário deixa de ser exemplo de treino
+    removed = category_corrections.sample_of(transaction)
+    rollup_before = ledger_rollup.snapshot(transaction)
+    
     # Atualizar transação
     transaction.category = category
     transaction.ml_confidence = confidence
+    transaction.category_manual = False
+    
+    # A categoria faz parte da chave do agregado diário
+    ledger_rollup.replace(db, rollup_before, transaction)
     db.commit()
+    response_cache.bump_tenant_version(current_user.company_id)
+    if removed:
+        category_corrections.record(current_user.company_id, removed=removed)
     
     # Encontrar palavras-chave que fizeram match
     keywords_matched = []
@@ -356,77 +541,172 @@ def auto_categorize_single_transaction(
         keywords_matched=keywords_matched
     )
 
-@router.post("/categorize-all")
+@router.post("/categorize-all", response_model=JobSchema, status_code=status.HTTP_202_ACCEPTED)
 def auto_categorize_all_transactions(
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Categoriza automaticamente todas as transações sem categoria"""
+    """Enfileira a categorização automática de todas as transações sem categoria"""
     
-    transactions = db.query(Transaction).filter(
-        and_(
-            Transaction.company_id == current_user.company_id,
-            Transaction.category.is_(None)
-        )
-    ).all()
+    job = job_queue.submit(db, current_user, "categorize_all")
+    job_queue.start_in_background(background_tasks, job.id)
+    return job
+
+@job_queue.handler("categorize_all")
+def run_categorize_all_job(db: Session, job: Job, context: JobContext) -> Optional[dict]:
+    """Categoriza pelas palavras-chave as transações sem categoria, em blocos por id"""
+    
+    company_id = job.company_id
+    criteria = (Transaction.company_id == company_id, Transaction.category.is_(None))
     
-    categorized_count = 0
+    cursor = {"last_id": 0, "processed": 0, "categorized": 0, **context.cursor}
+    if "total" not in cursor:
+        cursor["total"] = db.scalar(select(func.count(Transaction.id)).where(*criteria))
     
-    for transaction in transactions:
-        category, confidence = auto_categorize_transaction(transaction.description)
+    while not context.should_stop():
+        rows = transaction_batch_updater.load(
+            db, *criteria, Transaction.id > cursor["last_id"], limit=BATCH_JOB_CHUNK_SIZE
+        )
+        if not rows:
+            return {
+                "message": f"{cursor['categorized']} transações categorizadas automaticamente",
+                "total_processed": cursor["processed"],
+                "categorized": cursor["categorized"]
+            }
         
-        if confidence > 0.3:  # Só aplicar se confiança > 30%
-            transaction.category = category
-            transaction.ml_confidence = confidence
-            categorized_count += 1
+        # Uma vez por descrição distinta do bloco
+        categories = {
+            description: auto_categorize_transaction(description)
+            for description in {row.description for row in rows}
+        }
+        changes = []
+        for row in rows:
+            category, confidence = categories[row.description]
+            # Só aplicar se confiança > 30%
+            changes.append({"category": category, "ml_confidence": confidence} if confidence > 0.3 else {})
+        
+        cursor["categorized"] += transaction_batch_updater.write(db, rows, changes)
+        cursor["processed"] += len(rows)
+        cursor["last_id"] = rows[-1].id
+        context.checkpoint(dict(cursor), progress_current=cursor["processed"], progress_total=cursor["total"])
     
-    db.commit()
+    return None
+
+@router.post("/categorize-automatic", response_model=JobSchema, status_code=status.HTTP_202_ACCEPTED)
+def categorize_transactions_automatic(
+    background_tasks: BackgroundTasks,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Enfileira a categorização automática de transações usando IA/ML"""
+    
+    job = job_queue.submit(db, current_user, "categorize_automatic", {"limit": limit})
+    job_queue.start_in_background(background_tasks, job.id)
+    return job
+
+@job_queue.handler("categorize_automatic")
+def run_categorize_automatic_job(db: Session, job: Job, context: JobContext) -> Optional[dict]:
+    """Categoriza até `limit` transações com o serviço de ML, em blocos"""
+    
+    from services.ml_categorization import ml_service
+    
+    company_id = job.company_id
+    results = run_batch_in_chunks(
+        context, job.payload["limit"], ("processed", "categorized", "skipped"),
+        lambda limit, after_id: ml_service.batch_categorize(db, company_id, limit, after_id=after_id, commit=False)
+    )
+    if results is None:
+        return None
     
     return {
-        "message": f"{categorized_count} transações categorizadas automaticamente",
-        "total_processed": len(transactions),
-        "categorized": categorized_count
+        "message": f"{results['categorized']} transações categorizadas automaticamente",
+        "results": results,
+        "success": True
     }
 
-@router.post("/categorize-automatic")
-async def categorize_transactions_automatic(
+@router.post("/classify-personal-business", response_model=JobSchema, status_code=status.HTTP_202_ACCEPTED)
+def classify_personal_business(
+    background_tasks: BackgroundTasks,
     limit: int = 100,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Categoriza automaticamente transações usando IA/ML"""
+    """Enfileira a classificação de transações como pessoais ou empresariais"""
     
-    try:
-        # Usar o serviço de ML para categorização
-        results = ml_service.batch_categorize(db, current_user.company_id, limit)
+    job = job_queue.submit(db, current_user, "classify_personal_business", {"limit": limit})
+    job_queue.start_in_background(background_tasks, job.id)
+    return job
+
+@job_queue.handler("classify_personal_business")
+def run_classify_personal_business_job(db: Session, job: Job, context: JobContext) -> Optional[dict]:
+    """Classifica até `limit` transações como pessoais ou empresariais, em blocos"""
+    
+    from services.personal_business_separator import separator_service
+    
+    company_id = job.company_id
+    results = run_batch_in_chunks(
+        context, job.payload["limit"], ("processed", "business", "personal", "low_confidence"),
+        lambda limit, after_id: separator_service.batch_classify(db, company_id, limit, after_id=after_id, commit=False)
+    )
+    if results is None:
+        return None
+    
+    return {
+        "message": f"{results['processed']} transações classificadas",
+        "results": results,
+        "success": True
+    }
+
+def run_batch_in_chunks(
+    context: JobContext,
+    limit: int,
+    counters: Tuple[str, ...],
+    batch: Callable[[int, int], dict]
+) -> Optional[dict]:
+    """Chama `batch(limite, after_id)` em blocos até processar `limit` linhas
+    
+    Soma os `counters` de cada bloco no cursor e faz checkpoint após cada
+    um. Retorna os totais, ou None se o prazo da execução esgotou.
+    """
+    
+    cursor = {"last_id": 0, **{counter: 0 for counter in counters}, **context.cursor}
+    
+    while cursor["processed"] < limit:
+        if context.should_stop():
+            return None
         
-        return {
-            "message": f"{results['categorized']} transações categorizadas automaticamente",
-            "results": results,
-            "success": True
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro na categorização automática: {str(e)}")
+        results = batch(min(BATCH_JOB_CHUNK_SIZE, limit - cursor["processed"]), cursor["last_id"])
+        if results["processed"] == 0:
+            break
+        
+        for counter in counters:
+            cursor[counter] += results[counter]
+        cursor["last_id"] = results["last_id"]
+        context.checkpoint(dict(cursor), progress_current=cursor["processed"], progress_total=limit)
+    
+    return {counter: cursor[counter] for counter in counters}
 
-@router.post("/classify-personal-business")
-async def classify_personal_business(
-    limit: int = 100,
+@router.post("/train-categorizer")
+def train_categorizer(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Classifica transações como pessoais ou empresariais automaticamente"""
+    """Retreina o categorizador da empresa com as categorias corrigidas pelo usuário"""
+    
+    from services.ml_categorization import ml_service
     
     try:
-        # Usar o serviço de separação para classificação
-        results = separator_service.batch_classify(db, current_user.company_id, limit)
+        results = ml_service.train_from_user_corrections(db, current_user.company_id)
         
         return {
-            "message": f"{results['processed']} transações classificadas",
+            "message": f"Modelo treinado com {results['corrections_analyzed']} correções",
             "results": results,
             "success": True
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro na classificação: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro no treinamento: {str(e)}")
 
 @router.get("/classification-analysis")
 async def get_classification_analysis(
@@ -436,6 +716,8 @@ async def get_classification_analysis(
 ):
     """Análise de padrões de classificação pessoal vs empresarial"""
     
+    from services.personal_business_separator import separator_service
+    
     try:
         analysis = separator_service.analyze_classification_patterns(
             db, current_user.company_id, days
@@ -457,6 +739,9 @@ async def get_ml_insights(
 ):
     """Insights de padrões de gastos usando ML"""
     
+    from services.ml_categorization import ml_service
+    from services.personal_business_separator import separator_service
+    
     try:
         # Análise de padrões de categorização
         spending_patterns = ml_service.analyze_spending_patterns(
@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, or_, select
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 from decimal import Decimal
 
-from database import get_db
+from database import get_async_db
 from auth import get_current_active_user
 from models import (
     User, Account, Transaction, TransactionType, BankConnection, 
@@ -13,28 +13,41 @@ from models import (
     Alert, AlertType
 )
 from schemas_advanced import DashboardStats
+from services.dashboard_aggregation import dashboard_aggregator
+from services.dashboard_composer import dashboard_composer, DashboardSection
+from services.ledger_rollup import ledger_rollup
+from services.response_cache import response_cache
+from services.tenant_etag import conditional_get
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
-@router.get("/consolidated")
+@router.get("/consolidated", dependencies=[Depends(conditional_get(
+    Account, Transaction, BankConnection, Debt, FinancialGoal, Alert, daily=True
+))])
 async def get_consolidated_dashboard(
     period_days: int = Query(30, description="Período em dias para análise"),
     include_personal: bool = Query(True, description="Incluir transações pessoais"),
     include_business: bool = Query(True, description="Incluir transações empresariais"),
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Painel consolidado com visão geral de todas as contas"""
+    """Painel consolidado com visão geral de todas as contas
+    
+    As seções são independentes e carregadas em paralelo pelo
+    dashboard_composer, cada uma na sua conexão; uma seção que falhar ou
+    demorar demais volta vazia e aparece em "unavailable_sections".
+    """
+    
+    if not include_personal and not include_business:
+        raise HTTPException(status_code=400, detail="Deve incluir pelo menos um tipo de transação")
     
     try:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=period_days)
+        previous_start = start_date - timedelta(days=period_days)
+        company_id = current_user.company_id
         
         # Filtros de transação baseados nas preferências
-        transaction_filters = [Transaction.company_id == current_user.company_id]
-        
-        if not include_personal and not include_business:
-            raise HTTPException(status_code=400, detail="Deve incluir pelo menos um tipo de transação")
+        transaction_filters = [Transaction.company_id == company_id]
         
         if include_personal and not include_business:
             transaction_filters.append(Transaction.is_personal == True)
@@ -42,207 +55,172 @@ async def get_consolidated_dashboard(
             transaction_filters.append(Transaction.is_personal == False)
         # Se ambos são True, não adiciona filtro
         
-        # Resumo de contas
-        accounts = db.query(Account).filter(
-            Account.company_id == current_user.company_id
-        ).all()
+        async def load_accounts(db: AsyncSession):
+            accounts = (await db.scalars(
+                select(Account).where(Account.company_id == company_id)
+            )).all()
+            return [
+                {
+                    "id": account.id,
+                    "name": account.name,
+                    "bank": account.bank_name,
+                    "account_type": account.account_type,
+                    "balance": account.balance or Decimal('0'),
+                    "is_active": account.is_active
+                }
+                for account in accounts
+            ]
+        
+        async def load_account_activity(db: AsyncSession):
+            # Transações recentes por conta (uma consulta agrupada)
+            return await db.run_sync(
+                dashboard_aggregator.account_activity, transaction_filters, start_date
+            )
         
-        accounts_summary = []
-        total_balance = Decimal('0')
+        async def load_bank_connections(db: AsyncSession):
+            bank_connections = (await db.scalars(
+                select(BankConnection).where(BankConnection.company_id == company_id)
+            )).all()
+            return [
+                {
+                    "id": connection.id,
+                    "bank_name": connection.bank_name,
+                    "status": connection.status.value,
+                    "last_sync": connection.last_sync.isoformat() if connection.last_sync else None,
+                    "is_active": connection.status == BankConnectionStatus.CONNECTED
+                }
+                for connection in bank_connections
+            ]
+        
+        async def load_totals(db: AsyncSession):
+            # Resumo financeiro do período e do período anterior (uma consulta)
+            return await db.run_sync(
+                dashboard_aggregator.period_totals, transaction_filters, start_date, previous_start
+            )
         
-        for account in accounts:
-            account_balance = account.balance or Decimal('0')
-            total_balance += account_balance
-            
-            # Transações recentes da conta
-            recent_transactions = db.query(Transaction).filter(
-                and_(
-                    Transaction.account_id == account.id,
-                    Transaction.date >= start_date,
-                    *transaction_filters
+        async def load_categories(db: AsyncSession):
+            return await db.run_sync(
+                dashboard_aggregator.category_expenses, transaction_filters, start_date
+            )
+        
+        async def load_debts(db: AsyncSession):
+            active_debts = (await db.scalars(
+                select(Debt).where(
+                    Debt.company_id == company_id,
+                    Debt.status.in_([DebtStatus.ACTIVE, DebtStatus.OVERDUE])
+                )
+            )).all()
+            return {
+                "total_debts": len(active_debts),
+                "total_amount": sum(float(debt.remaining_amount or debt.total_amount) for debt in active_debts),
+                "overdue_count": len([d for d in active_debts if d.status == DebtStatus.OVERDUE]),
+                "next_payment_date": min([d.next_due_date for d in active_debts if d.next_due_date], default=None)
+            }
+        
+        async def load_goals(db: AsyncSession):
+            active_goals = (await db.scalars(
+                select(FinancialGoal).where(
+                    FinancialGoal.company_id == company_id,
+                    FinancialGoal.status == GoalStatus.ACTIVE
                 )
-            ).count()
+            )).all()
             
-            accounts_summary.append({
-                "id": account.id,
-                "name": account.name,
-                "bank": account.bank,
-                "account_type": account.account_type,
-                "balance": float(account_balance),
-                "recent_transactions": recent_transactions,
-                "is_active": account.is_active
-            })
+            goals_summary = []
+            for goal in active_goals:
+                progress_percentage = (float(goal.current_amount) / float(goal.target_amount)) * 100 if goal.target_amount else 0
+                
+                goals_summary.append({
+                    "id": goal.id,
+                    "name": goal.name,
+                    "target_amount": float(goal.target_amount),
+                    "current_amount": float(goal.current_amount),
+                    "progress_percentage": round(progress_percentage, 1),
+                    "target_date": goal.target_date.isoformat() if goal.target_date else None,
+                    "days_remaining": (goal.target_date.date() - datetime.now().date()).days if goal.target_date else None
+                })
+            return goals_summary
+        
+        async def load_alerts(db: AsyncSession):
+            active_alerts = (await db.scalars(
+                select(Alert).where(
+                    Alert.company_id == company_id,
+                    Alert.is_read == False
+                ).order_by(Alert.created_at.desc()).limit(5)
+            )).all()
+            return [
+                {
+                    "id": alert.id,
+                    "type": alert.alert_type.value,
+                    "title": alert.title,
+                    "message": alert.message,
+                    "created_at": alert.created_at.isoformat(),
+                    "priority": alert.priority
+                }
+                for alert in active_alerts
+            ]
+        
+        async def load_cash_flow(db: AsyncSession):
+            # Fluxo de caixa dos últimos 7 dias (uma consulta agrupada por dia)
+            return await db.run_sync(
+                dashboard_aggregator.daily_cash_flow, transaction_filters, end_date, 7
+            )
         
-        # Conexões bancárias
-        bank_connections = db.query(BankConnection).filter(
-            BankConnection.company_id == current_user.company_id
-        ).all()
-        
-        connections_summary = []
-        for connection in bank_connections:
-            connections_summary.append({
-                "id": connection.id,
-                "bank_name": connection.bank_name,
-                "status": connection.status.value,
-                "last_sync": connection.last_sync.isoformat() if connection.last_sync else None,
-                "is_active": connection.is_active
-            })
+        empty_totals = lambda: {
+            "income": Decimal('0'), "expense": Decimal('0'),
+            "previous_income": Decimal('0'), "previous_expense": Decimal('0')
+        }
+        empty_debts = lambda: {"total_debts": 0, "total_amount": 0, "overdue_count": 0, "next_payment_date": None}
+        
+        sections, unavailable_sections = await dashboard_composer.compose({
+            "accounts": DashboardSection(load_accounts, list),
+            "account_activity": DashboardSection(load_account_activity, dict),
+            "bank_connections": DashboardSection(load_bank_connections, list),
+            "totals": DashboardSection(load_totals, empty_totals),
+            "categories": DashboardSection(load_categories, list),
+            "debts": DashboardSection(load_debts, empty_debts),
+            "goals": DashboardSection(load_goals, list),
+            "alerts": DashboardSection(load_alerts, list),
+            "cash_flow": DashboardSection(load_cash_flow, list)
+        })
         
-        # Resumo financeiro do período
-        income_query = db.query(func.sum(Transaction.amount)).filter(
-            and_(
-                Transaction.transaction_type == TransactionType.INCOME,
-                Transaction.date >= start_date,
-                *transaction_filters
-            )
-        ).scalar() or Decimal('0')
+        # Resumo de contas
+        accounts_summary = []
+        total_balance = Decimal('0')
         
-        expense_query = db.query(func.sum(Transaction.amount)).filter(
-            and_(
-                Transaction.transaction_type == TransactionType.EXPENSE,
-                Transaction.date >= start_date,
-                *transaction_filters
-            )
-        ).scalar() or Decimal('0')
+        for account in sections["accounts"]:
+            total_balance += account["balance"]
+            accounts_summary.append({
+                **account,
+                "balance": float(account["balance"]),
+                "recent_transactions": sections["account_activity"].get(account["id"], 0)
+            })
+        
+        totals = sections["totals"]
+        income_query = totals["income"]
+        expense_query = totals["expense"]
         
         net_flow = income_query - abs(expense_query)
         
         # Transações por categoria
-        category_expenses = db.query(
-            Transaction.category,
-            func.sum(Transaction.amount).label('total')
-        ).filter(
-            and_(
-                Transaction.transaction_type == TransactionType.EXPENSE,
-                Transaction.date >= start_date,
-                Transaction.category.isnot(None),
-                *transaction_filters
-            )
-        ).group_by(Transaction.category).order_by(func.sum(Transaction.amount).desc()).limit(10).all()
-        
         categories_data = []
-        for category, total in category_expenses:
+        for category, total in sections["categories"]:
             categories_data.append({
                 "category": category,
                 "amount": float(abs(total)),
                 "percentage": round(float(abs(total)) / float(abs(expense_query)) * 100, 1) if expense_query else 0
             })
         
-        # Dívidas ativas
-        active_debts = db.query(Debt).filter(
-            and_(
-                Debt.company_id == current_user.company_id,
-                Debt.status.in_([DebtStatus.ACTIVE, DebtStatus.OVERDUE])
-            )
-        ).all()
-        
-        debts_summary = {
-            "total_debts": len(active_debts),
-            "total_amount": sum(float(debt.remaining_amount or debt.total_amount) for debt in active_debts),
-            "overdue_count": len([d for d in active_debts if d.status == DebtStatus.OVERDUE]),
-            "next_payment_date": min([d.next_payment_date for d in active_debts if d.next_payment_date], default=None)
-        }
-        
-        # Metas financeiras
-        active_goals = db.query(FinancialGoal).filter(
-            and_(
-                FinancialGoal.company_id == current_user.company_id,
-                FinancialGoal.status == GoalStatus.ACTIVE
-            )
-        ).all()
-        
-        goals_summary = []
-        for goal in active_goals:
-            progress_percentage = (float(goal.current_amount) / float(goal.target_amount)) * 100 if goal.target_amount else 0
-            
-            goals_summary.append({
-                "id": goal.id,
-                "name": goal.name,
-                "target_amount": float(goal.target_amount),
-                "current_amount": float(goal.current_amount),
-                "progress_percentage": round(progress_percentage, 1),
-                "target_date": goal.target_date.isoformat() if goal.target_date else None,
-                "days_remaining": (goal.target_date - datetime.now().date()).days if goal.target_date else None
-            })
-        
-        # Alertas ativos
-        active_alerts = db.query(Alert).filter(
-            and_(
-                Alert.company_id == current_user.company_id,
-                Alert.is_read == False
-            )
-        ).order_by(Alert.created_at.desc()).limit(5).all()
-        
-        alerts_summary = []
-        for alert in active_alerts:
-            alerts_summary.append({
-                "id": alert.id,
-                "type": alert.alert_type.value,
-                "title": alert.title,
-                "message": alert.message,
-                "created_at": alert.created_at.isoformat(),
-                "priority": alert.priority
-            })
-        
-        # Fluxo de caixa dos últimos 7 dias
-        cash_flow_data = []
-        for i in range(7):
-            day = end_date - timedelta(days=i)
-            day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day.replace(hour=23, minute=59, second=59, microsecond=999999)
-            
-            day_income = db.query(func.sum(Transaction.amount)).filter(
-                and_(
-                    Transaction.transaction_type == TransactionType.INCOME,
-                    Transaction.date >= day_start,
-                    Transaction.date <= day_end,
-                    *transaction_filters
-                )
-            ).scalar() or Decimal('0')
-            
-            day_expense = db.query(func.sum(Transaction.amount)).filter(
-                and_(
-                    Transaction.transaction_type == TransactionType.EXPENSE,
-                    Transaction.date >= day_start,
-                    Transaction.date <= day_end,
-                    *transaction_filters
-                )
-            ).scalar() or Decimal('0')
-            
-            cash_flow_data.append({
-                "date": day.strftime("%Y-%m-%d"),
-                "income": float(day_income),
-                "expense": float(abs(day_expense)),
-                "net": float(day_income - abs(day_expense))
-            })
-        
-        cash_flow_data.reverse()  # Ordem cronológica
-        
         # Comparação com período anterior
-        previous_start = start_date - timedelta(days=period_days)
-        previous_end = start_date
-        
-        previous_income = db.query(func.sum(Transaction.amount)).filter(
-            and_(
-                Transaction.transaction_type == TransactionType.INCOME,
-                Transaction.date >= previous_start,
-                Transaction.date < previous_end,
-                *transaction_filters
-            )
-        ).scalar() or Decimal('0')
-        
-        previous_expense = db.query(func.sum(Transaction.amount)).filter(
-            and_(
-                Transaction.transaction_type == TransactionType.EXPENSE,
-                Transaction.date >= previous_start,
-                Transaction.date < previous_end,
-                *transaction_filters
-            )
-        ).scalar() or Decimal('0')
+        previous_income = totals["previous_income"]
+        previous_expense = totals["previous_expense"]
         
         income_change = ((float(income_query) - float(previous_income)) / float(previous_income) * 100) if previous_income else 0
         expense_change = ((float(abs(expense_query)) - float(abs(previous_expense))) / float(abs(previous_expense)) * 100) if previous_expense else 0
         
+        connections_summary = sections["bank_connections"]
+        goals_summary = sections["goals"]
+        alerts_summary = sections["alerts"]
+        
         return {
             "period": {
                 "start_date": start_date.isoformat(),
@@ -251,12 +229,12 @@ async def get_consolidated_dashboard(
             },
             "accounts": {
                 "total_balance": float(total_balance),
-                "accounts_count": len(accounts),
+                "accounts_count": len(accounts_summary),
                 "accounts": accounts_summary
             },
             "bank_connections": {
-                "total_connections": len(bank_connections),
-                "active_connections": len([c for c in bank_connections if c.is_active]),
+                "total_connections": len(connections_summary),
+                "active_connections": len([c for c in connections_summary if c["is_active"]]),
                 "connections": connections_summary
             },
             "financial_summary": {
@@ -267,86 +245,69 @@ async def get_consolidated_dashboard(
                 "expense_change_percentage": round(expense_change, 1)
             },
             "categories": categories_data,
-            "debts": debts_summary,
+            "debts": sections["debts"],
             "goals": {
-                "active_goals": len(active_goals),
+                "active_goals": len(goals_summary),
                 "goals": goals_summary
             },
             "alerts": {
-                "unread_count": len(active_alerts),
+                "unread_count": len(alerts_summary),
                 "alerts": alerts_summary
             },
-            "cash_flow": cash_flow_data,
+            "cash_flow": sections["cash_flow"],
             "filters_applied": {
                 "include_personal": include_personal,
                 "include_business": include_business
-            }
+            },
+            "unavailable_sections": unavailable_sections
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao gerar dashboard: {str(e)}")
 
-@router.get("/accounts-overview")
+@router.get("/accounts-overview", dependencies=[Depends(conditional_get(Account, Transaction, daily=True))])
 async def get_accounts_overview(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Visão detalhada de todas as contas"""
     
     try:
-        accounts = db.query(Account).filter(
-            Account.company_id == current_user.company_id
-        ).all()
+        accounts = (await db.scalars(
+            select(Account).where(Account.company_id == current_user.company_id)
+        )).all()
+        
+        # Estatísticas (últimos 30 dias) e últimas transações de todas as contas em duas consultas
+        thirty_days_ago = datetime.now() - timedelta(days=30)
+        monthly_stats = await db.run_sync(
+            dashboard_aggregator.account_monthly_stats, current_user.company_id, thirty_days_ago
+        )
+        recent_by_account = await db.run_sync(
+            dashboard_aggregator.recent_transactions_by_account, current_user.company_id, 5
+        )
         
         accounts_data = []
         
         for account in accounts:
-            # Últimas transações da conta
-            recent_transactions = db.query(Transaction).filter(
-                Transaction.account_id == account.id
-            ).order_by(Transaction.date.desc()).limit(5).all()
-            
             transactions_data = []
-            for transaction in recent_transactions:
+            for transaction in recent_by_account.get(account.id, []):
                 transactions_data.append({
                     "id": transaction.id,
                     "description": transaction.description,
                     "amount": float(transaction.amount),
                     "type": transaction.transaction_type.value,
-                    "date": transaction.date.isoformat(),
+                    "date": transaction.transaction_date.isoformat(),
                     "category": transaction.category
                 })
             
-            # Estatísticas da conta (últimos 30 dias)
-            thirty_days_ago = datetime.now() - timedelta(days=30)
-            
-            monthly_income = db.query(func.sum(Transaction.amount)).filter(
-                and_(
-                    Transaction.account_id == account.id,
-                    Transaction.transaction_type == TransactionType.INCOME,
-                    Transaction.date >= thirty_days_ago
-                )
-            ).scalar() or Decimal('0')
-            
-            monthly_expense = db.query(func.sum(Transaction.amount)).filter(
-                and_(
-                    Transaction.account_id == account.id,
-                    Transaction.transaction_type == TransactionType.EXPENSE,
-                    Transaction.date >= thirty_days_ago
-                )
-            ).scalar() or Decimal('0')
-            
-            transaction_count = db.query(Transaction).filter(
-                and_(
-                    Transaction.account_id == account.id,
-                    Transaction.date >= thirty_days_ago
-                )
-            ).count()
+            stats = monthly_stats.get(account.id, {"income": Decimal('0'), "expense": Decimal('0'), "count": 0})
+            monthly_income = stats["income"]
+            monthly_expense = stats["expense"]
             
             accounts_data.append({
                 "id": account.id,
                 "name": account.name,
-                "bank": account.bank,
+                "bank": account.bank_name,
                 "account_type": account.account_type,
                 "balance": float(account.balance or Decimal('0')),
                 "is_active": account.is_active,
@@ -355,7 +316,7 @@ async def get_accounts_overview(
                     "income": float(monthly_income),
                     "expense": float(abs(monthly_expense)),
                     "net": float(monthly_income - abs(monthly_expense)),
-                    "transaction_count": transaction_count
+                    "transaction_count": stats["count"]
                 },
                 "recent_transactions": transactions_data
             })
@@ -372,7 +333,7 @@ async def get_accounts_overview(
 
 @router.get("/quick-stats")
 async def get_quick_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Estatísticas rápidas para widgets"""
@@ -381,54 +342,48 @@ async def get_quick_stats(
         today = datetime.now().date()
         this_month_start = today.replace(day=1)
         
+        cache_key = await response_cache.key_async(db, current_user.company_id, "dashboard.quick_stats", {"today": today})
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         # Saldo total
-        total_balance = db.query(func.sum(Account.balance)).filter(
-            Account.company_id == current_user.company_id
-        ).scalar() or Decimal('0')
-        
-        # Gastos do mês
-        monthly_expenses = db.query(func.sum(Transaction.amount)).filter(
-            and_(
-                Transaction.company_id == current_user.company_id,
-                Transaction.transaction_type == TransactionType.EXPENSE,
-                Transaction.date >= this_month_start
-            )
-        ).scalar() or Decimal('0')
-        
-        # Receitas do mês
-        monthly_income = db.query(func.sum(Transaction.amount)).filter(
-            and_(
-                Transaction.company_id == current_user.company_id,
-                Transaction.transaction_type == TransactionType.INCOME,
-                Transaction.date >= this_month_start
-            )
-        ).scalar() or Decimal('0')
+        total_balance = await db.scalar(
+            select(func.sum(Account.balance)).where(Account.company_id == current_user.company_id)
+        ) or Decimal('0')
+        
+        # Receitas e gastos do mês a partir do agregado diário
+        totals = await db.run_sync(
+            ledger_rollup.totals_by_type, current_user.company_id, this_month_start, today
+        )
+        monthly_expenses = totals[TransactionType.EXPENSE]["amount"]
+        monthly_income = totals[TransactionType.INCOME]["amount"]
         
         # Dívidas pendentes
-        pending_debts = db.query(func.sum(Debt.remaining_amount)).filter(
-            and_(
+        pending_debts = await db.scalar(
+            select(func.sum(Debt.remaining_amount)).where(
                 Debt.company_id == current_user.company_id,
                 Debt.status.in_([DebtStatus.ACTIVE, DebtStatus.OVERDUE])
             )
-        ).scalar() or Decimal('0')
+        ) or Decimal('0')
         
         # Metas ativas
-        active_goals_count = db.query(FinancialGoal).filter(
-            and_(
+        active_goals_count = await db.scalar(
+            select(func.count(FinancialGoal.id)).where(
                 FinancialGoal.company_id == current_user.company_id,
                 FinancialGoal.status == GoalStatus.ACTIVE
             )
-        ).count()
+        )
         
         # Alertas não lidos
-        unread_alerts = db.query(Alert).filter(
-            and_(
+        unread_alerts = await db.scalar(
+            select(func.count(Alert.id)).where(
                 Alert.company_id == current_user.company_id,
                 Alert.is_read == False
             )
-        ).count()
+        )
         
-        return {
+        return response_cache.store(cache_key, {
             "total_balance": float(total_balance),
             "monthly_income": float(monthly_income),
             "monthly_expenses": float(abs(monthly_expenses)),
@@ -437,7 +392,7 @@ async def get_quick_stats(
             "active_goals": active_goals_count,
             "unread_alerts": unread_alerts,
             "reference_date": today.isoformat()
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar estatísticas: {str(e)}")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, desc
 from typing import List, Optional
@@ -6,17 +6,22 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 
 from database import get_db
-from models import Debt, User, DebtStatus, DebtType, Alert, AlertType
+from models import Debt, User, DebtStatus, DebtType, Alert, AlertType, Job
 from schemas_advanced import (
     Debt as DebtSchema,
     DebtCreate, DebtUpdate,
-    DebtStatusSchema, DebtTypeSchema
+    DebtStatusSchema, DebtTypeSchema,
+    Job as JobSchema
 )
 from auth import get_current_active_user
+from services.response_cache import response_cache
+from services.tenant_etag import conditional_get
+from services.job_queue import job_queue, JobContext
+from services.alert_sweeper import alert_sweeper
 
 router = APIRouter(prefix="/debts", tags=["debts"])
 
-@router.get("/", response_model=List[DebtSchema])
+@router.get("/", response_model=List[DebtSchema], dependencies=[Depends(conditional_get(Debt))])
 def get_debts(
     skip: int = 0,
     limit: int = 100,
@@ -93,6 +98,7 @@ def create_debt(
     
     db.add(db_debt)
     db.commit()
+    response_cache.bump_tenant_version(current_user.company_id)
     db.refresh(db_debt)
     
     # Criar alerta se vencimento próximo (7 dias)
@@ -142,6 +148,7 @@ def update_debt(
         setattr(db_debt, field, value)
     
     db.commit()
+    response_cache.bump_tenant_version(current_user.company_id)
     db.refresh(db_debt)
     
     return db_debt
@@ -169,6 +176,7 @@ def delete_debt(
     
     db.delete(db_debt)
     db.commit()
+    response_cache.bump_tenant_version(current_user.company_id)
     
     return {"message": "Dívida removida com sucesso"}
 
@@ -225,6 +233,7 @@ def pay_installment(
         db_debt.next_due_date = None
     
     db.commit()
+    response_cache.bump_tenant_version(current_user.company_id)
     db.refresh(db_debt)
     
     return {
@@ -281,34 +290,41 @@ def get_debts_summary(
         "debts_by_type": debts_by_type
     }
 
-@router.post("/check-overdue")
+@router.post("/check-overdue", response_model=JobSchema, status_code=status.HTTP_202_ACCEPTED)
 def check_overdue_debts(
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Verifica e marca dívidas em atraso"""
+    """Enfileira a verificação de dívidas em atraso; acompanhe em GET /jobs/{id}"""
     
-    today = datetime.now()
-    
-    overdue_debts = db.query(Debt).filter(
-        and_(
-            Debt.company_id == current_user.company_id,
-            Debt.status == DebtStatus.ACTIVE,
-            Debt.next_due_date < today
-        )
-    ).all()
-    
-    updated_count = 0
-    for debt in overdue_debts:
-        debt.status = DebtStatus.OVERDUE
-        create_overdue_alert(debt, db, current_user)
-        updated_count += 1
-    
-    db.commit()
+    job = job_queue.submit(db, current_user, "check_overdue_debts", {"today": datetime.now().isoformat()})
+    job_queue.start_in_background(background_tasks, job.id)
+    return job
+
+@job_queue.handler("check_overdue_debts")
+def run_check_overdue_job(db: Session, job: Job, context: JobContext) -> Optional[dict]:
+    """Marca as dívidas vencidas como em atraso e cria os alertas
+    
+    Executa, só para a empresa do job, a etapa de dívidas vencidas da
+    varredura agendada (services/alert_sweeper.py), com as mesmas regras e a
+    mesma deduplicação: repetir a verificação, ou rodá-la junto com a
+    varredura, não duplica alertas.
+    """
+    
+    # Data de referência fixada no envio: retomadas usam o mesmo corte
+    metrics = alert_sweeper.run(
+        company_ids=[job.company_id],
+        steps=("overdue_debts",),
+        now=datetime.fromisoformat(job.payload["today"])
+    )
+    if metrics["failed_batches"]:
+        raise RuntimeError("Falha na verificação de dívidas em atraso")
     
     return {
-        "message": f"{updated_count} dívidas marcadas como em atraso",
-        "overdue_count": updated_count
+        "message": f"{metrics['debts_marked_overdue']} dívidas marcadas como em atraso",
+        "overdue_count": metrics["debts_marked_overdue"],
+        "alerts_created": metrics["overdue_alerts_created"]
     }
 
 def create_debt_alert(debt: Debt, db: Session, user: User):
@@ -332,28 +348,6 @@ def create_debt_alert(debt: Debt, db: Session, user: User):
     
     db.add(alert)
 
-def create_overdue_alert(debt: Debt, db: Session, user: User):
-    """Cria alerta para dívida em atraso"""
-    
-    days_overdue = (datetime.now() - debt.next_due_date).days if debt.next_due_date else 0
-    
-    alert = Alert(
-        title=f"Dívida em atraso: {debt.name}",
-        message=f"A dívida '{debt.name}' está {days_overdue} dias em atraso. Valor: R$ {debt.installment_amount or debt.remaining_amount}",
-        alert_type=AlertType.DEBT_DUE,
-        priority=3,  # Alta prioridade
-        metadata={
-            "debt_id": debt.id,
-            "due_date": debt.next_due_date.isoformat() if debt.next_due_date else None,
-            "days_overdue": days_overdue,
-            "amount": float(debt.installment_amount or debt.remaining_amount)
-        },
-        company_id=user.company_id,
-        user_id=user.id
-    )
-    
-    db.add(alert)
-
 @router.get("/installment-calendar")
 def get_installment_calendar(
     year: int = Query(..., description="Ano para o calendário"),
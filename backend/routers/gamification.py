@@ -15,6 +15,8 @@ from schemas_advanced import (
     AchievementCreate, AchievementUpdate
 )
 from auth import get_current_active_user
+from services.ledger_rollup import ledger_rollup
+from services.response_cache import response_cache
 
 router = APIRouter(prefix="/gamification", tags=["gamification"])
 
@@ -159,11 +161,13 @@ def check_and_unlock_achievements(
         db.add(achievement)
     
     if new_achievements:
-        db.commit()
-        
-        # Criar alertas para novas conquistas
+        # Criar alertas para novas conquistas (gravados junto com elas)
         for achievement_data in new_achievements:
             create_achievement_alert(achievement_data, db, current_user)
+        
+        db.commit()
+        # Alertas não lidos aparecem nos painéis em cache
+        response_cache.bump_tenant_version(current_user.company_id)
     
     return {
         "message": f"{len(new_achievements)} nova(s) conquista(s) desbloqueada(s)",
@@ -498,17 +502,12 @@ def get_consecutive_transaction_days(db: Session, user: User) -> int:
 
 def get_monthly_savings(db: Session, user: User) -> Decimal:
     """Calcula economia do mês atual"""
-    start_date = datetime.now().replace(day=1)
+    today = datetime.now().date()
     
-    transactions = db.query(Transaction).filter(
-        and_(
-            Transaction.company_id == user.company_id,
-            Transaction.date >= start_date
-        )
-    ).all()
+    totals = ledger_rollup.totals_by_type(db, user.company_id, today.replace(day=1), today)
     
-    income = sum(t.amount for t in transactions if t.transaction_type == TransactionType.INCOME)
-    expense = sum(t.amount for t in transactions if t.transaction_type == TransactionType.EXPENSE)
+    income = totals[TransactionType.INCOME]["amount"]
+    expense = totals[TransactionType.EXPENSE]["amount"]
     
     return max(income - expense, 0)
 
@@ -529,7 +528,7 @@ def create_achievement_alert(achievement_data: Dict, db: Session, user: User):
         message=f"{achievement_data['description']} (+{achievement_data['points']} pontos)",
         alert_type=AlertType.ACHIEVEMENT,
         priority=1,
-        metadata={
+        alert_metadata={
             "achievement_name": achievement_data['name'],
             "points": achievement_data['points'],
             "icon": achievement_data['icon']
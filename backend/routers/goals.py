@@ -16,10 +16,12 @@ from schemas_advanced import (
     GoalStatusSchema
 )
 from auth import get_current_active_user
+from services.response_cache import response_cache
+from services.tenant_etag import conditional_get
 
 router = APIRouter(prefix="/goals", tags=["financial-goals"])
 
-@router.get("/", response_model=List[FinancialGoalSchema])
+@router.get("/", response_model=List[FinancialGoalSchema], dependencies=[Depends(conditional_get(FinancialGoal))])
 def get_financial_goals(
     skip: int = 0,
     limit: int = 100,
@@ -96,6 +98,7 @@ def create_financial_goal(
     
     db.add(db_goal)
     db.commit()
+    response_cache.bump_tenant_version(current_user.company_id)
     db.refresh(db_goal)
     
     # Criar achievement para criação de meta
@@ -143,6 +146,7 @@ def update_financial_goal(
         check_goal_progress_alerts(db_goal, db, current_user)
     
     db.commit()
+    response_cache.bump_tenant_version(current_user.company_id)
     db.refresh(db_goal)
     
     return db_goal
@@ -170,6 +174,7 @@ def delete_financial_goal(
     
     db.delete(db_goal)
     db.commit()
+    response_cache.bump_tenant_version(current_user.company_id)
     
     return {"message": "Meta financeira removida com sucesso"}
 
@@ -221,6 +226,7 @@ def contribute_to_goal(
         check_goal_progress_alerts(db_goal, db, current_user)
     
     db.commit()
+    response_cache.bump_tenant_version(current_user.company_id)
     db.refresh(db_goal)
     
     progress_percentage = (db_goal.current_amount / db_goal.target_amount) * 100
@@ -460,6 +466,7 @@ def setup_auto_transfer(
         goal.monthly_target = monthly_amount
     
     db.commit()
+    response_cache.bump_tenant_version(current_user.company_id)
     db.refresh(goal)
     
     return {
@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from sqlalchemy.orm import Session
+from sqlalchemy import desc
+from typing import List, Optional
+import hmac
+import os
+
+from database import get_db
+from models import Job, User
+from schemas_advanced import Job as JobSchema
+from auth import get_current_active_user
+from services.job_queue import job_queue
+from services.alert_sweeper import alert_sweeper
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+# Segredo do cron que dispara /jobs/run-pending (Vercel envia "Authorization: Bearer <CRON_SECRET>")
+JOB_RUNNER_SECRET = os.getenv("CRON_SECRET", "")
+
+@router.get("/", response_model=List[JobSchema])
+def get_jobs(
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Lista os jobs mais recentes da empresa"""
+    
+    return db.query(Job).filter(
+        Job.company_id == current_user.company_id
+    ).order_by(desc(Job.created_at), desc(Job.id)).limit(limit).all()
+
+def verify_cron_secret(authorization: Optional[str] = Header(None)) -> None:
+    """Rotas chamadas pelo cron: exige o CRON_SECRET configurado"""
+    
+    expected = f"Bearer {JOB_RUNNER_SECRET}"
+    if not JOB_RUNNER_SECRET or not hmac.compare_digest(authorization or "", expected):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Não autorizado"
+        )
+
+@router.get("/run-pending", dependencies=[Depends(verify_cron_secret)])
+def run_pending_jobs():
+    """Processa jobs pendentes dentro do prazo de uma requisição
+    
+    Para ambientes sem worker.py (serverless): um cron chama esta rota e
+    cada chamada avança os jobs em blocos até `JOB_INLINE_BUDGET_SECONDS`;
+    o que faltar continua na chamada seguinte.
+    """
+    
+    executed = job_queue.run_pending(job_queue.inline_budget_seconds)
+    
+    return {"executed": executed}
+
+@router.get("/sweep-alerts", dependencies=[Depends(verify_cron_secret)])
+def sweep_alerts():
+    """Varredura de alertas de todas as empresas (dívidas vencidas, picos de gasto)
+    
+    Sem worker.py, o cron chama esta rota; se outro processo já executou a
+    varredura no intervalo atual, retorna sem executar.
+    """
+    
+    metrics = alert_sweeper.run_scheduled()
+    
+    return {"executed": metrics is not None, "metrics": metrics}
+
+@router.get("/{job_id}", response_model=JobSchema)
+def get_job(
+    job_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Status, progresso e resultado de um job"""
+    
+    job = job_queue.get(db, current_user.company_id, job_id)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job não encontrado"
+        )
+    
+    return job
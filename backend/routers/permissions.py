@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, select
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
-from database import get_db
+from database import get_db, get_async_db
 from models import User, Company, UserRole, Account, Transaction
 from schemas import UserCreate, UserUpdate, User as UserSchema
 from auth import get_current_active_user, get_password_hash
+from services.auth_cache import auth_user_cache
+from services.password_hashing import password_hasher
 
 router = APIRouter(prefix="/permissions", tags=["permissions"])
 
@@ -121,15 +124,15 @@ def get_user(
     return user
 
 @router.post("/users", response_model=UserSchema)
-def create_user(
+async def create_user(
     user_data: UserCreate,
     current_user: User = Depends(require_permission("users", "create")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Cria um novo usuário na empresa"""
     
     # Verificar se email já existe
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -144,10 +147,10 @@ def create_user(
         )
     
     # Criar usuário
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await password_hasher.hash(user_data.password)
     
     db_user = User(
-        name=user_data.name,
+        full_name=user_data.full_name,
         email=user_data.email,
         hashed_password=hashed_password,
         role=user_data.role,
@@ -156,8 +159,8 @@ def create_user(
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
@@ -200,6 +203,7 @@ def update_user(
     
     # Atualizar campos
     update_data = user_update.dict(exclude_unset=True)
+    previous_email = db_user.email
     
     if "password" in update_data:
         update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
@@ -208,6 +212,7 @@ def update_user(
         setattr(db_user, field, value)
     
     db.commit()
+    auth_user_cache.invalidate(previous_email, db_user.email)
     db.refresh(db_user)
     
     return db_user
@@ -251,6 +256,7 @@ def delete_user(
     # Desativar ao invés de deletar (para manter integridade dos dados)
     db_user.is_active = False
     db.commit()
+    auth_user_cache.invalidate(db_user.email)
     
     return {"message": "Usuário desativado com sucesso"}
 
@@ -277,6 +283,7 @@ def activate_user(
     
     db_user.is_active = True
     db.commit()
+    auth_user_cache.invalidate(db_user.email)
     
     return {"message": "Usuário ativado com sucesso"}
 
@@ -1,24 +1,44 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, desc, extract, case
-from typing import List, Optional, Dict, Any
+from sqlalchemy import and_, func, desc, extract, case, select
+from typing import List, Optional, Dict, Any, Iterable, Iterator
 from datetime import datetime, timedelta
 from decimal import Decimal
 from collections import defaultdict
+import csv
+import io
+import json
 
 from database import get_db
 from models import (
     Transaction, Account, User, TransactionCategory,
-    FinancialGoal, Debt, Alert, AlertType, TransactionType
+    FinancialGoal, Debt, Alert, AlertType, TransactionType, AlertSettings
 )
 from schemas_advanced import (
     DashboardStats, FinancialReport, CategorySpending,
-    MonthlyTrend, AlertCreate
+    MonthlyTrend, AlertCreate, AlertSettingsUpdate,
+    AlertSettings as AlertSettingsSchema
 )
 from auth import get_current_active_user
+from services.ledger_rollup import ledger_rollup
+from services.alert_sweeper import alert_sweeper
+from services.response_cache import response_cache
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
+# Formatos de exportação e seus content types
+EXPORT_FORMATS = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+# Linhas lidas do cursor do banco por vez na exportação
+EXPORT_BATCH_SIZE = 1000
+
+TRANSACTION_EXPORT_FIELDS = ["id", "date", "description", "amount", "type", "category", "account_id"]
+
 @router.get("/dashboard")
 def get_dashboard_summary(
     current_user: User = Depends(get_current_active_user),
@@ -30,19 +50,16 @@ def get_dashboard_summary(
     end_date = datetime.now()
     start_date = end_date - timedelta(days=30)
     
-    # Transações do período
-    transactions = db.query(Transaction).filter(
-        and_(
-            Transaction.company_id == current_user.company_id,
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        )
-    ).all()
+    # Totais do período a partir do agregado diário
+    totals = ledger_rollup.totals_by_type(
+        db, current_user.company_id, start_date.date(), end_date.date()
+    )
     
     # Cálculos básicos
-    total_income = sum(t.amount for t in transactions if t.transaction_type == TransactionType.INCOME)
-    total_expense = sum(t.amount for t in transactions if t.transaction_type == TransactionType.EXPENSE)
+    total_income = totals[TransactionType.INCOME]["amount"]
+    total_expense = totals[TransactionType.EXPENSE]["amount"]
     net_balance = total_income - total_expense
+    transactions_count = sum(total["count"] for total in totals.values())
     
     # Saldo atual das contas
     accounts = db.query(Account).filter(
@@ -105,7 +122,7 @@ def get_dashboard_summary(
         },
         "alerts_count": unread_alerts,
         "accounts_count": len(accounts),
-        "transactions_count": len(transactions)
+        "transactions_count": transactions_count
     }
 
 @router.get("/monthly/{year}/{month}")
@@ -124,6 +141,13 @@ def get_monthly_report(
             detail="Mês deve estar entre 1 e 12"
         )
     
+    cache_key = response_cache.key(
+        db, current_user.company_id, "reports.monthly", {"year": year, "month": month}
+    )
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     # Período do mês
     start_date = datetime(year, month, 1)
     if month == 12:
@@ -131,37 +155,38 @@ def get_monthly_report(
     else:
         end_date = datetime(year, month + 1, 1) - timedelta(days=1)
     
-    # Transações do mês
-    transactions = db.query(Transaction).filter(
-        and_(
-            Transaction.company_id == current_user.company_id,
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        )
-    ).all()
+    # Totais do mês por categoria e por dia, a partir do agregado diário
+    by_category = ledger_rollup.summarize(
+        db, current_user.company_id, start_date.date(), end_date.date(),
+        group_by=("category", "transaction_type")
+    )
+    by_day = ledger_rollup.summarize(
+        db, current_user.company_id, start_date.date(), end_date.date(),
+        group_by=("day", "transaction_type")
+    )
     
     # Análise por categoria
     categories_data = defaultdict(lambda: {"income": 0, "expense": 0, "count": 0})
     
-    for transaction in transactions:
-        category = transaction.category or "Outros"
-        amount = float(transaction.amount)
+    for row in by_category:
+        category = row.category or "Outros"
+        amount = float(row.total_amount)
         
-        if transaction.transaction_type == TransactionType.INCOME:
+        if row.transaction_type == TransactionType.INCOME:
             categories_data[category]["income"] += amount
         else:
             categories_data[category]["expense"] += amount
         
-        categories_data[category]["count"] += 1
+        categories_data[category]["count"] += int(row.transaction_count)
     
     # Análise por dia
     daily_data = defaultdict(lambda: {"income": 0, "expense": 0})
     
-    for transaction in transactions:
-        day = transaction.date.day
-        amount = float(transaction.amount)
+    for row in by_day:
+        day = row.day.day
+        amount = float(row.total_amount)
         
-        if transaction.transaction_type == TransactionType.INCOME:
+        if row.transaction_type == TransactionType.INCOME:
             daily_data[day]["income"] += amount
         else:
             daily_data[day]["expense"] += amount
@@ -176,24 +201,24 @@ def get_monthly_report(
     else:
         prev_end = datetime(prev_year, prev_month + 1, 1) - timedelta(days=1)
     
-    prev_transactions = db.query(Transaction).filter(
-        and_(
-            Transaction.company_id == current_user.company_id,
-            Transaction.date >= prev_start,
-            Transaction.date <= prev_end
-        )
-    ).all()
+    prev_totals = ledger_rollup.totals_by_type(
+        db, current_user.company_id, prev_start.date(), prev_end.date()
+    )
+    current_totals = ledger_rollup.totals_by_type(
+        db, current_user.company_id, start_date.date(), end_date.date()
+    )
     
-    prev_income = sum(t.amount for t in prev_transactions if t.transaction_type == TransactionType.INCOME)
-    prev_expense = sum(t.amount for t in prev_transactions if t.transaction_type == TransactionType.EXPENSE)
+    prev_income = prev_totals[TransactionType.INCOME]["amount"]
+    prev_expense = prev_totals[TransactionType.EXPENSE]["amount"]
     
-    current_income = sum(t.amount for t in transactions if t.transaction_type == TransactionType.INCOME)
-    current_expense = sum(t.amount for t in transactions if t.transaction_type == TransactionType.EXPENSE)
+    current_income = current_totals[TransactionType.INCOME]["amount"]
+    current_expense = current_totals[TransactionType.EXPENSE]["amount"]
+    transactions_count = sum(total["count"] for total in current_totals.values())
     
     income_change = ((current_income - prev_income) / prev_income * 100) if prev_income > 0 else 0
     expense_change = ((current_expense - prev_expense) / prev_expense * 100) if prev_expense > 0 else 0
     
-    return {
+    return response_cache.store(cache_key, {
         "period": {
             "year": year,
             "month": month,
@@ -204,7 +229,7 @@ def get_monthly_report(
             "total_income": float(current_income),
             "total_expense": float(current_expense),
             "net_balance": float(current_income - current_expense),
-            "transactions_count": len(transactions)
+            "transactions_count": transactions_count
         },
         "comparison": {
             "income_change_percentage": float(income_change),
@@ -216,7 +241,7 @@ def get_monthly_report(
         },
         "categories": dict(categories_data),
         "daily_flow": dict(daily_data)
-    }
+    })
 
 @router.get("/categories")
 def get_categories_report(
@@ -228,6 +253,28 @@ def get_categories_report(
 ):
     """Relatório de gastos por categoria"""
     
+    # Sem datas explícitas o período depende do dia corrente
+    cache_key = response_cache.key(db, current_user.company_id, "reports.categories", {
+        "start_date": start_date, "end_date": end_date, "limit": limit,
+        "today": datetime.now().date()
+    })
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    return response_cache.store(
+        cache_key, build_categories_report(db, current_user.company_id, start_date, end_date, limit)
+    )
+
+def build_categories_report(
+    db: Session,
+    company_id: int,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    limit: int
+) -> Dict[str, Any]:
+    """Gastos por categoria no período (dict simples, usado pela rota e pela exportação)"""
+    
     # Período padrão: últimos 3 meses
     if not end_date:
         end_date = datetime.now()
@@ -237,9 +284,9 @@ def get_categories_report(
     # Buscar transações do período
     transactions = db.query(Transaction).filter(
         and_(
-            Transaction.company_id == current_user.company_id,
-            Transaction.date >= start_date,
-            Transaction.date <= end_date,
+            Transaction.company_id == company_id,
+            Transaction.transaction_date >= start_date,
+            Transaction.transaction_date <= end_date,
             Transaction.transaction_type == TransactionType.EXPENSE
         )
     ).all()
@@ -257,7 +304,7 @@ def get_categories_report(
             "id": transaction.id,
             "description": transaction.description,
             "amount": amount,
-            "date": transaction.date
+            "date": transaction.transaction_date
         })
     
     # Ordenar por valor total
@@ -301,14 +348,19 @@ def get_cash_flow_report(
     end_date = datetime.now()
     start_date = end_date - timedelta(days=days)
     
-    # Transações do período
-    transactions = db.query(Transaction).filter(
-        and_(
-            Transaction.company_id == current_user.company_id,
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        )
-    ).order_by(Transaction.date).all()
+    # Totais diários do período a partir do agregado diário
+    by_day = ledger_rollup.summarize(
+        db, current_user.company_id, start_date.date(), end_date.date(),
+        group_by=("day", "transaction_type")
+    )
+    
+    daily_totals = defaultdict(lambda: {"income": Decimal('0'), "expense": Decimal('0'), "count": 0})
+    for row in by_day:
+        if row.transaction_type == TransactionType.INCOME:
+            daily_totals[row.day]["income"] += Decimal(str(row.total_amount))
+        elif row.transaction_type == TransactionType.EXPENSE:
+            daily_totals[row.day]["expense"] += Decimal(str(row.total_amount))
+        daily_totals[row.day]["count"] += int(row.transaction_count)
     
     # Saldo inicial (saldo atual menos movimentações do período)
     current_balance = sum(
@@ -317,31 +369,20 @@ def get_cash_flow_report(
         ).all()
     )
     
-    period_income = sum(t.amount for t in transactions if t.transaction_type == TransactionType.INCOME)
-    period_expense = sum(t.amount for t in transactions if t.transaction_type == TransactionType.EXPENSE)
+    period_income = sum((day["income"] for day in daily_totals.values()), Decimal('0'))
+    period_expense = sum((day["expense"] for day in daily_totals.values()), Decimal('0'))
     initial_balance = current_balance - (period_income - period_expense)
     
     # Fluxo diário
     daily_flow = []
     running_balance = initial_balance
     
-    # Agrupar transações por dia
-    daily_transactions = defaultdict(list)
-    for transaction in transactions:
-        day = transaction.date.date()
-        daily_transactions[day].append(transaction)
-    
     # Gerar dados diários
     current_date = start_date.date()
     while current_date <= end_date.date():
-        day_income = sum(
-            t.amount for t in daily_transactions[current_date]
-            if t.transaction_type == TransactionType.INCOME
-        )
-        day_expense = sum(
-            t.amount for t in daily_transactions[current_date]
-            if t.transaction_type == TransactionType.EXPENSE
-        )
+        day_totals = daily_totals[current_date]
+        day_income = day_totals["income"]
+        day_expense = day_totals["expense"]
         
         net_flow = day_income - day_expense
         running_balance += net_flow
@@ -352,7 +393,7 @@ def get_cash_flow_report(
             "expense": float(day_expense),
             "net_flow": float(net_flow),
             "balance": float(running_balance),
-            "transactions_count": len(daily_transactions[current_date])
+            "transactions_count": day_totals["count"]
         })
         
         current_date += timedelta(days=1)
@@ -402,26 +443,27 @@ def get_financial_insights(
 ):
     """Insights e alertas inteligentes sobre finanças"""
     
+    cache_key = response_cache.key(
+        db, current_user.company_id, "reports.insights", {"today": datetime.now().date()}
+    )
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     insights = []
     
     # Período de análise: últimos 60 dias
     end_date = datetime.now()
     start_date = end_date - timedelta(days=60)
     
-    transactions = db.query(Transaction).filter(
-        and_(
-            Transaction.company_id == current_user.company_id,
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        )
-    ).all()
-    
     # Insight 1: Categoria com maior gasto
     expense_by_category = defaultdict(float)
-    for t in transactions:
-        if t.transaction_type == TransactionType.EXPENSE:
-            category = t.category or "Outros"
-            expense_by_category[category] += float(t.amount)
+    for row in ledger_rollup.summarize(
+        db, current_user.company_id, start_date.date(), end_date.date(),
+        group_by=("category",), transaction_type=TransactionType.EXPENSE
+    ):
+        category = row.category or "Outros"
+        expense_by_category[category] += float(row.total_amount)
     
     if expense_by_category:
         top_category = max(expense_by_category.items(), key=lambda x: x[1])
@@ -442,24 +484,16 @@ def get_financial_insights(
     
     # Insight 2: Comparação com mês anterior
     current_month_start = datetime(end_date.year, end_date.month, 1)
-    current_month_expenses = sum(
-        t.amount for t in transactions
-        if t.transaction_type == TransactionType.EXPENSE and t.date >= current_month_start
-    )
+    current_month_expenses = ledger_rollup.totals_by_type(
+        db, current_user.company_id, current_month_start.date(), end_date.date()
+    )[TransactionType.EXPENSE]["amount"]
     
     prev_month = current_month_start - timedelta(days=1)
     prev_month_start = datetime(prev_month.year, prev_month.month, 1)
     
-    prev_transactions = db.query(Transaction).filter(
-        and_(
-            Transaction.company_id == current_user.company_id,
-            Transaction.date >= prev_month_start,
-            Transaction.date < current_month_start,
-            Transaction.transaction_type == TransactionType.EXPENSE
-        )
-    ).all()
-    
-    prev_month_expenses = sum(t.amount for t in prev_transactions)
+    prev_month_expenses = ledger_rollup.totals_by_type(
+        db, current_user.company_id, prev_month_start.date(), prev_month.date()
+    )[TransactionType.EXPENSE]["amount"]
     
     if prev_month_expenses > 0:
         expense_change = ((current_month_expenses - prev_month_expenses) / prev_month_expenses) * 100
@@ -530,131 +564,104 @@ def get_financial_insights(
             }
         })
     
-    return {
+    return response_cache.store(cache_key, {
         "generated_at": datetime.now(),
         "insights_count": len(insights),
         "insights": insights
-    }
+    })
 
 @router.post("/generate-alerts")
 def generate_smart_alerts(
+    current_user: User = Depends(get_current_active_user)
+):
+    """Gera alertas inteligentes baseados nos padrões financeiros
+    
+    Executa agora, só para a empresa do usuário, a etapa de picos de gasto
+    da varredura agendada (services/alert_sweeper.py), com as mesmas regras
+    e a mesma deduplicação.
+    """
+    
+    metrics = alert_sweeper.run(
+        company_ids=[current_user.company_id],
+        steps=("spending_spikes",)
+    )
+    if metrics["failed_batches"]:
+        # O erro do lote já foi registrado no log pela varredura
+        raise HTTPException(status_code=500, detail="Erro ao gerar alertas")
+    alerts_created = ["high_spending"] * metrics["spike_alerts_created"]
+    
+    return {
+        "message": f"{len(alerts_created)} alertas criados",
+        "alerts_created": alerts_created
+    }
+
+@router.get("/alert-settings", response_model=AlertSettingsSchema)
+def get_alert_settings(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Gera alertas inteligentes baseados nos padrões financeiros"""
+    """Configuração da varredura de alertas da empresa"""
     
-    alerts_created = []
+    return alert_sweeper.settings_for(db, [current_user.company_id])[0]._asdict()
+
+@router.put("/alert-settings", response_model=AlertSettingsSchema)
+def update_alert_settings(
+    settings_update: AlertSettingsUpdate,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Atualiza a configuração da varredura de alertas da empresa"""
     
-    # Verificar gastos acima da média
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=30)
+    settings = db.query(AlertSettings).filter(
+        AlertSettings.company_id == current_user.company_id
+    ).first()
     
-    recent_transactions = db.query(Transaction).filter(
-        and_(
-            Transaction.company_id == current_user.company_id,
-            Transaction.date >= start_date,
-            Transaction.transaction_type == TransactionType.EXPENSE
-        )
-    ).all()
+    if not settings:
+        defaults = alert_sweeper.settings_for(db, [current_user.company_id])[0]._asdict()
+        settings = AlertSettings(**defaults)
+        db.add(settings)
     
-    if recent_transactions:
-        daily_expenses = defaultdict(float)
-        for t in recent_transactions:
-            day = t.date.date()
-            daily_expenses[day] += float(t.amount)
-        
-        avg_daily_expense = sum(daily_expenses.values()) / len(daily_expenses)
-        
-        # Verificar últimos 3 dias
-        for i in range(3):
-            check_date = (end_date - timedelta(days=i)).date()
-            if check_date in daily_expenses:
-                day_expense = daily_expenses[check_date]
-                if day_expense > avg_daily_expense * 1.5:  # 50% acima da média
-                    
-                    # Verificar se já existe alerta similar
-                    existing_alert = db.query(Alert).filter(
-                        and_(
-                            Alert.company_id == current_user.company_id,
-                            Alert.alert_type == AlertType.BUDGET_EXCEEDED,
-                            Alert.created_at >= check_date
-                        )
-                    ).first()
-                    
-                    if not existing_alert:
-                        alert = Alert(
-                            title="Gasto acima da média",
-                            message=f"Você gastou R$ {day_expense:.2f} em {check_date.strftime('%d/%m')}, {((day_expense/avg_daily_expense-1)*100):.0f}% acima da sua média diária",
-                            alert_type=AlertType.BUDGET_EXCEEDED,
-                            priority=2,
-                            metadata={
-                                "date": check_date.isoformat(),
-                                "amount": day_expense,
-                                "average": avg_daily_expense,
-                                "percentage_above": ((day_expense/avg_daily_expense-1)*100)
-                            },
-                            company_id=current_user.company_id,
-                            user_id=current_user.id
-                        )
-                        
-                        db.add(alert)
-                        alerts_created.append("high_spending")
+    for field, value in settings_update.model_dump(exclude_unset=True).items():
+        setattr(settings, field, value)
     
     db.commit()
     
-    return {
-        "message": f"{len(alerts_created)} alertas criados",
-        "alerts_created": alerts_created
-    }
+    return alert_sweeper.settings_for(db, [current_user.company_id])[0]._asdict()
 
 @router.get("/export/{format}")
 def export_report(
     format: str,
     start_date: datetime = Query(...),
     end_date: datetime = Query(...),
-    report_type: str = Query("transactions", description="Tipo: transactions, categories, cash_flow"),
+    report_type: str = Query("transactions", description="Tipo: transactions, categories"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Exporta relatórios em diferentes formatos"""
+    """Exporta relatórios em JSON, NDJSON ou CSV
+    
+    A resposta é transmitida aos poucos: as transações são lidas do banco
+    com um cursor no servidor (yield_per) e escritas em blocos, com uso de
+    memória constante independentemente do tamanho do período.
+    """
     
-    if format not in ["json", "csv"]:
+    if format not in EXPORT_FORMATS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Formato deve ser 'json' ou 'csv'"
+            detail="Formato deve ser 'json', 'ndjson' ou 'csv'"
         )
     
     # Buscar dados baseado no tipo de relatório
     if report_type == "transactions":
-        transactions = db.query(Transaction).filter(
-            and_(
-                Transaction.company_id == current_user.company_id,
-                Transaction.date >= start_date,
-                Transaction.date <= end_date
-            )
-        ).all()
-        
-        data = []
-        for t in transactions:
-            data.append({
-                "id": t.id,
-                "date": t.date.isoformat(),
-                "description": t.description,
-                "amount": float(t.amount),
-                "type": t.transaction_type.value,
-                "category": t.category,
-                "account_id": t.account_id
-            })
+        fields = TRANSACTION_EXPORT_FIELDS
+        batches = iter_transaction_export(
+            db, current_user.company_id, start_date, end_date
+        )
     
     elif report_type == "categories":
-        # Usar função existente
-        categories_report = get_categories_report(
-            start_date=start_date,
-            end_date=end_date,
-            current_user=current_user,
-            db=db
-        )
-        data = categories_report["categories"]
+        # Poucas linhas, já agregadas
+        data = build_categories_report(db, current_user.company_id, start_date, end_date, limit=100)["categories"]
+        fields = list(data[0].keys()) if data else []
+        batches = iter([data])
     
     else:
         raise HTTPException(
@@ -662,13 +669,110 @@ def export_report(
             detail="Tipo de relatório não suportado"
         )
     
-    return {
-        "format": format,
-        "report_type": report_type,
-        "period": {
-            "start_date": start_date.date(),
-            "end_date": end_date.date()
-        },
-        "data": data,
-        "total_records": len(data)
-    }
\ No newline at end of file
+    if format == "csv":
+        body = stream_csv(batches, fields)
+    elif format == "ndjson":
+        body = stream_ndjson(batches)
+    else:
+        body = stream_json(batches, {
+            "format": format,
+            "report_type": report_type,
+            "period": {
+                "start_date": start_date.date().isoformat(),
+                "end_date": end_date.date().isoformat()
+            }
+        })
+    
+    filename = f"{report_type}_{start_date.date()}_{end_date.date()}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+def iter_transaction_export(
+    db: Session,
+    company_id: int,
+    start_date: datetime,
+    end_date: datetime,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[List[Dict[str, Any]]]:
+    """Lê as transações do período em blocos de `batch_size` linhas
+    
+    Usa uma sessão própria (no mesmo banco da requisição), pois o gerador
+    continua sendo consumido depois que o endpoint retorna. Seleciona só
+    colunas, sem carregar objetos ORM no identity map.
+    """
+    
+    account_id = case(
+        (Transaction.transaction_type == TransactionType.INCOME, Transaction.to_account_id),
+        else_=Transaction.from_account_id
+    )
+    
+    query = select(
+        Transaction.id,
+        Transaction.transaction_date,
+        Transaction.description,
+        Transaction.amount,
+        Transaction.transaction_type,
+        Transaction.category,
+        account_id.label("account_id")
+    ).where(
+        Transaction.company_id == company_id,
+        Transaction.transaction_date >= start_date,
+        Transaction.transaction_date <= end_date
+    ).order_by(
+        Transaction.transaction_date, Transaction.id
+    ).execution_options(yield_per=batch_size)
+    
+    export_db = Session(bind=db.get_bind())
+    try:
+        for partition in export_db.execute(query).partitions():
+            yield [
+                {
+                    "id": row.id,
+                    "date": row.transaction_date.isoformat(),
+                    "description": row.description,
+                    "amount": float(row.amount),
+                    "type": row.transaction_type.value,
+                    "category": row.category,
+                    "account_id": row.account_id
+                }
+                for row in partition
+            ]
+    finally:
+        export_db.close()
+
+def stream_csv(batches: Iterable[List[Dict[str, Any]]], fields: List[str]) -> Iterator[str]:
+    """Cabeçalho e depois um bloco de linhas CSV por lote"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def stream_ndjson(batches: Iterable[List[Dict[str, Any]]]) -> Iterator[str]:
+    """Um objeto JSON por linha"""
+    for batch in batches:
+        yield "".join(json.dumps(item, ensure_ascii=False, default=str) + "\n" for item in batch)
+
+def stream_json(batches: Iterable[List[Dict[str, Any]]], envelope: Dict[str, Any]) -> Iterator[str]:
+    """Documento JSON no formato anterior ({..., "data": [...], "total_records": n}) escrito em partes"""
+    yield json.dumps(envelope, ensure_ascii=False)[:-1] + ', "data": ['
+    
+    total_records = 0
+    for batch in batches:
+        if not batch:
+            continue
+        separator = ", " if total_records else ""
+        yield separator + ", ".join(json.dumps(item, ensure_ascii=False, default=str) for item in batch)
+        total_records += len(batch)
+    
+    yield f'], "total_records": {total_records}}}'
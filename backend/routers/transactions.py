@@ -1,21 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
-from typing import List, Optional
+from sqlalchemy import and_, or_, desc, tuple_
+from typing import List, Optional, Tuple
 from datetime import datetime, date
 from decimal import Decimal
+import base64
+import binascii
+import json
 
 from database import get_db
 from models import Transaction, Account, User, TransactionType
 from schemas import Transaction as TransactionSchema, TransactionCreate, TransactionUpdate
 from auth import get_current_active_user
+from services.response_cache import response_cache
+from services.tenant_etag import conditional_get
+from services.ledger_rollup import ledger_rollup
+from services.category_corrections import category_corrections
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
-@router.get("/", response_model=List[TransactionSchema])
+# Cabeçalho com o cursor da próxima página (paginação por chave)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(transaction_date: datetime, transaction_id: int) -> str:
+    """Codifica (transaction_date, id) num cursor opaco"""
+    payload = json.dumps([transaction_date.isoformat(), transaction_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decodifica o cursor gerado por encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        transaction_date, transaction_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(transaction_date), int(transaction_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+@router.get("/", response_model=List[TransactionSchema], dependencies=[Depends(conditional_get(Transaction))])
 def get_transactions(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     transaction_type: Optional[TransactionType] = None,
     category: Optional[str] = None,
     start_date: Optional[date] = None,
@@ -24,7 +53,14 @@ def get_transactions(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Lista transações com filtros opcionais"""
+    """Lista transações com filtros opcionais
+    
+    Ordena por (transaction_date, id) decrescentes. Quando a página vem
+    cheia, o cabeçalho X-Next-Cursor traz o cursor da próxima; enviando-o em
+    `cursor` a consulta continua a partir dessa chave pelo índice
+    (company_id, transaction_date DESC, id DESC), com custo constante em
+    qualquer profundidade. `skip` continua aceito (paginação por offset).
+    """
     
     query = db.query(Transaction).filter(
         Transaction.company_id == current_user.company_id
@@ -51,7 +87,23 @@ def get_transactions(
             )
         )
     
-    transactions = query.order_by(desc(Transaction.transaction_date)).offset(skip).limit(limit).all()
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(Transaction.transaction_date, Transaction.id) < (cursor_date, cursor_id)
+        )
+    
+    query = query.order_by(desc(Transaction.transaction_date), desc(Transaction.id))
+    
+    if skip and not cursor:
+        query = query.offset(skip)
+    
+    transactions = query.limit(limit).all()
+    
+    if transactions and len(transactions) == limit:
+        last = transactions[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.transaction_date, last.id)
+    
     return transactions
 
 @router.get("/{transaction_id}", response_model=TransactionSchema)
@@ -149,7 +201,9 @@ def create_transaction(
     transaction = Transaction(
         **transaction_data.dict(),
         company_id=current_user.company_id,
-        user_id=current_user.id
+        user_id=current_user.id,
+        # Categoria informada pelo usuário: exemplo de treino do categorizador
+        category_manual=bool(transaction_data.category)
     )
     
     db.add(transaction)
@@ -165,8 +219,15 @@ def create_transaction(
         from_account.balance -= transaction_data.amount
         to_account.balance += transaction_data.amount
     
+    # Atualizar agregado diário
+    ledger_rollup.record(db, [transaction])
+    
     db.commit()
+    response_cache.bump_tenant_version(current_user.company_id)
     db.refresh(transaction)
+    category_corrections.record(
+        current_user.company_id, added=category_corrections.sample_of(transaction)
+    )
     
     return transaction
 
@@ -190,6 +251,9 @@ def update_transaction(
             detail="Transaction not found"
         )
     
+    rollup_before = ledger_rollup.snapshot(transaction)
+    sample_before = category_corrections.sample_of(transaction)
+    
     # Reverter o impacto da transação original nos saldos
     if transaction.transaction_type == TransactionType.INCOME and transaction.to_account_id:
         to_account = db.query(Account).filter(Account.id == transaction.to_account_id).first()
@@ -216,6 +280,11 @@ def update_transaction(
     for field, value in update_data.items():
         setattr(transaction, field, value)
     
+    # Categoria alterada pelo usuário: correção que treina o categorizador
+    if "category" in update_data:
+        transaction.category_manual = bool(transaction.category)
+        transaction.ml_confidence = None
+    
     # Aplicar o novo impacto nos saldos
     if transaction.transaction_type == TransactionType.INCOME and transaction.to_account_id:
         to_account = db.query(Account).filter(Account.id == transaction.to_account_id).first()
@@ -237,9 +306,19 @@ def update_transaction(
             if to_account:
                 to_account.balance += transaction.amount
     
+    # Atualizar agregado diário
+    ledger_rollup.replace(db, rollup_before, transaction)
+    
     db.commit()
+    response_cache.bump_tenant_version(current_user.company_id)
     db.refresh(transaction)
     
+    sample_after = category_corrections.sample_of(transaction)
+    if sample_after != sample_before:
+        category_corrections.record(
+            current_user.company_id, removed=sample_before, added=sample_after
+        )
+    
     return transaction
 
 @router.delete("/{transaction_id}")
@@ -282,8 +361,14 @@ def delete_transaction(
             if to_account:
                 to_account.balance -= transaction.amount
     
+    # Atualizar agregado diário
+    ledger_rollup.discard(db, [transaction])
+    sample = category_corrections.sample_of(transaction)
+    
     db.delete(transaction)
     db.commit()
+    response_cache.bump_tenant_version(current_user.company_id)
+    category_corrections.record(current_user.company_id, removed=sample)
     
     return {"message": "Transaction deleted successfully"}
 
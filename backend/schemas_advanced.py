@@ -37,6 +37,12 @@ class AlertTypeSchema(str, Enum):
     UNUSUAL_SPENDING = "unusual_spending"
     LOW_BALANCE = "low_balance"
 
+class JobStatusSchema(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
 class AchievementTypeSchema(str, Enum):
     SAVINGS_MILESTONE = "savings_milestone"
     DEBT_PAYMENT = "debt_payment"
@@ -201,6 +207,22 @@ class Alert(AlertBase):
     class Config:
         from_attributes = True
 
+# Schemas para configuração da varredura de alertas
+class AlertSettingsUpdate(BaseModel):
+    sweep_enabled: Optional[bool] = None
+    overdue_debts_enabled: Optional[bool] = None
+    spending_spikes_enabled: Optional[bool] = None
+    spike_threshold: Optional[Decimal] = Field(None, gt=1, le=100)  # gasto do dia / média diária
+    spike_min_amount: Optional[Decimal] = Field(None, ge=0)
+
+class AlertSettings(BaseModel):
+    company_id: int
+    sweep_enabled: bool
+    overdue_debts_enabled: bool
+    spending_spikes_enabled: bool
+    spike_threshold: Decimal
+    spike_min_amount: Decimal
+
 # Schemas para Achievement
 class AchievementBase(BaseModel):
     name: str = Field(..., max_length=200)
@@ -304,6 +326,24 @@ class BankImportResult(BaseModel):
     errors: List[str]
     last_import_date: datetime
 
+# Schema para jobs em segundo plano
+class Job(BaseModel):
+    id: int
+    job_type: str
+    status: JobStatusSchema
+    payload: Optional[Dict[str, Any]]
+    progress_current: int
+    progress_total: Optional[int]
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+    attempts: int
+    created_at: Optional[datetime]
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
 # Schema para categorização automática
 class AutoCategorizationResult(BaseModel):
     transaction_id: int
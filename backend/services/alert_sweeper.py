@@ -0,0 +1,361 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import Boolean, DateTime, Integer, String, and_, cast, extract, func, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models import (
+    Alert, AlertSettings, AlertSweepRun, AlertType, Company, DailyLedgerRollup,
+    Debt, DebtStatus, TransactionType, User
+)
+from services.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+# Etapas da varredura, na ordem de execução
+SWEEP_STEPS = ("overdue_debts", "spending_spikes")
+
+class TenantAlertSettings(NamedTuple):
+    """Configuração efetiva de uma empresa (linha de alert_settings ou padrões)"""
+    company_id: int
+    sweep_enabled: bool
+    overdue_debts_enabled: bool
+    spending_spikes_enabled: bool
+    spike_threshold: Decimal
+    spike_min_amount: Decimal
+
+class AlertSweeperService:
+    """Varredura agendada de alertas para todas as empresas
+
+    Em vez de rodar por empresa quando o usuário chama o endpoint (e
+    consultar Alert a cada dia candidato para evitar duplicatas), processa
+    as empresas em lotes de `batch_size` com SQL por conjunto:
+
+    - dívidas vencidas: INSERT ... SELECT dos alertas e UPDATE do status;
+    - picos de gasto: totais diários de despesa a partir do
+      daily_ledger_rollup, média por empresa na janela de `window_days` e
+      INSERT ... SELECT dos alertas dos últimos `lookback_days` dias.
+
+    Os alertas levam uma `dedupe_key` por evento e são inseridos com ON
+    CONFLICT DO NOTHING no índice único (company_id, dedupe_key): um alerta
+    já existente, inclusive um gravado por outra varredura concorrente, é
+    ignorado sem derrubar a transação do lote. Até
+    `concurrency` lotes rodam ao mesmo tempo, cada um na sua transação; a
+    configuração por empresa fica em alert_settings. `run_scheduled` grava
+    a execução em alert_sweep_runs com um slot único por intervalo, então
+    vários workers/crons podem chamá-la e só um executa.
+    """
+
+    def __init__(self, interval_seconds: int = 3600, batch_size: int = 200, concurrency: int = 4,
+                 window_days: int = 30, lookback_days: int = 3,
+                 spike_threshold: Decimal = Decimal("1.5"), spike_min_amount: Decimal = Decimal("0")):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.window_days = window_days
+        self.lookback_days = lookback_days
+        self.spike_threshold = spike_threshold
+        self.spike_min_amount = spike_min_amount
+        self.last_run: Optional[Dict[str, Any]] = None
+        self._runs = 0
+        self._lock = threading.Lock()
+
+    def settings_for(self, db: Session, company_ids: Optional[Sequence[int]] = None) -> List[TenantAlertSettings]:
+        """Configuração efetiva das empresas (todas, se `company_ids` for None)"""
+        query = select(
+            Company.id,
+            func.coalesce(AlertSettings.sweep_enabled, True),
+            func.coalesce(AlertSettings.overdue_debts_enabled, True),
+            func.coalesce(AlertSettings.spending_spikes_enabled, True),
+            func.coalesce(AlertSettings.spike_threshold, self.spike_threshold),
+            func.coalesce(AlertSettings.spike_min_amount, self.spike_min_amount)
+        ).outerjoin(AlertSettings, AlertSettings.company_id == Company.id).order_by(Company.id)
+        if company_ids is not None:
+            query = query.where(Company.id.in_(company_ids))
+
+        return [
+            TenantAlertSettings(row[0], bool(row[1]), bool(row[2]), bool(row[3]), Decimal(str(row[4])), Decimal(str(row[5])))
+            for row in db.execute(query).all()
+        ]
+
+    def run_scheduled(self) -> Optional[Dict[str, Any]]:
+        """Executa a varredura se ainda não houve execução no intervalo atual"""
+        slot = int(time.time() // self.interval_seconds)
+        db = SessionLocal()
+        try:
+            run = AlertSweepRun(slot=slot, started_at=datetime.now(timezone.utc))
+            db.add(run)
+            try:
+                db.commit()
+            except IntegrityError:
+                # Outro worker/cron já pegou este intervalo
+                db.rollback()
+                return None
+
+            metrics = None
+            try:
+                metrics = self.run()
+                return metrics
+            except Exception as error:
+                metrics = {"error": str(error)}
+                raise
+            finally:
+                # O slot fica registrado como concluído mesmo se a varredura falhar
+                run.finished_at = datetime.now(timezone.utc)
+                run.metrics = metrics
+                db.commit()
+        finally:
+            db.close()
+
+    def run(self, company_ids: Optional[Sequence[int]] = None, steps: Sequence[str] = SWEEP_STEPS,
+            now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Varre as empresas (todas ou `company_ids`) e retorna as métricas da execução"""
+        started = time.perf_counter()
+        now = now or datetime.now()
+
+        db = SessionLocal()
+        try:
+            tenants = [tenant for tenant in self.settings_for(db, company_ids) if tenant.sweep_enabled]
+        finally:
+            db.close()
+
+        batches = [tenants[start:start + self.batch_size] for start in range(0, len(tenants), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=max(1, self.concurrency), thread_name_prefix="alert-sweep") as executor:
+            results = list(executor.map(lambda batch: self._sweep_batch(batch, steps, now), batches))
+
+        metrics = {
+            "started_at": now.isoformat(),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "companies": len(tenants),
+            "batches": len(batches),
+            "failed_batches": sum(1 for result in results if result["error"]),
+            "debts_marked_overdue": sum(result["debts_marked_overdue"] for result in results),
+            "overdue_alerts_created": sum(result["overdue_alerts_created"] for result in results),
+            "spike_alerts_created": sum(result["spike_alerts_created"] for result in results),
+            "step_ms": {
+                step: round(sum(result["step_ms"].get(step, 0.0) for result in results), 1)
+                for step in steps
+            },
+            "slowest_batch_ms": max((result["duration_ms"] for result in results), default=0.0)
+        }
+
+        with self._lock:
+            self._runs += 1
+            self.last_run = metrics
+
+        return metrics
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"runs": self._runs, "last_run": self.last_run}
+
+    def _sweep_batch(self, tenants: List[TenantAlertSettings], steps: Sequence[str], now: datetime) -> Dict[str, Any]:
+        """Um lote de empresas numa transação; falhas ficam no lote"""
+        started = time.perf_counter()
+        result = {
+            "debts_marked_overdue": 0, "overdue_alerts_created": 0, "spike_alerts_created": 0,
+            "step_ms": {}, "duration_ms": 0.0, "error": None
+        }
+        changed = set()
+
+        db = SessionLocal()
+        try:
+            if "overdue_debts" in steps:
+                step_started = time.perf_counter()
+                company_ids = [tenant.company_id for tenant in tenants if tenant.overdue_debts_enabled]
+                if company_ids:
+                    alerts, debts = self._sweep_overdue_debts(db, company_ids, now)
+                    result["overdue_alerts_created"] = len(alerts)
+                    result["debts_marked_overdue"] = len(debts)
+                    changed.update(alerts, debts)
+                result["step_ms"]["overdue_debts"] = (time.perf_counter() - step_started) * 1000
+
+            if "spending_spikes" in steps:
+                step_started = time.perf_counter()
+                company_ids = [tenant.company_id for tenant in tenants if tenant.spending_spikes_enabled]
+                if company_ids:
+                    alerts = self._sweep_spending_spikes(db, company_ids, now.date())
+                    result["spike_alerts_created"] = len(alerts)
+                    changed.update(alerts)
+                result["step_ms"]["spending_spikes"] = (time.perf_counter() - step_started) * 1000
+
+            db.commit()
+        except Exception as error:
+            db.rollback()
+            logger.warning(f"Erro na varredura de alertas (empresas {tenants[0].company_id}-{tenants[-1].company_id}): {str(error)}")
+            result.update(debts_marked_overdue=0, overdue_alerts_created=0, spike_alerts_created=0, error=str(error))
+            changed.clear()
+        finally:
+            db.close()
+
+        for company_id in changed:
+            response_cache.bump_tenant_version(company_id)
+
+        result["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    def _sweep_overdue_debts(self, db: Session, company_ids: List[int], now: datetime):
+        """Alertas e status OVERDUE das dívidas ativas vencidas; retorna as empresas de cada linha afetada"""
+        dialect = db.get_bind().dialect.name
+        now_value = literal(now, DateTime())
+        overdue = and_(
+            Debt.company_id.in_(company_ids),
+            Debt.status == DebtStatus.ACTIVE,
+            Debt.next_due_date < now_value
+        )
+
+        amount = func.coalesce(Debt.installment_amount, Debt.remaining_amount)
+        days_overdue = self._days_between(dialect, now_value, Debt.next_due_date)
+        due_date = cast(func.date(Debt.next_due_date), String)
+        dedupe_key = literal("debt_overdue:") + cast(Debt.id, String) + literal(":") + due_date
+
+        candidates = select(
+            literal("Dívida em atraso: ") + Debt.name,
+            literal("A dívida '") + Debt.name + literal("' está ") + cast(days_overdue, String)
+            + literal(" dias em atraso. Valor: R$ ") + self._format_money(dialect, amount),
+            literal(AlertType.DEBT_DUE, Alert.alert_type.type),
+            literal(3),  # Alta prioridade
+            literal(False, Boolean()),
+            literal(True, Boolean()),
+            self._json_object(
+                dialect,
+                debt_id=Debt.id, due_date=due_date, days_overdue=days_overdue, amount=amount
+            ),
+            dedupe_key,
+            Debt.company_id,
+            Debt.user_id
+        ).where(
+            overdue
+        )
+
+        alerts = self._insert_alerts(db, dialect, candidates)
+
+        debts = db.execute(
+            update(Debt).where(overdue)
+            .values(status=DebtStatus.OVERDUE, updated_at=func.now())
+            .returning(Debt.company_id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+
+        return alerts, debts
+
+    def _sweep_spending_spikes(self, db: Session, company_ids: List[int], today: date) -> List[int]:
+        """Alertas dos dias recentes com despesa acima da média diária × limite da empresa"""
+        dialect = db.get_bind().dialect.name
+
+        daily = select(
+            DailyLedgerRollup.company_id,
+            DailyLedgerRollup.day,
+            func.sum(DailyLedgerRollup.total_amount).label("total")
+        ).where(
+            DailyLedgerRollup.company_id.in_(company_ids),
+            DailyLedgerRollup.transaction_type == TransactionType.EXPENSE,
+            DailyLedgerRollup.day >= today - timedelta(days=self.window_days),
+            DailyLedgerRollup.day <= today
+        ).group_by(
+            DailyLedgerRollup.company_id, DailyLedgerRollup.day
+        ).having(func.sum(DailyLedgerRollup.total_amount) > 0).cte("daily_expenses")
+
+        averages = select(
+            daily.c.company_id,
+            func.avg(daily.c.total).label("average")
+        ).group_by(daily.c.company_id).cte("average_expenses")
+
+        # Alertas da empresa vão para o primeiro usuário cadastrado
+        owners = select(
+            User.company_id,
+            func.min(User.id).label("user_id")
+        ).where(User.company_id.in_(company_ids)).group_by(User.company_id).cte("company_owners")
+
+        threshold = func.coalesce(AlertSettings.spike_threshold, self.spike_threshold)
+        min_amount = func.coalesce(AlertSettings.spike_min_amount, self.spike_min_amount)
+        percentage_above = (daily.c.total / averages.c.average - 1) * 100
+        day_text = cast(daily.c.day, String)
+        dedupe_key = literal("spending_spike:") + day_text
+
+        candidates = select(
+            literal("Gasto acima da média"),
+            literal("Você gastou R$ ") + self._format_money(dialect, daily.c.total)
+            + literal(" em ") + self._format_day_month(dialect, daily.c.day)
+            + literal(", ") + cast(cast(func.round(percentage_above), Integer), String)
+            + literal("% acima da sua média diária"),
+            literal(AlertType.BUDGET_EXCEEDED, Alert.alert_type.type),
+            literal(2),
+            literal(False, Boolean()),
+            literal(True, Boolean()),
+            self._json_object(
+                dialect,
+                date=day_text, amount=daily.c.total, average=averages.c.average, percentage_above=percentage_above
+            ),
+            dedupe_key,
+            daily.c.company_id,
+            owners.c.user_id
+        ).select_from(
+            daily
+            .join(averages, averages.c.company_id == daily.c.company_id)
+            .join(owners, owners.c.company_id == daily.c.company_id)
+            .outerjoin(AlertSettings, AlertSettings.company_id == daily.c.company_id)
+        ).where(
+            daily.c.day >= today - timedelta(days=self.lookback_days - 1),
+            daily.c.total > averages.c.average * threshold,
+            daily.c.total >= min_amount
+        )
+
+        return self._insert_alerts(db, dialect, candidates)
+
+    @staticmethod
+    def _insert_alerts(db: Session, dialect: str, candidates) -> List[int]:
+        """INSERT ... SELECT dos alertas, ignorando chaves já gravadas; retorna a empresa de cada alerta criado"""
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = dialect_insert(Alert).from_select(
+            ["title", "message", "alert_type", "priority", "is_read", "is_active",
+             "alert_metadata", "dedupe_key", "company_id", "user_id"],
+            candidates
+        ).on_conflict_do_nothing(
+            index_elements=["company_id", "dedupe_key"]
+        ).returning(Alert.company_id)
+        return db.execute(statement).scalars().all()
+
+    # Funções que mudam de nome entre PostgreSQL e SQLite
+
+    @staticmethod
+    def _days_between(dialect: str, later, earlier):
+        if dialect == "postgresql":
+            return cast(extract("day", later - earlier), Integer)
+        return cast(func.julianday(later) - func.julianday(earlier), Integer)
+
+    @staticmethod
+    def _format_money(dialect: str, value):
+        if dialect == "postgresql":
+            return func.to_char(value, "FM999999999990.00")
+        return func.printf("%.2f", value)
+
+    @staticmethod
+    def _format_day_month(dialect: str, value):
+        if dialect == "postgresql":
+            return func.to_char(value, "DD/MM")
+        return func.strftime("%d/%m", value)
+
+    @staticmethod
+    def _json_object(dialect: str, **fields):
+        arguments = [item for name, value in fields.items() for item in (literal(name), value)]
+        if dialect == "postgresql":
+            return func.json_build_object(*arguments)
+        return func.json_object(*arguments)
+
+# Instância global do serviço
+alert_sweeper = AlertSweeperService(
+    interval_seconds=int(os.getenv("ALERT_SWEEP_INTERVAL_SECONDS", "3600")),
+    batch_size=int(os.getenv("ALERT_SWEEP_BATCH_SIZE", "200")),
+    concurrency=int(os.getenv("ALERT_SWEEP_CONCURRENCY", "4")),
+    window_days=int(os.getenv("ALERT_SWEEP_WINDOW_DAYS", "30")),
+    lookback_days=int(os.getenv("ALERT_SWEEP_LOOKBACK_DAYS", "3"))
+)
@@ -0,0 +1,92 @@
+from typing import Dict, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+import os
+import threading
+import time
+
+from models import UserRole
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """Projeção do usuário autenticado usada pelas dependências de autenticação
+
+    Contém apenas o que os routers consultam em `current_user`.
+    """
+    id: int
+    email: str
+    full_name: str
+    company_id: int
+    role: UserRole
+    is_active: bool
+
+class AuthUserCache:
+    """Cache LRU com TTL de token (subject) -> usuário autenticado
+
+    Evita a consulta a `users` em toda requisição autenticada. As entradas
+    expiram após `ttl_seconds`; alterações feitas pelos endpoints de
+    usuários chamam `invalidate` para que valham imediatamente neste
+    processo (em outras instâncias, no máximo após o TTL).
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 60.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, subject: str) -> Optional[AuthenticatedUser]:
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            user, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[subject]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(subject)
+            self.hits += 1
+            return user
+
+    def set(self, subject: str, user: AuthenticatedUser) -> None:
+        with self._lock:
+            self._entries[subject] = (user, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *subjects: str) -> None:
+        """Remove as entradas dos subjects (emails) informados"""
+        with self._lock:
+            for subject in subjects:
+                self._entries.pop(subject, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Contadores de acertos/faltas do cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
+
+# Instância global do serviço
+auth_user_cache = AuthUserCache(
+    max_size=int(os.getenv("AUTH_USER_CACHE_SIZE", "10000")),
+    ttl_seconds=float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "60"))
+)
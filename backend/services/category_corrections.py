@@ -0,0 +1,50 @@
+from typing import Callable, List, NamedTuple, Optional
+
+from models import Transaction, TransactionType
+
+class CategorySample(NamedTuple):
+    """Exemplo de treino: a transação como o usuário a categorizou"""
+    description: str
+    amount: float
+    transaction_type: TransactionType
+    category: str
+
+# listener(company_id, removed, added)
+CorrectionListener = Callable[[int, Optional[CategorySample], Optional[CategorySample]], None]
+
+class CategoryCorrectionService:
+    """Correções manuais de categoria repassadas aos modelos em memória
+
+    As rotas de transações registram aqui cada correção sem importar o
+    categorizador (numpy): services/category_model se inscreve ao ser
+    importado. Num processo que nunca carregou o categorizador não há
+    modelo em memória a atualizar; o primeiro uso treina a partir do
+    banco, que já inclui as correções.
+    """
+
+    def __init__(self):
+        self._listeners: List[CorrectionListener] = []
+
+    def subscribe(self, listener: CorrectionListener) -> None:
+        self._listeners.append(listener)
+
+    def sample_of(self, transaction: Transaction) -> Optional[CategorySample]:
+        """A transação como exemplo de treino, se a categoria foi dada pelo usuário"""
+        if not transaction.category_manual or not transaction.category:
+            return None
+        return CategorySample(
+            transaction.description, float(transaction.amount),
+            transaction.transaction_type, transaction.category
+        )
+
+    def record(self, company_id: int,
+               removed: Optional[CategorySample] = None,
+               added: Optional[CategorySample] = None) -> None:
+        """Repassa uma correção já gravada; `removed` é a versão anterior, `added` a nova"""
+        if removed is None and added is None:
+            return
+        for listener in self._listeners:
+            listener(company_id, removed, added)
+
+# Instância global do serviço
+category_corrections = CategoryCorrectionService()
@@ -0,0 +1,316 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import math
+import os
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models import Transaction, TransactionType
+from services.text_normalization import text_normalizer
+from services.model_artifacts import model_artifacts, ModelArtifact
+from services.category_corrections import category_corrections, CategorySample
+
+# Nome dos artefatos deste modelo no model_artifacts
+ARTIFACT_NAME = "category_model"
+
+class NaiveBayesCategoryModel:
+    """Naive Bayes multinomial por empresa sobre palavras da descrição e faixa de valor
+
+    O estado são apenas contagens: `feature_counts[classe, feature]`
+    (int32) e `class_counts[classe]`, com o vocabulário e as classes em
+    listas paralelas. Somar ou retirar um exemplo é O(features do exemplo),
+    o que permite atualizar o modelo a cada correção do usuário. As
+    log-probabilidades são recalculadas sob demanda após alterações.
+
+    Um modelo aberto de um artefato (`from_artifact`) usa as matrizes
+    mapeadas do disco, somente leitura; a primeira alteração copia as
+    contagens para a memória do processo.
+    """
+
+    def __init__(self, alpha: float = 1.0):
+        self.alpha = alpha
+        self.classes: List[str] = []
+        self.vocabulary: List[str] = []
+        self._class_index: Dict[str, int] = {}
+        self._feature_index: Dict[str, int] = {}
+        self.feature_counts = np.zeros((0, 0), dtype=np.int32)
+        self.class_counts = np.zeros(0, dtype=np.int32)
+        self._lock = threading.Lock()
+        self._log_prior: Optional[np.ndarray] = None
+        self._log_likelihood: Optional[np.ndarray] = None
+
+    @property
+    def n_samples(self) -> int:
+        return int(self.class_counts.sum())
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], dict]:
+        """Matrizes e metadados para gravar como artefato"""
+        log_prior, log_likelihood = self._log_probabilities()
+        arrays = {
+            "feature_counts": self.feature_counts[:, :len(self.vocabulary)],
+            "class_counts": self.class_counts,
+            "log_prior": log_prior,
+            "log_likelihood": log_likelihood
+        }
+        metadata = {"alpha": self.alpha, "classes": self.classes, "vocabulary": self.vocabulary}
+        return arrays, metadata
+
+    @classmethod
+    def from_artifact(cls, artifact: ModelArtifact) -> "NaiveBayesCategoryModel":
+        model = cls(alpha=artifact.metadata["alpha"])
+        model.classes = list(artifact.metadata["classes"])
+        model.vocabulary = list(artifact.metadata["vocabulary"])
+        model._class_index = {category: index for index, category in enumerate(model.classes)}
+        model._feature_index = {feature: index for index, feature in enumerate(model.vocabulary)}
+        model.feature_counts = artifact.arrays["feature_counts"]
+        model.class_counts = artifact.arrays["class_counts"]
+        # Probabilidades já calculadas no treino: a inferência lê direto do mmap
+        model._log_prior = artifact.arrays["log_prior"]
+        model._log_likelihood = artifact.arrays["log_likelihood"]
+        return model
+
+    def add(self, features: Sequence[str], category: str, weight: int = 1) -> None:
+        """Soma (weight=1) ou retira (weight=-1) um exemplo"""
+        with self._lock:
+            class_id = self._class_id(category, create=weight > 0)
+            if class_id is None:
+                return
+
+            feature_ids = [self._feature_id(feature, create=weight > 0) for feature in features]
+            feature_ids = [feature_id for feature_id in feature_ids if feature_id is not None]
+
+            # Contagens mapeadas do artefato são somente leitura: copiar antes de alterar
+            if not self.feature_counts.flags.writeable:
+                self.feature_counts = np.array(self.feature_counts)
+            if not self.class_counts.flags.writeable:
+                self.class_counts = np.array(self.class_counts)
+
+            np.add.at(self.feature_counts[class_id], feature_ids, weight)
+            self.class_counts[class_id] += weight
+            # Retiradas de exemplos que não estavam no modelo não deixam contagens negativas
+            np.maximum(self.feature_counts[class_id], 0, out=self.feature_counts[class_id])
+            self.class_counts[class_id] = max(int(self.class_counts[class_id]), 0)
+
+            self._log_prior = None
+            self._log_likelihood = None
+
+    def predict_many(self, feature_lists: Sequence[Sequence[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Classe mais provável e sua probabilidade a posteriori para cada exemplo"""
+        count = len(feature_lists)
+        if not self.classes or count == 0:
+            return np.full(count, None, dtype=object), np.zeros(count)
+
+        log_prior, log_likelihood = self._log_probabilities()
+        feature_index = self._feature_index
+        known_features = log_likelihood.shape[1]
+
+        # Pares (exemplo, feature conhecida) achatados; features fora do vocabulário são ignoradas
+        rows, feature_ids = [], []
+        for row, features in enumerate(feature_lists):
+            for feature in features:
+                feature_id = feature_index.get(feature)
+                # Features incluídas depois do último cálculo das probabilidades ficam de fora
+                if feature_id is not None and feature_id < known_features:
+                    rows.append(row)
+                    feature_ids.append(feature_id)
+
+        scores = np.tile(log_prior, (count, 1))
+        if feature_ids:
+            rows = np.array(rows, dtype=np.intp)
+            contributions = log_likelihood[:, np.array(feature_ids, dtype=np.intp)]
+            for class_id in range(len(self.classes)):
+                scores[:, class_id] += np.bincount(rows, weights=contributions[class_id], minlength=count)
+
+        best = scores.argmax(axis=1)
+        scores -= scores[np.arange(count), best][:, None]
+        probabilities = np.exp(scores)
+        confidences = 1.0 / probabilities.sum(axis=1)
+
+        return np.array(self.classes, dtype=object)[best], confidences
+
+    def _log_probabilities(self) -> Tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            if self._log_likelihood is None:
+                n_features = len(self.vocabulary)
+                counts = self.feature_counts[:, :n_features].astype(np.float64) + self.alpha
+                self._log_likelihood = np.log(counts) - np.log(counts.sum(axis=1, keepdims=True))
+                class_counts = self.class_counts.astype(np.float64) + self.alpha
+                # Modelo sem classes (empresa sem correções): vetor vazio
+                self._log_prior = np.log(class_counts) - np.log(max(class_counts.sum(), 1.0))
+            return self._log_prior, self._log_likelihood
+
+    def _class_id(self, category: str, create: bool) -> Optional[int]:
+        class_id = self._class_index.get(category)
+        if class_id is None and create:
+            class_id = len(self.classes)
+            self._class_index[category] = class_id
+            self.classes.append(category)
+            self._resize(len(self.classes), self.feature_counts.shape[1])
+            self.class_counts = np.append(self.class_counts, np.int32(0))
+        return class_id
+
+    def _feature_id(self, feature: str, create: bool) -> Optional[int]:
+        feature_id = self._feature_index.get(feature)
+        if feature_id is None and create:
+            feature_id = len(self.vocabulary)
+            self._feature_index[feature] = feature_id
+            self.vocabulary.append(feature)
+            if feature_id >= self.feature_counts.shape[1]:
+                # Crescimento geométrico das colunas: inclusão amortizada O(1)
+                self._resize(self.feature_counts.shape[0], max(64, 2 * self.feature_counts.shape[1]))
+        return feature_id
+
+    def _resize(self, n_classes: int, capacity: int) -> None:
+        resized = np.zeros((n_classes, capacity), dtype=np.int32)
+        rows, columns = self.feature_counts.shape
+        resized[:rows, :columns] = self.feature_counts
+        self.feature_counts = resized
+
+class ModelEntry(NamedTuple):
+    """Modelo em uso por uma empresa, a versão do artefato e quando foi treinado (epoch)"""
+    model: NaiveBayesCategoryModel
+    version: Optional[str]
+    trained_at: float
+
+class CategoryModelService:
+    """Modelos de categorização por empresa treinados com as correções manuais
+
+    O modelo de cada empresa é treinado sob demanda (primeiro uso) a partir
+    das transações com category_manual, fica em memória e recebe cada nova
+    correção de forma incremental. Como outras instâncias da API também
+    recebem correções, o modelo é retreinado do banco após
+    `refresh_seconds`. Enquanto tiver menos de `min_samples` exemplos ou
+    uma única classe, o modelo está "frio" e valem as regras de
+    palavras-chave; depois, a previsão do modelo só substitui a das regras
+    quando a probabilidade é de pelo menos `min_confidence`.
+
+    Cada treino é gravado como uma nova versão em model_artifacts. Um
+    processo sem o modelo em memória (reinício, outro worker) abre o
+    artefato em uso em vez de treinar, e qualquer processo troca o seu
+    modelo quando outro publica uma versão mais nova. As correções
+    incrementais ficam só na memória do processo até o próximo treino.
+    """
+
+    def __init__(self, min_samples: int = 20, min_confidence: float = 0.6,
+                 refresh_seconds: float = 600.0, alpha: float = 1.0):
+        self.min_samples = min_samples
+        self.min_confidence = min_confidence
+        self.refresh_seconds = refresh_seconds
+        self.alpha = alpha
+        self._models: Dict[int, ModelEntry] = {}
+        self._lock = threading.Lock()
+
+    def features(self, description: str, amount, transaction_type: TransactionType) -> List[str]:
+        """Palavras da descrição normalizada, faixa de valor (log2) e tipo"""
+        tokens = list(text_normalizer.normalize(description).tokens)
+        # Prefixos fora do alfabeto da descrição limpa: sem colisão com palavras
+        tokens.append(f"$valor:{int(math.log2(abs(float(amount)) + 1))}")
+        tokens.append(f"$tipo:{transaction_type.name if transaction_type else ''}")
+        return tokens
+
+    def is_warm(self, model: Optional[NaiveBayesCategoryModel]) -> bool:
+        return model is not None and model.n_samples >= self.min_samples and len(model.classes) >= 2
+
+    def model_for(self, db: Session, company_id: int) -> NaiveBayesCategoryModel:
+        """Modelo da empresa: em memória, do artefato em uso ou treinado agora (se expirado)"""
+        with self._lock:
+            entry = self._models.get(company_id)
+
+        # Versão mais nova publicada por outro processo (ou primeira carga): troca
+        current = model_artifacts.current_version(ARTIFACT_NAME, company_id)
+        if current is not None and (entry is None or current > (entry.version or "")):
+            artifact = model_artifacts.load(ARTIFACT_NAME, company_id, current)
+            if artifact is not None:
+                entry = self._install(company_id, ModelEntry(
+                    NaiveBayesCategoryModel.from_artifact(artifact),
+                    artifact.version,
+                    model_artifacts.version_time(artifact.version)
+                ))
+
+        if entry and time.time() - entry.trained_at < self.refresh_seconds:
+            return entry.model
+        return self.train(db, company_id)
+
+    def train(self, db: Session, company_id: int) -> NaiveBayesCategoryModel:
+        """Treina do zero com as correções manuais da empresa, publica o artefato e troca o modelo em uso"""
+        model = self.fit(self.load_samples(db, company_id))
+        arrays, metadata = model.to_arrays()
+        version = model_artifacts.save(ARTIFACT_NAME, company_id, arrays, metadata)
+        return self._install(company_id, ModelEntry(model, version, time.time())).model
+
+    def _install(self, company_id: int, entry: ModelEntry) -> ModelEntry:
+        """Troca o modelo em uso, a não ser que já haja uma versão mais nova instalada"""
+        with self._lock:
+            installed = self._models.get(company_id)
+            if installed is not None and entry.version and (installed.version or "") > entry.version:
+                return installed
+            self._models[company_id] = entry
+            return entry
+
+    def fit(self, samples: Sequence[CategorySample]) -> NaiveBayesCategoryModel:
+        model = NaiveBayesCategoryModel(alpha=self.alpha)
+        for sample in samples:
+            model.add(self.features(sample.description, sample.amount, sample.transaction_type), sample.category)
+        return model
+
+    def load_samples(self, db: Session, company_id: int) -> List[CategorySample]:
+        rows = db.execute(
+            select(
+                Transaction.description, Transaction.amount,
+                Transaction.transaction_type, Transaction.category
+            ).where(
+                Transaction.company_id == company_id,
+                Transaction.category_manual == True,
+                Transaction.category.isnot(None)
+            ).order_by(Transaction.id)
+        ).all()
+        return [CategorySample(row.description, float(row.amount), row.transaction_type, row.category) for row in rows]
+
+    def record_correction(self, company_id: int,
+                          removed: Optional[CategorySample] = None,
+                          added: Optional[CategorySample] = None) -> None:
+        """Atualiza o modelo em memória após uma correção já gravada (via category_corrections)
+
+        `removed` é a versão anterior da transação, se ela já era um exemplo
+        manual; `added`, a nova. Sem modelo carregado não há o que fazer: o
+        próximo uso treina a partir do banco, que já inclui a correção.
+        """
+        with self._lock:
+            entry = self._models.get(company_id)
+        if entry is None:
+            return
+
+        model = entry.model
+        if removed is not None:
+            model.add(self.features(removed.description, removed.amount, removed.transaction_type), removed.category, -1)
+        if added is not None:
+            model.add(self.features(added.description, added.amount, added.transaction_type), added.category)
+
+    def blend(self, model: Optional[NaiveBayesCategoryModel], feature_lists: Sequence[Sequence[str]],
+              labels: np.ndarray, confidences: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Substitui as previsões das regras pelas do modelo onde ele está confiante"""
+        if not self.is_warm(model) or len(feature_lists) == 0:
+            return labels, confidences
+
+        model_labels, model_confidences = model.predict_many(feature_lists)
+        use_model = model_confidences >= self.min_confidence
+        return (
+            np.where(use_model, model_labels, np.asarray(labels, dtype=object)),
+            np.where(use_model, model_confidences, np.asarray(confidences, dtype=float))
+        )
+
+    def forget(self, company_id: int) -> None:
+        with self._lock:
+            self._models.pop(company_id, None)
+
+# Instância global do serviço
+category_model_service = CategoryModelService(
+    min_samples=int(os.getenv("CATEGORY_MODEL_MIN_SAMPLES", "20")),
+    min_confidence=float(os.getenv("CATEGORY_MODEL_MIN_CONFIDENCE", "0.6")),
+    refresh_seconds=float(os.getenv("CATEGORY_MODEL_REFRESH_SECONDS", "600"))
+)
+
+# Correções gravadas pelas rotas de transações chegam ao modelo em memória
+category_corrections.subscribe(category_model_service.record_correction)
@@ -0,0 +1,222 @@
+from typing import Dict, List, Optional
+from decimal import Decimal
+from datetime import datetime, date, timedelta
+
+from sqlalchemy import func, and_, case, select, union_all
+from sqlalchemy.orm import Session
+from models import Transaction, TransactionType
+
+class DashboardAggregationService:
+    """Agregações do painel consolidado usando poucas consultas agrupadas"""
+
+    def account_activity(self, db: Session, transaction_filters: List,
+                         start_date: datetime) -> Dict[int, int]:
+        """Conta transações por conta no período (uma única consulta)
+
+        Transferências contam para a conta de origem e para a de destino.
+        """
+
+        from_accounts = select(
+            Transaction.from_account_id.label("account_id")
+        ).where(
+            Transaction.from_account_id.isnot(None),
+            Transaction.transaction_date >= start_date,
+            *transaction_filters
+        )
+
+        to_accounts = select(
+            Transaction.to_account_id.label("account_id")
+        ).where(
+            Transaction.to_account_id.isnot(None),
+            Transaction.transaction_date >= start_date,
+            *transaction_filters
+        )
+
+        movements = union_all(from_accounts, to_accounts).subquery()
+
+        rows = db.execute(
+            select(movements.c.account_id, func.count().label("total"))
+            .group_by(movements.c.account_id)
+        ).all()
+
+        return {account_id: total for account_id, total in rows}
+
+    def period_totals(self, db: Session, transaction_filters: List,
+                      start_date: datetime, previous_start: datetime) -> Dict[str, Decimal]:
+        """Receitas e despesas do período atual e do anterior (uma única consulta)"""
+
+        is_current = Transaction.transaction_date >= start_date
+        is_income = Transaction.transaction_type == TransactionType.INCOME
+        is_expense = Transaction.transaction_type == TransactionType.EXPENSE
+
+        row = db.query(
+            func.sum(case((and_(is_income, is_current), Transaction.amount), else_=0)),
+            func.sum(case((and_(is_expense, is_current), Transaction.amount), else_=0)),
+            func.sum(case((and_(is_income, ~is_current), Transaction.amount), else_=0)),
+            func.sum(case((and_(is_expense, ~is_current), Transaction.amount), else_=0))
+        ).filter(
+            and_(
+                Transaction.transaction_date >= previous_start,
+                *transaction_filters
+            )
+        ).one()
+
+        income, expense, previous_income, previous_expense = (
+            Decimal(str(value)) if value is not None else Decimal('0') for value in row
+        )
+
+        return {
+            "income": income,
+            "expense": expense,
+            "previous_income": previous_income,
+            "previous_expense": previous_expense
+        }
+
+    def category_expenses(self, db: Session, transaction_filters: List,
+                          start_date: datetime, limit: int = 10) -> List[tuple]:
+        """Maiores categorias de despesa do período"""
+
+        return db.query(
+            Transaction.category,
+            func.sum(Transaction.amount).label('total')
+        ).filter(
+            and_(
+                Transaction.transaction_type == TransactionType.EXPENSE,
+                Transaction.transaction_date >= start_date,
+                Transaction.category.isnot(None),
+                *transaction_filters
+            )
+        ).group_by(Transaction.category).order_by(func.sum(Transaction.amount).desc()).limit(limit).all()
+
+    def daily_cash_flow(self, db: Session, transaction_filters: List,
+                        end_date: datetime, days: int = 7) -> List[Dict]:
+        """Fluxo de caixa diário dos últimos dias (uma única consulta agrupada por dia)"""
+
+        window_start = (end_date - timedelta(days=days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        window_end = end_date.replace(hour=23, minute=59, second=59, microsecond=999999)
+
+        day_bucket = self._day_bucket(db, Transaction.transaction_date)
+
+        rows = db.query(
+            day_bucket.label("day"),
+            Transaction.transaction_type,
+            func.sum(Transaction.amount)
+        ).filter(
+            and_(
+                Transaction.transaction_type.in_([TransactionType.INCOME, TransactionType.EXPENSE]),
+                Transaction.transaction_date >= window_start,
+                Transaction.transaction_date <= window_end,
+                *transaction_filters
+            )
+        ).group_by(day_bucket, Transaction.transaction_type).all()
+
+        totals = {}
+        for day, transaction_type, total in rows:
+            key = (self._as_date(day), transaction_type)
+            totals[key] = Decimal(str(total)) if total is not None else Decimal('0')
+
+        cash_flow_data = []
+        for i in range(days - 1, -1, -1):  # Ordem cronológica
+            day = (end_date - timedelta(days=i)).date()
+            day_income = totals.get((day, TransactionType.INCOME), Decimal('0'))
+            day_expense = totals.get((day, TransactionType.EXPENSE), Decimal('0'))
+
+            cash_flow_data.append({
+                "date": day.strftime("%Y-%m-%d"),
+                "income": float(day_income),
+                "expense": float(abs(day_expense)),
+                "net": float(day_income - abs(day_expense))
+            })
+
+        return cash_flow_data
+
+    def account_monthly_stats(self, db: Session, company_id: int,
+                              start_date: datetime) -> Dict[int, Dict]:
+        """Receitas, despesas e quantidade de transações por conta no período (uma consulta)
+
+        Receitas contam para a conta de destino, despesas para a de origem;
+        transferências entram na quantidade das duas contas.
+        """
+        movements = self._account_movements(company_id, start_date).subquery()
+
+        rows = db.execute(
+            select(
+                movements.c.account_id,
+                func.sum(case((movements.c.transaction_type == TransactionType.INCOME, movements.c.amount), else_=0)),
+                func.sum(case((movements.c.transaction_type == TransactionType.EXPENSE, movements.c.amount), else_=0)),
+                func.count()
+            ).group_by(movements.c.account_id)
+        ).all()
+
+        return {
+            account_id: {
+                "income": Decimal(str(income or 0)),
+                "expense": Decimal(str(expense or 0)),
+                "count": count
+            }
+            for account_id, income, expense, count in rows
+        }
+
+    def recent_transactions_by_account(self, db: Session, company_id: int,
+                                       limit: int = 5) -> Dict[int, List[Transaction]]:
+        """Últimas `limit` transações de cada conta (uma consulta com ROW_NUMBER)"""
+        movements = self._account_movements(company_id).subquery()
+
+        ranked = select(
+            movements.c.account_id,
+            movements.c.transaction_id,
+            func.row_number().over(
+                partition_by=movements.c.account_id,
+                order_by=(movements.c.transaction_date.desc(), movements.c.transaction_id.desc())
+            ).label("position")
+        ).subquery()
+
+        rows = db.execute(
+            select(ranked.c.account_id, Transaction)
+            .join(Transaction, Transaction.id == ranked.c.transaction_id)
+            .where(ranked.c.position <= limit)
+            .order_by(ranked.c.account_id, ranked.c.position)
+        ).all()
+
+        recent = {}
+        for account_id, transaction in rows:
+            recent.setdefault(account_id, []).append(transaction)
+        return recent
+
+    def _account_movements(self, company_id: int, start_date: Optional[datetime] = None):
+        """Transações da empresa vistas por conta (origem e destino) via UNION ALL"""
+        filters = [Transaction.company_id == company_id]
+        if start_date is not None:
+            filters.append(Transaction.transaction_date >= start_date)
+
+        sides = []
+        for account_column in (Transaction.from_account_id, Transaction.to_account_id):
+            sides.append(
+                select(
+                    account_column.label("account_id"),
+                    Transaction.id.label("transaction_id"),
+                    Transaction.transaction_type.label("transaction_type"),
+                    Transaction.amount.label("amount"),
+                    Transaction.transaction_date.label("transaction_date")
+                ).where(account_column.isnot(None), *filters)
+            )
+        return union_all(*sides)
+
+    def _day_bucket(self, db: Session, column):
+        """Trunca a data para o dia conforme o banco em uso"""
+        if db.get_bind().dialect.name == "postgresql":
+            return func.date_trunc('day', column)
+        return func.date(column)
+
+    def _as_date(self, value) -> Optional[date]:
+        """Normaliza o valor retornado pelo agrupamento por dia"""
+        if value is None:
+            return None
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+# Instância global do serviço
+dashboard_aggregator = DashboardAggregationService()
@@ -0,0 +1,109 @@
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+import asyncio
+import logging
+import os
+import time
+import weakref
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from database import AsyncSessionLocal, async_engine
+
+logger = logging.getLogger(__name__)
+
+class DashboardSection(NamedTuple):
+    """Seção independente do painel: função de carga e valor padrão em caso de falha"""
+    loader: Callable[[AsyncSession], Awaitable[Any]]
+    fallback: Callable[[], Any]
+
+def pool_capacity(engine: AsyncEngine) -> Optional[int]:
+    """Máximo de conexões do pool (tamanho + overflow); None se o pool não limita (NullPool)"""
+    pool = engine.pool
+    if not hasattr(pool, "size") or not hasattr(pool, "_max_overflow"):
+        return None
+    return pool.size() + max(pool._max_overflow, 0)
+
+class DashboardComposer:
+    """Carrega as seções do painel em paralelo, cada uma na sua conexão do pool
+
+    Cada seção abre a própria AsyncSession (sessões não podem ser usadas
+    por duas corrotinas ao mesmo tempo) e tem `section_timeout` segundos
+    para terminar depois de obter a conexão; a espera pelo pool não conta
+    no prazo. Se falhar ou estourar o tempo, entra o valor padrão e o nome
+    da seção é devolvido na lista de seções indisponíveis. O tempo total
+    fica próximo ao da seção mais lenta.
+
+    As conexões vêm do mesmo pool que atende as outras rotas: somando
+    todas as requisições do processo, os painéis usam no máximo
+    `max_connections` (a fração `pool_share` da capacidade do pool), e uma
+    única requisição no máximo `max_concurrency`. Painéis simultâneos
+    esperam a vez em vez de esgotar o pool.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal, section_timeout: float = 5.0,
+                 max_concurrency: Optional[int] = None, pool_capacity: Optional[int] = None,
+                 pool_share: float = 0.5):
+        self.session_factory = session_factory
+        self.section_timeout = section_timeout
+        # Pool sem limite (NullPool, SQLite): vale só o limite por requisição
+        self.max_connections = max(1, int(pool_capacity * pool_share)) if pool_capacity else None
+        limits = [limit for limit in (max_concurrency, self.max_connections) if limit]
+        self.max_concurrency = min(limits) if limits else 8
+        # Um semáforo compartilhado por event loop (semáforos não mudam de loop)
+        self._shared: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _shared_semaphore(self) -> Optional[asyncio.Semaphore]:
+        if self.max_connections is None:
+            return None
+        loop = asyncio.get_running_loop()
+        semaphore = self._shared.get(loop)
+        if semaphore is None:
+            semaphore = self._shared[loop] = asyncio.Semaphore(self.max_connections)
+        return semaphore
+
+    async def compose(self, sections: Dict[str, DashboardSection]) -> Tuple[Dict[str, Any], List[str]]:
+        """Executa as seções e retorna (resultados por nome, seções indisponíveis)"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        shared = self._shared_semaphore()
+        unavailable = []
+
+        async def load(section: DashboardSection):
+            async with semaphore:
+                if shared is None:
+                    return await self._load_section(section)
+                async with shared:
+                    return await self._load_section(section)
+
+        async def run(name: str, section: DashboardSection):
+            started_at = time.perf_counter()
+            try:
+                return await load(section)
+            except asyncio.TimeoutError:
+                logger.warning(f"Seção '{name}' do painel excedeu {self.section_timeout}s")
+            except Exception as e:
+                logger.error(f"Erro na seção '{name}' do painel: {str(e)}")
+            finally:
+                logger.debug(f"Seção '{name}' do painel em {time.perf_counter() - started_at:.3f}s")
+
+            unavailable.append(name)
+            return section.fallback()
+
+        names = list(sections)
+        results = await asyncio.gather(*(run(name, sections[name]) for name in names))
+        return dict(zip(names, results)), sorted(unavailable)
+
+    async def _load_section(self, section: DashboardSection) -> Any:
+        async with self.session_factory() as db:
+            # O prazo começa com a conexão em mãos (a espera pelo pool tem o pool_timeout)
+            await db.connection()
+            return await asyncio.wait_for(section.loader(db), self.section_timeout)
+
+# Instância global do serviço
+dashboard_composer = DashboardComposer(
+    section_timeout=float(os.getenv("DASHBOARD_SECTION_TIMEOUT_SECONDS", "5")),
+    max_concurrency=int(os.getenv("DASHBOARD_SECTION_CONCURRENCY", "0")) or None,
+    pool_capacity=pool_capacity(async_engine),
+    pool_share=float(os.getenv("DASHBOARD_POOL_SHARE", "0.5"))
+)
@@ -0,0 +1,282 @@
+from typing import Any, Callable, Dict, Optional
+from datetime import datetime, timedelta, timezone
+import importlib
+import logging
+import os
+import socket
+import threading
+import time
+
+from fastapi import BackgroundTasks
+from sqlalchemy import and_, case, or_, select, update
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models import Job, JobStatus, User
+from services.query_instrumentation import query_instrumentation
+from services.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+# Módulo que registra o handler de cada tipo de job; importado sob demanda,
+# já que com routers carregados sob demanda (services/startup.py) ele pode
+# ainda não ter sido importado quando o job é executado
+JOB_HANDLER_MODULES: Dict[str, str] = {
+    "bank_import": "routers.bank_import",
+    "categorize_all": "routers.bank_import",
+    "categorize_automatic": "routers.bank_import",
+    "classify_personal_business": "routers.bank_import",
+    "check_overdue_debts": "routers.debts",
+}
+
+# handler(db, job, context) -> resultado (dict) quando termina, None quando parou no prazo
+JobHandler = Callable[[Session, Job, "JobContext"], Optional[Dict[str, Any]]]
+
+class JobLeaseLost(Exception):
+    """Outro worker assumiu o job (lease expirado); o bloco atual é descartado"""
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+class JobContext:
+    """Execução de um job por um worker: cursor salvo, prazo e checkpoints
+
+    O handler processa um bloco, chama `checkpoint` com o novo cursor (que
+    faz o commit do bloco junto com o cursor e renova o lease) e consulta
+    `should_stop` antes do próximo bloco.
+    """
+
+    def __init__(self, service: "JobQueueService", db: Session, job: Job,
+                 worker_id: str, deadline: Optional[float]):
+        self.service = service
+        self.db = db
+        self.job_id = job.id
+        self.company_id = job.company_id
+        self.worker_id = worker_id
+        self.deadline = deadline
+        self.cursor: Dict[str, Any] = dict(job.cursor or {})
+
+    def should_stop(self) -> bool:
+        """Prazo esgotado ou worker encerrando: parar antes do próximo bloco"""
+        if self.service.stopping.is_set():
+            return True
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def checkpoint(self, cursor: Dict[str, Any], progress_current: Optional[int] = None,
+                   progress_total: Optional[int] = None) -> None:
+        """Grava o cursor (e o progresso) e faz o commit do bloco processado"""
+        values = {
+            "cursor": cursor,
+            "locked_until": utcnow() + timedelta(seconds=self.service.lease_seconds)
+        }
+        if progress_current is not None:
+            values["progress_current"] = progress_current
+        if progress_total is not None:
+            values["progress_total"] = progress_total
+
+        result = self.db.execute(
+            update(Job)
+            .where(Job.id == self.job_id, Job.locked_by == self.worker_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            self.db.rollback()
+            raise JobLeaseLost(f"Job {self.job_id} assumido por outro worker")
+
+        self.db.commit()
+        self.cursor = cursor
+        response_cache.bump_tenant_version(self.company_id)
+
+class JobQueueService:
+    """Fila de jobs no próprio banco, sem broker externo
+
+    `submit` grava o job (QUEUED) e o endpoint responde na hora com o id. Um
+    worker reserva o job com um UPDATE condicional (compare-and-set sobre o
+    status e o lease), então vários workers podem consultar a mesma tabela.
+    Os handlers processam em blocos e gravam o cursor a cada bloco: um job
+    interrompido (prazo da função serverless, deploy, queda do worker) é
+    retomado do último bloco confirmado, por outro worker ou na próxima
+    rodada. Falhas voltam para a fila com espera crescente até
+    `max_attempts`.
+
+    Quem executa: o processo `worker.py` (pool de processos), a rota
+    /jobs/run-pending (cron) e, opcionalmente, a própria requisição que
+    criou o job, em background e com prazo de `inline_budget_seconds`.
+    """
+
+    def __init__(self, lease_seconds: float = 120.0, max_attempts: int = 3,
+                 retry_delay_seconds: float = 30.0, inline_budget_seconds: float = 20.0):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay_seconds = retry_delay_seconds
+        self.inline_budget_seconds = inline_budget_seconds
+        self._handlers: Dict[str, JobHandler] = {}
+        # Sinalizado pelo worker ao encerrar: jobs em execução param no próximo checkpoint
+        self.stopping = threading.Event()
+
+    def handler(self, job_type: str) -> Callable[[JobHandler], JobHandler]:
+        """Decorador que registra o handler de um tipo de job"""
+        def register(function: JobHandler) -> JobHandler:
+            self._handlers[job_type] = function
+            return function
+        return register
+
+    def handler_for(self, job_type: str) -> Optional[JobHandler]:
+        """Handler do tipo de job, importando o módulo que o registra se preciso"""
+        if job_type not in self._handlers and job_type in JOB_HANDLER_MODULES:
+            importlib.import_module(JOB_HANDLER_MODULES[job_type])
+        return self._handlers.get(job_type)
+
+    def submit(self, db: Session, user: User, job_type: str,
+               payload: Optional[Dict[str, Any]] = None, input_data: Optional[str] = None) -> Job:
+        if self.handler_for(job_type) is None:
+            raise ValueError(f"Tipo de job desconhecido: {job_type}")
+
+        job = Job(
+            job_type=job_type,
+            status=JobStatus.QUEUED,
+            payload=payload or {},
+            input_data=input_data,
+            progress_current=0,
+            attempts=0,
+            max_attempts=self.max_attempts,
+            scheduled_at=utcnow(),
+            company_id=user.company_id,
+            user_id=user.id
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def get(self, db: Session, company_id: int, job_id: int) -> Optional[Job]:
+        return db.scalar(select(Job).where(Job.id == job_id, Job.company_id == company_id))
+
+    def start_in_background(self, background_tasks: BackgroundTasks, job_id: int) -> None:
+        """Começa a executar o job logo após a resposta (se habilitado)"""
+        if self.inline_budget_seconds > 0:
+            background_tasks.add_task(self._run_inline, job_id)
+
+    def _run_inline(self, job_id: int) -> None:
+        # Roda no contexto da requisição que criou o job: as consultas do job
+        # ficam fora do orçamento da rota (QueryInstrumentationMiddleware)
+        with query_instrumentation.untracked():
+            self.run_pending(self.inline_budget_seconds, job_id)
+
+    def run_pending(self, budget_seconds: Optional[float] = None, job_id: Optional[int] = None) -> int:
+        """Executa jobs disponíveis até acabarem ou o prazo esgotar; retorna quantos executou"""
+        deadline = time.monotonic() + budget_seconds if budget_seconds else None
+        executed = 0
+        while deadline is None or time.monotonic() < deadline:
+            if not self.run_next(deadline, job_id):
+                break
+            executed += 1
+            if job_id is not None:
+                break
+        return executed
+
+    def run_next(self, deadline: Optional[float] = None, job_id: Optional[int] = None) -> bool:
+        """Reserva e executa um job; False se não havia job disponível"""
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        db = SessionLocal()
+        try:
+            job = self.claim(db, worker_id, job_id)
+            if job is None:
+                return False
+            self._execute(db, job, worker_id, deadline)
+            return True
+        finally:
+            db.close()
+
+    def claim(self, db: Session, worker_id: str, job_id: Optional[int] = None) -> Optional[Job]:
+        """Reserva o próximo job disponível: na fila, ou em execução com lease expirado"""
+        now = utcnow()
+        expired = and_(Job.status == JobStatus.RUNNING, Job.locked_until < now)
+
+        # Lease expirado sem tentativas restantes: o worker caiu vezes demais
+        db.execute(
+            update(Job)
+            .where(expired, Job.attempts + 1 >= Job.max_attempts)
+            .values(status=JobStatus.FAILED, error="Execução interrompida (lease expirado)",
+                    finished_at=now, locked_by=None, locked_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+        claimable = or_(
+            and_(Job.status == JobStatus.QUEUED, Job.scheduled_at <= now),
+            expired
+        )
+        query = select(Job.id).where(claimable).order_by(Job.scheduled_at, Job.id).limit(10)
+        if job_id is not None:
+            query = query.where(Job.id == job_id)
+
+        for candidate in db.scalars(query).all():
+            result = db.execute(
+                update(Job)
+                .where(Job.id == candidate, claimable)
+                .values(
+                    status=JobStatus.RUNNING,
+                    locked_by=worker_id,
+                    locked_until=now + timedelta(seconds=self.lease_seconds),
+                    # Retomar um job cujo worker caiu conta como tentativa falha
+                    attempts=case((Job.status == JobStatus.RUNNING, Job.attempts + 1), else_=Job.attempts),
+                    started_at=case((Job.started_at.is_(None), now), else_=Job.started_at)
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            if result.rowcount == 1:
+                return db.get(Job, candidate, populate_existing=True)
+
+        return None
+
+    def _execute(self, db: Session, job: Job, worker_id: str, deadline: Optional[float]) -> None:
+        context = JobContext(self, db, job, worker_id, deadline)
+
+        try:
+            handler = self.handler_for(job.job_type)
+            if handler is None:
+                raise ValueError(f"Tipo de job desconhecido: {job.job_type}")
+            result = handler(db, job, context)
+        except JobLeaseLost as error:
+            logger.warning(str(error))
+            return
+        except Exception as error:
+            db.rollback()
+            logger.warning(f"Erro no job {job.id} ({job.job_type}): {str(error)}")
+            attempts = job.attempts + 1
+            if attempts < job.max_attempts:
+                # Volta para a fila e retoma do último cursor gravado
+                delay = self.retry_delay_seconds * 2 ** (attempts - 1)
+                self._release(db, job.id, worker_id, status=JobStatus.QUEUED, attempts=attempts,
+                              error=str(error), scheduled_at=utcnow() + timedelta(seconds=delay))
+            else:
+                self._release(db, job.id, worker_id, status=JobStatus.FAILED, attempts=attempts,
+                              error=str(error), finished_at=utcnow())
+            return
+
+        if result is None:
+            # Prazo esgotado: devolve para a fila, a próxima execução continua do cursor
+            self._release(db, job.id, worker_id, status=JobStatus.QUEUED)
+        else:
+            self._release(db, job.id, worker_id, status=JobStatus.SUCCEEDED, result=result,
+                          error=None, input_data=None, finished_at=utcnow())
+
+    @staticmethod
+    def _release(db: Session, job_id: int, worker_id: str, **values) -> None:
+        db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.locked_by == worker_id)
+            .values(locked_by=None, locked_until=None, **values)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+# Instância global do serviço
+job_queue = JobQueueService(
+    lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", "120")),
+    max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+    retry_delay_seconds=float(os.getenv("JOB_RETRY_DELAY_SECONDS", "30")),
+    inline_budget_seconds=float(os.getenv("JOB_INLINE_BUDGET_SECONDS", "20"))
+)
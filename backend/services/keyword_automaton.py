@@ -0,0 +1,155 @@
+from typing import Dict, List, Set
+from collections import deque
+
+class KeywordAutomaton:
+    """Autômato Aho–Corasick para pontuar palavras-chave por categoria
+
+    Reproduz exatamente a pontuação de `_calculate_keyword_score`:
+    para cada palavra-chave da categoria, soma `exact_weight` se ela aparece
+    na descrição e `word_weight` para cada palavra da descrição que contém a
+    palavra-chave ou está contida nela; o total é limitado a 1.0.
+
+    As ocorrências são encontradas numa única passada pela descrição; o caso
+    "palavra contida na palavra-chave" é resolvido por um índice de
+    substrings das palavras-chave montado na compilação.
+    """
+
+    def __init__(self, category_keywords: Dict[str, List[str]],
+                 exact_weight: float = 0.8, word_weight: float = 0.3):
+        self.exact_weight = exact_weight
+        self.word_weight = word_weight
+        self.categories = list(category_keywords.keys())
+
+        # Palavras-chave únicas e as categorias em que aparecem (com repetição)
+        self.patterns: List[str] = []
+        self.pattern_categories: List[List[int]] = []
+        pattern_ids: Dict[str, int] = {}
+
+        for category_index, keywords in enumerate(category_keywords.values()):
+            for keyword in keywords:
+                keyword_lower = keyword.lower()
+                if keyword_lower not in pattern_ids:
+                    pattern_ids[keyword_lower] = len(self.patterns)
+                    self.patterns.append(keyword_lower)
+                    self.pattern_categories.append([])
+                self.pattern_categories[pattern_ids[keyword_lower]].append(category_index)
+
+        self._lengths = [len(pattern) for pattern in self.patterns]
+        self._build_automaton()
+        self._build_substring_index()
+
+    def _build_automaton(self):
+        """Monta a trie com links de falha (Aho–Corasick)"""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(pattern_id)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                if self._fail[next_state] == next_state:
+                    self._fail[next_state] = 0
+
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+        # Transições completas (DFA): cada caractere custa uma única consulta
+        self._delta: List[Dict[str, int]] = [dict(self._goto[0])] + [None] * (len(self._goto) - 1)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            transitions = dict(self._delta[self._fail[state]])
+            transitions.update(self._goto[state])
+            self._delta[state] = transitions
+            queue.extend(self._goto[state].values())
+
+    def _build_substring_index(self):
+        """Índice substring -> palavras-chave que a contêm"""
+        index: Dict[str, Set[int]] = {}
+        for pattern_id, pattern in enumerate(self.patterns):
+            for start in range(len(pattern)):
+                for end in range(start + 1, len(pattern) + 1):
+                    index.setdefault(pattern[start:end], set()).add(pattern_id)
+        self._substring_index = {key: frozenset(value) for key, value in index.items()}
+
+    def scores(self, description: str) -> Dict[str, float]:
+        """Scores por categoria (apenas > 0, na ordem das categorias)
+
+        `description` deve estar normalizada (minúsculas, palavras separadas
+        por um único espaço), como em `_clean_description`.
+        """
+        if not description:
+            return {}
+
+        words = description.split()
+        word_hits: List[Set[int]] = [set() for _ in words]
+        present: Set[int] = set()
+
+        # Passada única pelo autômato
+        delta, output, lengths = self._delta, self._output, self._lengths
+        state = 0
+        for position, char in enumerate(description):
+            state = delta[state].get(char, 0)
+
+            for pattern_id in output[state]:
+                present.add(pattern_id)
+                start = position - lengths[pattern_id] + 1
+                # Ocorrência dentro de uma única palavra
+                if " " not in description[start:position]:
+                    word_hits[description.count(" ", 0, start)].add(pattern_id)
+
+        exact_counts: Dict[int, int] = {}
+        word_counts: Dict[int, int] = {}
+        pattern_categories = self.pattern_categories
+
+        for pattern_id in present:
+            for category_index in pattern_categories[pattern_id]:
+                exact_counts[category_index] = exact_counts.get(category_index, 0) + 1
+
+        substring_index = self._substring_index
+        for word, hits in zip(words, word_hits):
+            contained_in = substring_index.get(word)
+            if contained_in:
+                hits = hits | contained_in
+            for pattern_id in hits:
+                for category_index in pattern_categories[pattern_id]:
+                    word_counts[category_index] = word_counts.get(category_index, 0) + 1
+
+        result = {}
+        for category_index, category in enumerate(self.categories):
+            exact_count = exact_counts.get(category_index, 0)
+            word_count = word_counts.get(category_index, 0)
+            if not exact_count and not word_count:
+                continue
+
+            score = 0.0
+            for _ in range(exact_count):
+                score += self.exact_weight
+            for _ in range(word_count):
+                if score >= 1.0:
+                    break
+                score += self.word_weight
+            score = min(score, 1.0)
+            if score > 0:
+                result[category] = score
+
+        return result
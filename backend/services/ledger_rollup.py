@@ -0,0 +1,233 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from decimal import Decimal
+from datetime import datetime, date
+from collections import defaultdict
+from types import SimpleNamespace
+
+from sqlalchemy import func, and_, case, select, insert, update, bindparam
+from sqlalchemy.orm import Session
+from models import Transaction, TransactionType, DailyLedgerRollup
+
+# Chave do agregado: (company_id, day, transaction_type, category, is_personal, account_id)
+RollupKey = Tuple[int, date, TransactionType, Optional[str], Optional[bool], Optional[int]]
+
+class LedgerRollupService:
+    """Mantém e consulta o agregado diário de lançamentos (daily_ledger_rollup)"""
+
+    GROUP_COLUMNS = {
+        "day": DailyLedgerRollup.day,
+        "transaction_type": DailyLedgerRollup.transaction_type,
+        "category": DailyLedgerRollup.category,
+        "is_personal": DailyLedgerRollup.is_personal,
+        "account_id": DailyLedgerRollup.account_id
+    }
+
+    def key_for(self, transaction: Transaction) -> RollupKey:
+        """Chave do agregado para uma transação
+
+        Receitas são atribuídas à conta de destino; despesas e transferências
+        à conta de origem.
+        """
+        if transaction.transaction_type == TransactionType.INCOME:
+            account_id = transaction.to_account_id
+        else:
+            account_id = transaction.from_account_id
+
+        return (
+            transaction.company_id,
+            self._as_day(transaction.transaction_date),
+            transaction.transaction_type,
+            transaction.category,
+            transaction.is_personal,
+            account_id
+        )
+
+    def snapshot(self, transaction: Transaction) -> Tuple[RollupKey, Decimal]:
+        """Captura chave e valor atuais (usar antes de alterar a transação)"""
+        return self.key_for(transaction), Decimal(str(transaction.amount))
+
+    def record(self, db: Session, transactions: Iterable[Transaction]) -> None:
+        """Soma novas transações ao agregado"""
+        self.apply(db, [(*self.snapshot(t), 1) for t in transactions])
+
+    def record_rows(self, db: Session, rows: Iterable[Dict]) -> None:
+        """Soma ao agregado linhas inseridas em lote (dicionários com as colunas de Transaction)"""
+        self.record(db, (SimpleNamespace(**row) for row in rows))
+
+    def discard(self, db: Session, transactions: Iterable[Transaction]) -> None:
+        """Remove transações excluídas do agregado"""
+        self.apply(db, [(key, -amount, -1) for key, amount in map(self.snapshot, transactions)])
+
+    def replace(self, db: Session, before: Tuple[RollupKey, Decimal], transaction: Transaction) -> None:
+        """Move uma transação alterada da chave antiga para a nova"""
+        old_key, old_amount = before
+        new_key, new_amount = self.snapshot(transaction)
+        self.apply(db, [(old_key, -old_amount, -1), (new_key, new_amount, 1)])
+
+    def apply(self, db: Session, changes: Iterable[Tuple[RollupKey, Decimal, int]]) -> None:
+        """Aplica deltas (chave, valor, quantidade) ao agregado
+
+        Os deltas são consolidados por chave e as linhas existentes são
+        carregadas numa única consulta; os incrementos são feitos em SQL
+        (total = total + delta) para não perder escritas concorrentes.
+        Não faz commit: participa da transação do chamador.
+        """
+        deltas = defaultdict(lambda: [Decimal('0'), 0])
+        for key, amount, count in changes:
+            deltas[key][0] += amount
+            deltas[key][1] += count
+
+        deltas = {key: value for key, value in deltas.items() if value[0] != 0 or value[1] != 0}
+        if not deltas:
+            return
+
+        company_ids = {key[0] for key in deltas}
+        days = [key[1] for key in deltas]
+
+        existing_rows = db.query(
+            DailyLedgerRollup.id,
+            DailyLedgerRollup.company_id,
+            DailyLedgerRollup.day,
+            DailyLedgerRollup.transaction_type,
+            DailyLedgerRollup.category,
+            DailyLedgerRollup.is_personal,
+            DailyLedgerRollup.account_id
+        ).filter(
+            and_(
+                DailyLedgerRollup.company_id.in_(company_ids),
+                DailyLedgerRollup.day >= min(days),
+                DailyLedgerRollup.day <= max(days)
+            )
+        ).all()
+
+        existing = {}
+        for row_id, *key in existing_rows:
+            existing.setdefault(tuple(key), row_id)
+
+        updates = []
+        inserts = []
+        for key, (amount, count) in deltas.items():
+            row_id = existing.get(key)
+            if row_id is not None:
+                updates.append({"row_id": row_id, "delta_amount": amount, "delta_count": count})
+            else:
+                company_id, day, transaction_type, category, is_personal, account_id = key
+                inserts.append({
+                    "company_id": company_id,
+                    "day": day,
+                    "transaction_type": transaction_type,
+                    "category": category,
+                    "is_personal": is_personal,
+                    "account_id": account_id,
+                    "total_amount": amount,
+                    "transaction_count": count
+                })
+
+        # Um UPDATE e um INSERT em lote (executemany) para todas as chaves,
+        # em ordem de id para evitar deadlocks entre importações concorrentes
+        updates.sort(key=lambda item: item["row_id"])
+        if updates:
+            db.connection().execute(
+                update(DailyLedgerRollup.__table__)
+                .where(DailyLedgerRollup.__table__.c.id == bindparam("row_id"))
+                .values(
+                    total_amount=DailyLedgerRollup.__table__.c.total_amount + bindparam("delta_amount"),
+                    transaction_count=DailyLedgerRollup.__table__.c.transaction_count + bindparam("delta_count")
+                ),
+                updates
+            )
+
+        if inserts:
+            db.connection().execute(insert(DailyLedgerRollup.__table__), inserts)
+
+    def summarize(self, db: Session, company_id: int, start_day: date, end_day: date,
+                  group_by: Sequence[str] = (),
+                  transaction_type: Optional[TransactionType] = None) -> List:
+        """Soma valores e quantidades no intervalo [start_day, end_day], agrupando pelas colunas pedidas
+
+        Retorna linhas com os atributos de agrupamento mais total_amount e transaction_count.
+        """
+        group_columns = [self.GROUP_COLUMNS[name].label(name) for name in group_by]
+
+        query = db.query(
+            *group_columns,
+            func.sum(DailyLedgerRollup.total_amount).label("total_amount"),
+            func.sum(DailyLedgerRollup.transaction_count).label("transaction_count")
+        ).filter(
+            and_(
+                DailyLedgerRollup.company_id == company_id,
+                DailyLedgerRollup.day >= start_day,
+                DailyLedgerRollup.day <= end_day
+            )
+        )
+
+        if transaction_type is not None:
+            query = query.filter(DailyLedgerRollup.transaction_type == transaction_type)
+
+        if group_columns:
+            query = query.group_by(*[self.GROUP_COLUMNS[name] for name in group_by])
+
+        return query.all()
+
+    def totals_by_type(self, db: Session, company_id: int,
+                       start_day: date, end_day: date) -> Dict[TransactionType, Dict[str, any]]:
+        """Totais e quantidades por tipo de transação no intervalo"""
+        totals = {
+            transaction_type: {"amount": Decimal('0'), "count": 0}
+            for transaction_type in TransactionType
+        }
+
+        for row in self.summarize(db, company_id, start_day, end_day, group_by=("transaction_type",)):
+            totals[row.transaction_type] = {
+                "amount": Decimal(str(row.total_amount or 0)),
+                "count": int(row.transaction_count or 0)
+            }
+
+        return totals
+
+    def rebuild(self, db: Session, company_id: int) -> int:
+        """Recalcula o agregado de uma empresa a partir das transações"""
+
+        db.query(DailyLedgerRollup).filter(
+            DailyLedgerRollup.company_id == company_id
+        ).delete(synchronize_session=False)
+
+        account_id = case(
+            (Transaction.transaction_type == TransactionType.INCOME, Transaction.to_account_id),
+            else_=Transaction.from_account_id
+        )
+        day = func.date(Transaction.transaction_date)
+
+        grouped = select(
+            Transaction.company_id,
+            day,
+            Transaction.transaction_type,
+            Transaction.category,
+            Transaction.is_personal,
+            account_id,
+            func.sum(Transaction.amount),
+            func.count(Transaction.id)
+        ).where(
+            Transaction.company_id == company_id
+        ).group_by(
+            Transaction.company_id, day, Transaction.transaction_type,
+            Transaction.category, Transaction.is_personal, account_id
+        )
+
+        result = db.execute(
+            insert(DailyLedgerRollup).from_select(
+                ["company_id", "day", "transaction_type", "category", "is_personal",
+                 "account_id", "total_amount", "transaction_count"],
+                grouped
+            )
+        )
+
+        return result.rowcount
+
+    def _as_day(self, value) -> date:
+        if isinstance(value, datetime):
+            return value.date()
+        return value
+
+# Instância global do serviço
+ledger_rollup = LedgerRollupService()
@@ -0,0 +1,292 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from bisect import bisect_left
+import hmac
+import os
+import threading
+import time
+
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from database import engine, async_engine
+from services.alert_sweeper import alert_sweeper
+from services.auth_cache import auth_user_cache
+from services.password_hashing import password_hasher
+from services.query_instrumentation import query_instrumentation
+from services.response_cache import response_cache
+from services.text_normalization import text_normalizer
+
+# Limites (segundos) dos buckets do histograma de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def escape_label(value) -> str:
+    """Escapa barra invertida, aspas e quebra de linha (formato texto do Prometheus)"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class ShardedSeries:
+    """Séries (contadores/histogramas) com um shard por thread
+
+    Cada thread só escreve no próprio shard (threading.local), então o
+    registro não usa lock nem disputa com outras threads; a exportação soma
+    os shards. Uma leitura concorrente pode sair um incremento atrasada,
+    o que é aceitável para métricas.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[Dict[Labels, list]] = []
+
+    def _shard(self) -> Dict[Labels, list]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            self._shards.append(shard)  # list.append é atômico
+        return shard
+
+    def _merged(self, size: int) -> Dict[Labels, list]:
+        merged: Dict[Labels, list] = {}
+        for shard in list(self._shards):
+            for labels, values in list(shard.items()):
+                totals = merged.setdefault(labels, [0] * size)
+                for index, value in enumerate(values):
+                    totals[index] += value
+        return merged
+
+class Counter(ShardedSeries):
+    def inc(self, labels: Labels, amount: float = 1) -> None:
+        shard = self._shard()
+        values = shard.get(labels)
+        if values is None:
+            shard[labels] = [amount]
+        else:
+            values[0] += amount
+
+    def collect(self) -> Dict[Labels, float]:
+        return {labels: values[0] for labels, values in self._merged(1).items()}
+
+class Histogram(ShardedSeries):
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__()
+        self.buckets = buckets
+
+    def observe(self, labels: Labels, value: float) -> None:
+        shard = self._shard()
+        values = shard.get(labels)
+        if values is None:
+            # contagem por bucket (+Inf no fim), soma, total
+            values = shard[labels] = [0] * (len(self.buckets) + 3)
+        values[bisect_left(self.buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    def collect(self) -> Dict[Labels, list]:
+        return self._merged(len(self.buckets) + 3)
+
+class MetricsRegistry:
+    """Métricas do processo no formato texto do Prometheus (GET /metrics)
+
+    - latência por rota (histograma), requisições por status e erros (5xx);
+    - pool de conexões do SQLAlchemy (engines síncrono e assíncrono):
+      conexões em uso, ociosas, overflow e capacidade;
+    - caches: acertos, faltas e taxa de acerto (respostas, usuários
+      autenticados, normalização de descrições);
+    - classificadores: linhas processadas e tempo gasto;
+    - consultas SQL por rota, pool de bcrypt e última varredura de alertas.
+
+    O registro nas rotas é feito sem lock (ShardedSeries); o resto é lido
+    dos serviços só quando /metrics é chamado. Cada processo do uvicorn tem
+    as suas métricas: o Prometheus identifica a instância pelo alvo.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.request_latency = Histogram()
+        self.requests = Counter()
+        self.request_errors = Counter()
+        self.classified_rows = Counter()
+        self.classifier_seconds = Counter()
+
+    def observe_request(self, method: str, route: str, status_code: int, seconds: float) -> None:
+        labels = (("method", method), ("route", route))
+        self.request_latency.observe(labels, seconds)
+        self.requests.inc(labels + (("status", str(status_code)),))
+        if status_code >= 500:
+            self.request_errors.inc(labels)
+
+    def observe_classifier(self, classifier: str, rows: int, seconds: float) -> None:
+        """Throughput dos classificadores (chamado a cada lote)"""
+        if not self.enabled:
+            return
+        labels = (("classifier", classifier),)
+        self.classified_rows.inc(labels, rows)
+        self.classifier_seconds.inc(labels, seconds)
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        self._write_histogram(lines, "http_request_duration_seconds",
+                              "Latência das requisições por rota", self.request_latency)
+        self._write(lines, "http_requests_total", "counter", "Requisições por rota e status",
+                    self.requests.collect().items())
+        self._write(lines, "http_request_errors_total", "counter", "Respostas 5xx por rota",
+                    self.request_errors.collect().items())
+
+        pools = [(name, pool_engine.pool) for name, pool_engine in (("sync", engine), ("async", async_engine))]
+        for metric, method, help_text in (
+            ("db_pool_size", "size", "Conexões fixas do pool"),
+            ("db_pool_checked_out", "checkedout", "Conexões em uso"),
+            ("db_pool_checked_in", "checkedin", "Conexões ociosas no pool"),
+            ("db_pool_overflow", "overflow", "Conexões além do tamanho do pool (negativo: ainda não abertas)"),
+        ):
+            self._write(lines, metric, "gauge", help_text, [
+                ((("engine", name),), getattr(pool, method)())
+                for name, pool in pools if hasattr(pool, method)
+            ])
+        self._write(lines, "db_pool_capacity", "gauge", "Máximo de conexões (pool + overflow)", [
+            ((("engine", name),), pool.size() + pool._max_overflow)
+            for name, pool in pools if hasattr(pool, "_max_overflow")
+        ])
+
+        caches = {
+            "response": response_cache.stats(),
+            "auth_user": auth_user_cache.stats(),
+            **{f"normalization_{name}": memo for name, memo in text_normalizer.stats().items()}
+        }
+        for metric, field, metric_type, help_text in (
+            ("cache_hits_total", "hits", "counter", "Acertos do cache"),
+            ("cache_misses_total", "misses", "counter", "Faltas do cache"),
+            ("cache_hit_ratio", "hit_ratio", "gauge", "Taxa de acerto do cache"),
+            ("cache_entries", "size", "gauge", "Entradas no cache"),
+        ):
+            self._write(lines, metric, metric_type, help_text, [
+                ((("cache", name),), stats[field]) for name, stats in caches.items() if field in stats
+            ])
+
+        self._write(lines, "classifier_rows_total", "counter", "Transações classificadas",
+                    self.classified_rows.collect().items())
+        self._write(lines, "classifier_seconds_total", "counter", "Tempo gasto classificando",
+                    self.classifier_seconds.collect().items())
+
+        routes = query_instrumentation.route_stats()
+        self._write(lines, "db_queries_total", "counter", "Consultas SQL por rota", [
+            ((("route", route),), totals["queries"]) for route, totals in routes.items()
+        ])
+        self._write(lines, "db_query_seconds_total", "counter", "Tempo de banco por rota", [
+            ((("route", route),), totals["db_ms"] / 1000) for route, totals in routes.items()
+        ])
+        self._write(lines, "db_query_budget_exceeded_total", "counter", "Requisições acima do orçamento de consultas", [
+            ((("route", route),), totals["over_budget"]) for route, totals in routes.items()
+        ])
+
+        hashing = password_hasher.stats()
+        self._write(lines, "password_hash_pending", "gauge", "Operações de bcrypt na fila", [((), hashing["pending"])])
+        self._write(lines, "password_hash_rejected_total", "counter", "Operações de bcrypt rejeitadas (429)",
+                    [((), hashing["rejected"])])
+
+        sweep = alert_sweeper.stats()
+        self._write(lines, "alert_sweep_runs_total", "counter", "Varreduras de alertas executadas", [((), sweep["runs"])])
+        last_run = sweep["last_run"]
+        if last_run:
+            self._write(lines, "alert_sweep_last_duration_seconds", "gauge", "Duração da última varredura",
+                        [((), last_run["duration_ms"] / 1000)])
+            self._write(lines, "alert_sweep_last_alerts_created", "gauge", "Alertas criados na última varredura", [
+                ((("kind", "overdue_debts"),), last_run["overdue_alerts_created"]),
+                ((("kind", "spending_spikes"),), last_run["spike_alerts_created"])
+            ])
+
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def _write(cls, lines: List[str], name: str, metric_type: str, help_text: str,
+               samples: Iterable[Tuple[Labels, float]]) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for labels, value in samples:
+            lines.append(f"{name}{cls._labels(labels)} {cls._value(value)}")
+
+    @classmethod
+    def _write_histogram(cls, lines: List[str], name: str, help_text: str, histogram: Histogram) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        bounds = [cls._value(bound) for bound in histogram.buckets] + ["+Inf"]
+        for labels, values in histogram.collect().items():
+            cumulative = 0
+            for bound, count in zip(bounds, values):
+                cumulative += count
+                lines.append(f"{name}_bucket{cls._labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{cls._labels(labels)} {cls._value(values[-2])}")
+            lines.append(f"{name}_count{cls._labels(labels)} {values[-1]}")
+
+    @staticmethod
+    def _labels(labels: Labels) -> str:
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{key}="{escape_label(value)}"' for key, value in labels) + "}"
+
+    @staticmethod
+    def _value(value: float) -> str:
+        return repr(float(value)) if isinstance(value, float) else str(value)
+
+class RequestMetricsMiddleware:
+    """Middleware ASGI: latência, status e erros de cada requisição por rota
+
+    O rótulo é o template da rota ("/transactions/{transaction_id}"), não
+    o caminho, para não criar uma série por id; requisições sem rota
+    (404) ficam em "unmatched".
+    """
+
+    def __init__(self, app, registry: Optional[MetricsRegistry] = None):
+        self.app = app
+        self.registry = registry or metrics_registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            self.registry.observe_request(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status_code,
+                time.perf_counter() - started
+            )
+
+# Instância global do serviço
+metrics_registry = MetricsRegistry(
+    enabled=os.getenv("METRICS_ENABLED", "true").lower() != "false"
+)
+
+def register_metrics(app: FastAPI, token: Optional[str] = None) -> None:
+    """Middleware de métricas por rota e GET /metrics num app (main.py e api/index.py)
+
+    Chamar depois dos demais middlewares, para que a latência medida inclua
+    todos eles. Com `token` (padrão: METRICS_TOKEN), /metrics exige
+    "Authorization: Bearer <token>".
+    """
+    token = os.getenv("METRICS_TOKEN", "") if token is None else token
+    app.add_middleware(RequestMetricsMiddleware)
+
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    def get_metrics(authorization: Optional[str] = Header(None)):
+        """Métricas do processo no formato texto do Prometheus"""
+        if token and not hmac.compare_digest(authorization or "", f"Bearer {token}"):
+            raise HTTPException(status_code=403, detail="Não autorizado")
+        return PlainTextResponse(
+            metrics_registry.render(),
+            media_type="text/plain; version=0.0.4"
+        )
@@ -1,12 +1,23 @@
-import re
 import json
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
 from decimal import Decimal
 from datetime import datetime
 from collections import defaultdict
+import time
 
+import numpy as np
 from sqlalchemy.orm import Session
 from models import Transaction, TransactionCategory, TransactionType
+from services.keyword_automaton import KeywordAutomaton
+from services.text_normalization import text_normalizer
+from services.transaction_batch_update import transaction_batch_updater
+from services.category_model import category_model_service, NaiveBayesCategoryModel
+from services.metrics import metrics_registry
+
+class CategorizationBatch(NamedTuple):
+    """Resultado colunar de categorize_many (uma posição por transação)"""
+    labels: np.ndarray
+    confidences: np.ndarray
 
 class MLCategorizationService:
     """Serviço de categorização automática de transações usando regras e padrões"""
@@ -93,6 +104,15 @@ class MLCategorizationService:
             "Casa": {"min": 50, "max": 5000, "typical": [800, 1200, 2000]},
             "Lazer": {"min": 10, "max": 1000, "typical": [30, 80, 200]}
         }
+        
+        # Autômato com todas as palavras-chave (uma passada por descrição)
+        self.rebuild_keyword_index()
+    
+    def rebuild_keyword_index(self):
+        """Recompila o autômato após alterações em category_keywords"""
+        self._keyword_automaton = KeywordAutomaton(self.category_keywords, exact_weight=0.8, word_weight=0.3)
+        # Scores por descrição normalizada; o memo é recriado junto com o autômato
+        self._keyword_scores = text_normalizer.memo("ml_categorization.keyword_scores", self._keyword_automaton.scores)
     
     def categorize_transaction(self, description: str, amount: Decimal, 
                              transaction_type: TransactionType, 
@@ -105,12 +125,7 @@ class MLCategorizationService:
         description_clean = self._clean_description(description)
         
         # Buscar por palavras-chave
-        category_scores = defaultdict(float)
-        
-        for category, keywords in self.category_keywords.items():
-            score = self._calculate_keyword_score(description_clean, keywords)
-            if score > 0:
-                category_scores[category] = score
+        category_scores = defaultdict(float, self._keyword_scores(description_clean))
         
         # Ajustar score baseado no valor
         for category in category_scores:
@@ -139,21 +154,107 @@ class MLCategorizationService:
         # Categoria padrão
         return "Outros", 0.1
     
-    def _clean_description(self, description: str) -> str:
-        """Limpa e normaliza a descrição"""
-        # Converter para minúsculas
-        clean = description.lower()
+    def categorize_many(self, descriptions: Sequence[str], amounts: Sequence,
+                        transaction_types: Sequence[TransactionType],
+                        normalized: Optional[Sequence[str]] = None,
+                        model: Optional[NaiveBayesCategoryModel] = None) -> CategorizationBatch:
+        """Categoriza um lote em forma colunar
+        
+        Sem `model`, mesmo resultado de `categorize_transaction` linha a
+        linha, mas os ajustes por valor e tipo são feitos em matrizes
+        (transação x categoria) e os scores de palavras-chave são calculados
+        uma vez por descrição distinta. `normalized` (de
+        text_normalizer.clean_many) permite reaproveitar a normalização entre
+        os classificadores. Com o modelo da empresa (category_model_service),
+        a previsão dele prevalece onde é confiante.
+        """
+        started = time.perf_counter()
+        if normalized is None:
+            normalized = text_normalizer.clean_many(descriptions)
+        
+        categories = self._keyword_automaton.categories
+        amount_values = np.array([float(amount) for amount in amounts], dtype=float)
+        is_income = np.array([t == TransactionType.INCOME for t in transaction_types], dtype=bool)
+        is_expense = np.array([t == TransactionType.EXPENSE for t in transaction_types], dtype=bool)
+        has_description = np.array([bool(description) for description in descriptions], dtype=bool)
+        
+        # Scores de palavras-chave: uma linha por descrição distinta
+        text_index: Dict[str, int] = {}
+        inverse = np.array([text_index.setdefault(text, len(text_index)) for text in normalized], dtype=np.intp)
+        keyword_scores = np.zeros((len(text_index), len(categories)))
+        for text, row in text_index.items():
+            for category, score in self._keyword_scores(text).items():
+                keyword_scores[row, categories.index(category)] = score
+        scores = keyword_scores[inverse] if len(inverse) else np.zeros((0, len(categories)))
+        has_keywords = (scores > 0).any(axis=1)
+        
+        # Ajustes por valor e por tipo de transação
+        value_scores = np.column_stack([self._value_scores(amount_values, category) for category in categories])
+        income_adjustment = self._get_type_adjustment(TransactionType.INCOME)
+        other_adjustment = self._get_type_adjustment(TransactionType.EXPENSE)
+        type_adjustment = np.where(
+            is_income[:, None],
+            np.array([income_adjustment.get(category, 1.0) for category in categories]),
+            np.array([other_adjustment.get(category, 1.0) for category in categories])
+        )
+        scores = scores * (1 + value_scores) * type_adjustment
+        
+        best = scores.argmax(axis=1) if len(categories) else np.zeros(len(inverse), dtype=np.intp)
+        keyword_confidence = np.minimum(scores[np.arange(len(best)), best], 1.0) if len(categories) else np.zeros(len(best))
+        use_keywords = has_description & has_keywords & (keyword_confidence >= 0.3)
+        
+        # Fallback por valor (mesmas faixas de _categorize_by_value)
+        value_category = np.select(
+            [
+                is_expense & (amount_values > 1000),
+                is_expense & (amount_values > 500),
+                is_expense & (amount_values >= 50) & (amount_values <= 200),
+                is_expense & (amount_values < 20)
+            ],
+            np.array(["Casa", "Serviços", "Alimentação", "Transporte"], dtype=object),
+            default=None
+        )
+        use_value = has_description & ~use_keywords & np.not_equal(value_category, None)
+        
+        labels = np.full(len(best), "Outros", dtype=object)
+        labels[use_keywords] = np.array(categories, dtype=object)[best[use_keywords]]
+        labels[use_value] = value_category[use_value]
+        
+        confidences = np.full(len(best), 0.1)
+        confidences[use_keywords] = keyword_confidence[use_keywords]
+        confidences[use_value] = 0.4
+        
+        if category_model_service.is_warm(model):
+            feature_lists = [
+                category_model_service.features(description, amount, transaction_type) if description else []
+                for description, amount, transaction_type in zip(descriptions, amounts, transaction_types)
+            ]
+            model_labels, model_confidences = category_model_service.blend(model, feature_lists, labels, confidences)
+            labels = np.where(has_description, model_labels, labels)
+            confidences = np.where(has_description, model_confidences, confidences)
         
-        # Remover caracteres especiais e números desnecessários
-        clean = re.sub(r'[^a-záàâãéèêíìîóòôõúùûç\s]', ' ', clean)
+        metrics_registry.observe_classifier("category", len(labels), time.perf_counter() - started)
+        return CategorizationBatch(labels, confidences)
+    
+    def _value_scores(self, amounts: np.ndarray, category: str) -> np.ndarray:
+        """_calculate_value_score para um vetor de valores"""
+        if category not in self.value_patterns:
+            return np.zeros(len(amounts))
         
-        # Remover espaços extras
-        clean = re.sub(r'\s+', ' ', clean).strip()
+        pattern = self.value_patterns[category]
+        in_range = (pattern["min"] <= amounts) & (amounts <= pattern["max"])
+        near_typical = np.zeros(len(amounts), dtype=bool)
+        for typical_value in pattern["typical"]:
+            near_typical |= np.abs(amounts - typical_value) / typical_value < 0.5
         
-        return clean
+        return np.where(in_range, np.where(near_typical, 0.3, 0.1), 0.0)
+    
+    def _clean_description(self, description: str) -> str:
+        """Limpa e normaliza a descrição (memoizado em text_normalizer)"""
+        return text_normalizer.clean(description)
     
     def _calculate_keyword_score(self, description: str, keywords: List[str]) -> float:
-        """Calcula score baseado em palavras-chave"""
+        """Calcula score baseado em palavras-chave (referência do KeywordAutomaton)"""
         score = 0.0
         words = description.split()
         
@@ -223,45 +324,47 @@ class MLCategorizationService:
         
         return None
     
-    def batch_categorize(self, db: Session, company_id: int, limit: int = 100) -> Dict[str, int]:
-        """Categoriza transações em lote"""
+    def batch_categorize(self, db: Session, company_id: int, limit: int = 100,
+                         after_id: int = 0, commit: bool = True) -> Dict[str, int]:
+        """Categoriza transações em lote
         
-        # Buscar transações sem categoria ou com baixa confiança
-        transactions = db.query(Transaction).filter(
+        `after_id` continua a partir do último id de um lote anterior
+        (retornado em "last_id"); com commit=False quem chama confirma.
+        """
+        
+        # Buscar transações sem categoria ou com baixa confiança (nunca as categorizadas pelo usuário)
+        rows = transaction_batch_updater.load(
+            db,
             Transaction.company_id == company_id,
-            Transaction.category.is_(None) | (Transaction.ml_confidence < 0.5)
-        ).limit(limit).all()
+            Transaction.id > after_id,
+            Transaction.category_manual == False,
+            Transaction.category.is_(None) | (Transaction.ml_confidence < 0.5),
+            limit=limit
+        )
+        
+        batch = self.categorize_many(
+            [row.description for row in rows],
+            [row.amount for row in rows],
+            [row.transaction_type for row in rows],
+            model=category_model_service.model_for(db, company_id)
+        )
+        
+        # Só atualizar se a confiança for maior que a atual
+        changes = [
+            {"category": str(category), "ml_confidence": float(confidence)}
+            if confidence > float(row.ml_confidence or 0) else {}
+            for row, category, confidence in zip(rows, batch.labels, batch.confidences)
+        ]
+        categorized = transaction_batch_updater.write(db, rows, changes)
+        if commit:
+            db.commit()
         
-        results = {
-            "processed": 0,
-            "categorized": 0,
-            "skipped": 0
+        return {
+            "processed": len(rows),
+            "categorized": categorized,
+            "skipped": len(rows) - categorized,
+            "last_id": rows[-1].id if rows else after_id
         }
-        
-        for transaction in transactions:
-            results["processed"] += 1
-            
-            try:
-                category, confidence = self.categorize_transaction(
-                    transaction.description,
-                    transaction.amount,
-                    transaction.transaction_type
-                )
-                
-                # Só atualizar se a confiança for maior que a atual
-                if confidence > (transaction.ml_confidence or 0):
-                    transaction.category = category
-                    transaction.ml_confidence = confidence
-                    results["categorized"] += 1
-                else:
-                    results["skipped"] += 1
-                    
-            except Exception as e:
-                print(f"Erro ao categorizar transação {transaction.id}: {e}")
-                results["skipped"] += 1
-        
-        db.commit()
-        return results
     
     def get_category_suggestions(self, description: str, amount: Decimal, 
                                transaction_type: TransactionType, 
@@ -272,8 +375,7 @@ class MLCategorizationService:
         category_scores = defaultdict(float)
         
         # Calcular scores para todas as categorias
-        for category, keywords in self.category_keywords.items():
-            score = self._calculate_keyword_score(description_clean, keywords)
+        for category, score in self._keyword_scores(description_clean).items():
             if score > 0:
                 value_score = self._calculate_value_score(amount, category)
                 type_adjustment = self._get_type_adjustment(transaction_type)
@@ -354,33 +456,40 @@ class MLCategorizationService:
         return patterns
     
     def train_from_user_corrections(self, db: Session, company_id: int) -> Dict[str, any]:
-        """Aprende com correções manuais do usuário (simulado)"""
-        
-        # Em uma implementação real, isso analisaria correções manuais
-        # e ajustaria os pesos das palavras-chave
-        
-        corrections_analyzed = 0
-        patterns_learned = 0
-        
-        # Simular análise de correções
-        transactions_with_low_confidence = db.query(Transaction).filter(
-            Transaction.company_id == company_id,
-            Transaction.ml_confidence < 0.5,
-            Transaction.category.isnot(None)
-        ).limit(50).all()
-        
-        for transaction in transactions_with_low_confidence:
-            corrections_analyzed += 1
-            
-            # Simular aprendizado
-            if transaction.description and transaction.category:
-                # Em uma implementação real, isso atualizaria os pesos
-                patterns_learned += 1
+        """Retreina o modelo da empresa com as categorias dadas pelo usuário
+        
+        Antes de trocar o modelo em uso, mede a acurácia numa validação
+        (1 a cada 5 exemplos, pela ordem de id) do modelo treinado com os
+        demais contra as regras de palavras-chave.
+        """
+        
+        samples = category_model_service.load_samples(db, company_id)
+        holdout = samples[4::5]
+        training = [sample for index, sample in enumerate(samples) if index % 5 != 4]
+        
+        model_accuracy = rules_accuracy = None
+        if holdout:
+            expected = np.array([sample.category for sample in holdout], dtype=object)
+            args = (
+                [sample.description for sample in holdout],
+                [sample.amount for sample in holdout],
+                [sample.transaction_type for sample in holdout]
+            )
+            rules = self.categorize_many(*args)
+            blended = self.categorize_many(*args, model=category_model_service.fit(training))
+            rules_accuracy = round(float(np.mean(rules.labels == expected)), 4)
+            model_accuracy = round(float(np.mean(blended.labels == expected)), 4)
+        
+        model = category_model_service.train(db, company_id)
         
         return {
-            "corrections_analyzed": corrections_analyzed,
-            "patterns_learned": patterns_learned,
-            "improvement_estimate": f"{patterns_learned * 2}% melhoria na precisão"
+            "corrections_analyzed": len(samples),
+            "classes": len(model.classes),
+            "vocabulary_size": len(model.vocabulary),
+            "model_active": category_model_service.is_warm(model),
+            "holdout_size": len(holdout),
+            "holdout_accuracy": model_accuracy,
+            "rules_accuracy": rules_accuracy
         }
 
 # Instância global do serviço
@@ -0,0 +1,133 @@
+from typing import Dict, List, NamedTuple, Optional
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Arquivo com a versão em uso de cada modelo/empresa
+CURRENT_FILE = "CURRENT"
+METADATA_FILE = "metadata.json"
+
+class ModelArtifact(NamedTuple):
+    """Versão de um modelo carregada do disco"""
+    version: str
+    arrays: Dict[str, np.ndarray]
+    metadata: dict
+
+class ModelArtifactStore:
+    """Artefatos de modelos por empresa e versão em arquivos .npy
+
+    Layout: `{root}/{modelo}/company_{id}/{versão}/` com uma matriz .npy por
+    nome e um metadata.json (vocabulário, classes, parâmetros), mais o
+    arquivo CURRENT apontando a versão em uso. As matrizes são abertas com
+    mmap somente leitura: só as páginas tocadas pela inferência são lidas e
+    elas ficam no page cache, compartilhadas entre os workers do uvicorn.
+
+    Uma versão é gravada num diretório temporário e publicada com rename;
+    a troca da versão em uso é um os.replace do CURRENT. Leitores nunca veem
+    uma versão pela metade, e versões antigas continuam válidas para quem já
+    as mapeou (o unlink não invalida um mmap aberto). Falhas de disco são
+    registradas e tratadas como "sem artefato", nunca derrubam a requisição.
+    """
+
+    def __init__(self, root: str, keep_versions: int = 2, enabled: bool = True):
+        self.root = root
+        self.keep_versions = keep_versions
+        self.enabled = enabled
+
+    def current_version(self, name: str, company_id: int) -> Optional[str]:
+        if not self.enabled:
+            return None
+        try:
+            with open(os.path.join(self._company_dir(name, company_id), CURRENT_FILE)) as file:
+                return file.read().strip() or None
+        except FileNotFoundError:
+            return None
+        except OSError as error:
+            logger.warning(f"Erro ao ler versão do modelo {name} da empresa {company_id}: {str(error)}")
+            return None
+
+    def load(self, name: str, company_id: int, version: Optional[str] = None) -> Optional[ModelArtifact]:
+        """Abre (mmap, somente leitura) a versão pedida ou a em uso"""
+        version = version or self.current_version(name, company_id)
+        if version is None:
+            return None
+
+        path = os.path.join(self._company_dir(name, company_id), version)
+        try:
+            with open(os.path.join(path, METADATA_FILE)) as file:
+                metadata = json.load(file)
+            arrays = {
+                array_name: np.load(os.path.join(path, f"{array_name}.npy"), mmap_mode="r")
+                for array_name in metadata["arrays"]
+            }
+        except (OSError, ValueError, KeyError) as error:
+            logger.warning(f"Erro ao carregar modelo {name} da empresa {company_id} ({version}): {str(error)}")
+            return None
+
+        return ModelArtifact(version, arrays, metadata)
+
+    def save(self, name: str, company_id: int, arrays: Dict[str, np.ndarray], metadata: dict) -> Optional[str]:
+        """Grava uma nova versão e a torna a versão em uso; retorna a versão"""
+        if not self.enabled:
+            return None
+
+        company_dir = self._company_dir(name, company_id)
+        # Nanossegundos com largura fixa: a ordem lexicográfica é a cronológica
+        version = f"{time.time_ns():020d}"
+        try:
+            os.makedirs(company_dir, exist_ok=True)
+            staging = tempfile.mkdtemp(prefix=".tmp-", dir=company_dir)
+            try:
+                for array_name, array in arrays.items():
+                    np.save(os.path.join(staging, f"{array_name}.npy"), np.ascontiguousarray(array))
+                with open(os.path.join(staging, METADATA_FILE), "w") as file:
+                    json.dump({**metadata, "arrays": list(arrays)}, file)
+                os.rename(staging, os.path.join(company_dir, version))
+            except BaseException:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+
+            pointer = os.path.join(company_dir, f".{CURRENT_FILE}-{os.getpid()}")
+            with open(pointer, "w") as file:
+                file.write(version)
+            os.replace(pointer, os.path.join(company_dir, CURRENT_FILE))
+        except OSError as error:
+            logger.warning(f"Erro ao gravar modelo {name} da empresa {company_id}: {str(error)}")
+            return None
+
+        self._prune(company_dir, version)
+        return version
+
+    @staticmethod
+    def version_time(version: str) -> float:
+        """Momento (epoch, segundos) em que a versão foi gravada"""
+        return int(version) / 1e9
+
+    def _company_dir(self, name: str, company_id: int) -> str:
+        return os.path.join(self.root, name, f"company_{company_id}")
+
+    def _prune(self, company_dir: str, current: str) -> None:
+        """Remove versões além das `keep_versions` mais recentes"""
+        try:
+            versions: List[str] = sorted(
+                entry for entry in os.listdir(company_dir)
+                if entry.isdigit() and entry <= current
+            )
+        except OSError:
+            return
+        for version in versions[:-self.keep_versions]:
+            shutil.rmtree(os.path.join(company_dir, version), ignore_errors=True)
+
+# Instância global do serviço
+model_artifacts = ModelArtifactStore(
+    root=os.getenv("MODEL_ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "saas_financeiro_models")),
+    keep_versions=int(os.getenv("MODEL_ARTIFACT_KEEP_VERSIONS", "2")),
+    enabled=os.getenv("MODEL_ARTIFACTS_ENABLED", "true").lower() != "false"
+)
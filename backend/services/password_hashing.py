@@ -0,0 +1,95 @@
+from typing import Callable, Dict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
+import threading
+import time
+
+from auth import get_password_hash, verify_password
+
+class PasswordHashingBusy(Exception):
+    """Fila do pool de hashing cheia; o chamador deve responder 429"""
+
+class PasswordHashingPool:
+    """Executa bcrypt (hash e verificação) num pool de threads dedicado e limitado
+
+    Cada operação custa centenas de milissegundos de CPU; rodando fora do
+    threadpool padrão do FastAPI, rajadas de login não bloqueiam os demais
+    endpoints. A extensão bcrypt libera o GIL durante o cálculo, então
+    threads bastam. Quando há `max_pending` operações em andamento ou na
+    fila, novas chamadas falham com PasswordHashingBusy (back-pressure).
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 16):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._metrics = {
+            operation: {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "queue_seconds": 0.0}
+            for operation in ("hash", "verify")
+        }
+        self.rejected = 0
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", verify_password, plain_password, hashed_password)
+
+    async def _run(self, operation: str, function: Callable, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHashingBusy()
+            self._pending += 1
+
+        submitted_at = time.perf_counter()
+        started = []
+
+        def timed_call():
+            started.append(time.perf_counter())
+            return function(*args)
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, timed_call)
+        finally:
+            finished_at = time.perf_counter()
+            with self._lock:
+                self._pending -= 1
+                metrics = self._metrics[operation]
+                elapsed = finished_at - submitted_at
+                metrics["count"] += 1
+                metrics["total_seconds"] += elapsed
+                metrics["max_seconds"] = max(metrics["max_seconds"], elapsed)
+                metrics["queue_seconds"] += (started[0] if started else finished_at) - submitted_at
+
+    def stats(self) -> Dict:
+        """Latência (total e espera na fila), ocupação e rejeições por operação"""
+        with self._lock:
+            operations = {}
+            for operation, metrics in self._metrics.items():
+                count = metrics["count"]
+                operations[operation] = {
+                    "count": count,
+                    "avg_seconds": metrics["total_seconds"] / count if count else 0.0,
+                    "avg_queue_seconds": metrics["queue_seconds"] / count if count else 0.0,
+                    "max_seconds": metrics["max_seconds"]
+                }
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "rejected": self.rejected,
+                "operations": operations
+            }
+
+_workers = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Instância global do serviço
+password_hasher = PasswordHashingPool(
+    max_workers=_workers,
+    max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(_workers * 8)))
+)
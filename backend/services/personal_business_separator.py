@@ -1,11 +1,21 @@
-import re
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
 from decimal import Decimal
 from datetime import datetime, time
 from collections import defaultdict
+from time import perf_counter
 
+import numpy as np
 from sqlalchemy.orm import Session
 from models import Transaction, TransactionType, User
+from services.text_normalization import text_normalizer
+from services.transaction_batch_update import transaction_batch_updater
+from services.metrics import metrics_registry
+
+class ClassificationBatch(NamedTuple):
+    """Resultado colunar de classify_many (uma posição por transação)"""
+    labels: np.ndarray       # True = empresarial
+    confidences: np.ndarray
+    reasons: List[str]
 
 class PersonalBusinessSeparator:
     """Serviço para separar automaticamente transações pessoais de empresariais"""
@@ -109,6 +119,31 @@ class PersonalBusinessSeparator:
                 "irregular_values": True  # Valores irregulares são mais comuns
             }
         }
+        
+        # Pesos das categorias de palavras-chave
+        self.business_weights = {
+            "fornecedores": 1.0,
+            "servicos_empresariais": 0.9,
+            "impostos_taxas": 1.0,
+            "funcionarios": 0.8,
+            "infraestrutura": 0.7,
+            "equipamentos": 0.6,
+            "vendas_receitas": 0.9
+        }
+        self.personal_weights = {
+            "alimentacao_pessoal": 0.8,
+            "saude_familia": 0.7,
+            "educacao_familia": 0.6,
+            "lazer_familia": 0.9,
+            "casa_pessoal": 0.8,
+            "transporte_pessoal": 0.7
+        }
+        
+        self.rebuild_keyword_index()
+    
+    def rebuild_keyword_index(self):
+        """Recria o memo de scores após alterações nas palavras-chave ou pesos"""
+        self._keyword_scores = text_normalizer.memo("personal_business.keyword_scores", self._calculate_keyword_scores)
     
     def classify_transaction(self, description: str, amount: Decimal, 
                            transaction_date: datetime, 
@@ -152,35 +187,119 @@ class PersonalBusinessSeparator:
             tie_breaker = self._resolve_tie(description_clean, amount, transaction_date, transaction_type)
             return tie_breaker[0], 0.5, tie_breaker[1]
     
+    def classify_many(self, descriptions: Sequence[str], amounts: Sequence,
+                      transaction_dates: Sequence[datetime],
+                      transaction_types: Sequence[TransactionType],
+                      normalized: Optional[Sequence[str]] = None,
+                      user_context: Dict = None) -> ClassificationBatch:
+        """Classifica um lote em forma colunar
+        
+        Mesmo resultado de `classify_transaction` linha a linha: os scores
+        de horário, valor e tipo são calculados em vetores, os de
+        palavras-chave uma vez por descrição distinta, e só os empates caem
+        nas heurísticas de `_resolve_tie`. `normalized` (de
+        text_normalizer.clean_many) permite reaproveitar a normalização
+        entre os classificadores.
+        """
+        started = perf_counter()
+        if normalized is None:
+            normalized = text_normalizer.clean_many(descriptions)
+        
+        count = len(descriptions)
+        amount_values = np.array([float(abs(amount)) for amount in amounts], dtype=float)
+        is_income = np.array([t == TransactionType.INCOME for t in transaction_types], dtype=bool)
+        is_expense = np.array([t == TransactionType.EXPENSE for t in transaction_types], dtype=bool)
+        
+        # Scores de palavras-chave (memoizados por descrição)
+        keyword_scores = np.array([self._keyword_scores(text) for text in normalized], dtype=float).reshape(count, 2)
+        
+        # Horário comercial, em microssegundos do dia
+        start, end = self.business_hours["start"], self.business_hours["end"]
+        time_of_day = np.array([self._microseconds(d.time()) for d in transaction_dates], dtype=np.int64)
+        weekdays = np.array([d.weekday() for d in transaction_dates], dtype=np.int64)
+        is_business_hours = (self._microseconds(start) <= time_of_day) & (time_of_day <= self._microseconds(end))
+        if self.business_hours["weekdays_only"]:
+            is_business_hours &= weekdays < 5
+        
+        business_scores = keyword_scores[:, 0]
+        business_scores = business_scores + np.where(is_business_hours, 0.5, 0.0) * 0.3
+        business_scores = business_scores + self._value_scores(amount_values, "business") * 0.4
+        business_scores = np.minimum(business_scores + np.where(is_income, 0.5, 0.0), 2.0)
+        
+        personal_scores = keyword_scores[:, 1]
+        personal_scores = personal_scores + np.where(is_business_hours, 0.0, 0.3) * 0.2
+        personal_scores = personal_scores + self._value_scores(amount_values, "personal") * 0.3
+        personal_scores = np.minimum(personal_scores + np.where(is_expense, 0.3, 0.0), 2.0)
+        
+        if user_context:
+            business_scores = business_scores * user_context.get("business_multiplier", 1.0)
+            personal_scores = personal_scores * user_context.get("personal_multiplier", 1.0)
+        
+        total_scores = business_scores + personal_scores
+        with np.errstate(divide="ignore", invalid="ignore"):
+            business_confidence = np.where(total_scores != 0, business_scores / total_scores, 0.0)
+            personal_confidence = np.where(total_scores != 0, personal_scores / total_scores, 0.0)
+        
+        labels = np.zeros(count, dtype=bool)
+        confidences = np.full(count, 0.5)
+        reasons = []
+        for i in range(count):
+            if not descriptions[i]:
+                confidences[i] = 0.1
+                reasons.append("Descrição vazia - assumindo pessoal")
+            elif total_scores[i] == 0:
+                confidences[i] = 0.1
+                reasons.append("Sem indicadores claros - assumindo pessoal")
+            elif business_confidence[i] > 0.6:
+                labels[i] = True
+                confidences[i] = business_confidence[i]
+                reasons.append(f"Indicadores empresariais (score: {business_scores[i]:.2f})")
+            elif personal_confidence[i] > 0.6:
+                confidences[i] = personal_confidence[i]
+                reasons.append(f"Indicadores pessoais (score: {personal_scores[i]:.2f})")
+            else:
+                labels[i], reason = self._resolve_tie(
+                    normalized[i], amounts[i], transaction_dates[i], transaction_types[i]
+                )
+                reasons.append(reason)
+        
+        metrics_registry.observe_classifier("personal_business", count, perf_counter() - started)
+        return ClassificationBatch(labels, confidences, reasons)
+    
+    def _value_scores(self, amounts: np.ndarray, context: str) -> np.ndarray:
+        """_calculate_value_score para um vetor de valores absolutos"""
+        patterns = self.value_patterns[context]
+        scores = np.zeros(len(amounts))
+        
+        for range_pattern in patterns["typical_ranges"]:
+            in_range = (range_pattern["min"] <= amounts) & (amounts <= range_pattern["max"])
+            scores = scores + np.where(in_range, range_pattern["confidence"], 0.0)
+        
+        if context == "business":
+            if patterns.get("round_values"):
+                scores = scores + np.where(amounts % 100 == 0, 0.2, 0.0)
+            scores = scores + np.where(amounts > 5000, 0.4, 0.0)
+        elif context == "personal":
+            if patterns.get("irregular_values"):
+                scores = scores + np.where(amounts % 10 != 0, 0.1, 0.0)
+            scores = scores + np.where(amounts < 50, 0.3, 0.0)
+        
+        return np.minimum(scores, 1.0)
+    
+    @staticmethod
+    def _microseconds(value: time) -> int:
+        return ((value.hour * 60 + value.minute) * 60 + value.second) * 1000000 + value.microsecond
+    
     def _clean_description(self, description: str) -> str:
-        """Limpa e normaliza a descrição"""
-        clean = description.lower()
-        clean = re.sub(r'[^a-záàâãéèêíìîóòôõúùûç\s]', ' ', clean)
-        clean = re.sub(r'\s+', ' ', clean).strip()
-        return clean
+        """Limpa e normaliza a descrição (memoizado em text_normalizer)"""
+        return text_normalizer.clean(description)
     
     def _calculate_business_score(self, description: str, amount: Decimal, 
                                 transaction_date: datetime, 
                                 transaction_type: TransactionType) -> float:
         """Calcula score para classificação empresarial"""
-        score = 0.0
-        
-        # Score por palavras-chave
-        for category, keywords in self.business_keywords.items():
-            keyword_score = self._calculate_keyword_score(description, keywords)
-            
-            # Pesos diferentes por categoria
-            weights = {
-                "fornecedores": 1.0,
-                "servicos_empresariais": 0.9,
-                "impostos_taxas": 1.0,
-                "funcionarios": 0.8,
-                "infraestrutura": 0.7,
-                "equipamentos": 0.6,
-                "vendas_receitas": 0.9
-            }
-            
-            score += keyword_score * weights.get(category, 0.5)
+        # Score por palavras-chave (memoizado por descrição)
+        score = self._keyword_scores(description)[0]
         
         # Score por horário (transações em horário comercial)
         time_score = self._calculate_time_score(transaction_date, "business")
@@ -200,23 +319,8 @@ class PersonalBusinessSeparator:
                                 transaction_date: datetime, 
                                 transaction_type: TransactionType) -> float:
         """Calcula score para classificação pessoal"""
-        score = 0.0
-        
-        # Score por palavras-chave
-        for category, keywords in self.personal_keywords.items():
-            keyword_score = self._calculate_keyword_score(description, keywords)
-            
-            # Pesos diferentes por categoria
-            weights = {
-                "alimentacao_pessoal": 0.8,
-                "saude_familia": 0.7,
-                "educacao_familia": 0.6,
-                "lazer_familia": 0.9,
-                "casa_pessoal": 0.8,
-                "transporte_pessoal": 0.7
-            }
-            
-            score += keyword_score * weights.get(category, 0.5)
+        # Score por palavras-chave (memoizado por descrição)
+        score = self._keyword_scores(description)[1]
         
         # Score por horário (transações fora do horário comercial)
         time_score = self._calculate_time_score(transaction_date, "personal")
@@ -232,6 +336,18 @@ class PersonalBusinessSeparator:
         
         return min(score, 2.0)  # Limitar score máximo
     
+    def _calculate_keyword_scores(self, description: str) -> Tuple[float, float]:
+        """Scores ponderados de palavras-chave (empresarial, pessoal) da descrição normalizada"""
+        business_score = 0.0
+        for category, keywords in self.business_keywords.items():
+            business_score += self._calculate_keyword_score(description, keywords) * self.business_weights.get(category, 0.5)
+        
+        personal_score = 0.0
+        for category, keywords in self.personal_keywords.items():
+            personal_score += self._calculate_keyword_score(description, keywords) * self.personal_weights.get(category, 0.5)
+        
+        return business_score, personal_score
+    
     def _calculate_keyword_score(self, description: str, keywords: List[str]) -> float:
         """Calcula score baseado em palavras-chave"""
         score = 0.0
@@ -324,49 +440,45 @@ class PersonalBusinessSeparator:
         # Padrão: assumir pessoal
         return False, "Sem indicadores claros - assumindo pessoal por padrão"
     
-    def batch_classify(self, db: Session, company_id: int, limit: int = 100) -> Dict[str, int]:
-        """Classifica transações em lote"""
+    def batch_classify(self, db: Session, company_id: int, limit: int = 100,
+                       after_id: int = 0, commit: bool = True) -> Dict[str, int]:
+        """Classifica transações em lote
+        
+        `after_id` continua a partir do último id de um lote anterior
+        (retornado em "last_id"); com commit=False quem chama confirma.
+        """
         
         # Buscar transações sem classificação
-        transactions = db.query(Transaction).filter(
+        rows = transaction_batch_updater.load(
+            db,
             Transaction.company_id == company_id,
-            Transaction.is_personal.is_(None)
-        ).limit(limit).all()
-        
-        results = {
-            "processed": 0,
-            "business": 0,
-            "personal": 0,
-            "low_confidence": 0
-        }
+            Transaction.id > after_id,
+            Transaction.is_personal.is_(None),
+            limit=limit
+        )
         
-        for transaction in transactions:
-            results["processed"] += 1
-            
-            try:
-                is_business, confidence, reason = self.classify_transaction(
-                    transaction.description,
-                    transaction.amount,
-                    transaction.date,
-                    transaction.transaction_type
-                )
-                
-                transaction.is_personal = not is_business
-                transaction.ml_confidence = confidence
-                
-                if is_business:
-                    results["business"] += 1
-                else:
-                    results["personal"] += 1
-                
-                if confidence < 0.6:
-                    results["low_confidence"] += 1
-                    
-            except Exception as e:
-                print(f"Erro ao classificar transação {transaction.id}: {e}")
-        
-        db.commit()
-        return results
+        batch = self.classify_many(
+            [row.description for row in rows],
+            [row.amount for row in rows],
+            [row.transaction_date for row in rows],
+            [row.transaction_type for row in rows]
+        )
+        
+        transaction_batch_updater.write(db, rows, [
+            {"is_personal": not bool(is_business), "ml_confidence": float(confidence)}
+            for is_business, confidence in zip(batch.labels, batch.confidences)
+        ])
+        if commit:
+            db.commit()
+        
+        business_count = int(batch.labels.sum())
+        return {
+            "processed": len(rows),
+            "business": business_count,
+            "personal": len(rows) - business_count,
+            "low_confidence": int((batch.confidences < 0.6).sum()),
+            "last_id": rows[-1].id if rows else after_id
+        }
     
     def get_classification_suggestions(self, description: str, amount: Decimal, 
                                      transaction_date: datetime, 
@@ -0,0 +1,208 @@
+from typing import Any, Dict, Iterator, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import json
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Orçamentos de consultas por rota ("MÉTODO /caminho/{param}"); as demais usam o padrão
+ROUTE_QUERY_BUDGETS: Dict[str, int] = {
+    "GET /dashboard/consolidated": 12,
+    "GET /dashboard/accounts-overview": 6,
+    "GET /dashboard/quick-stats": 6,
+    "GET /reports/dashboard": 8,
+    "GET /transactions/": 4,
+    "GET /accounts/": 4,
+}
+
+class QueryStats:
+    """Consultas, tempo de banco e linhas de uma requisição (ou bloco rastreado)"""
+
+    __slots__ = ("queries", "db_seconds", "rows")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+
+    @property
+    def db_ms(self) -> float:
+        return self.db_seconds * 1000
+
+# Estatísticas da requisição em andamento; None fora de requisições (worker, scripts)
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+class QueryInstrumentationService:
+    """Contagem de consultas SQL por requisição via eventos do SQLAlchemy
+
+    `before_cursor_execute`/`after_cursor_execute` somam consultas, tempo e
+    linhas (rowcount informado pelo driver) num QueryStats guardado num
+    ContextVar. O middleware cria um QueryStats por requisição; como o
+    objeto é compartilhado, rotas síncronas (threadpool) e assíncronas
+    (greenlet do AsyncSession) acumulam no mesmo lugar.
+
+    Cada rota tem um orçamento de consultas (ROUTE_QUERY_BUDGETS, o padrão
+    `default_budget` e overrides de QUERY_BUDGETS); requisições acima dele
+    são registradas no log. Os totais por rota ficam em `route_stats` para
+    métricas e para `assert_route_budgets`, usado nos testes.
+    """
+
+    def __init__(self, default_budget: int = 30, budgets: Optional[Dict[str, int]] = None, enabled: bool = True):
+        self.default_budget = default_budget
+        self.budgets = dict(ROUTE_QUERY_BUDGETS)
+        self.budgets.update(budgets or {})
+        self.enabled = enabled
+        self._routes: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def instrument(self, engine: Engine) -> None:
+        """Registra os eventos no engine (para o AsyncEngine, passe `sync_engine`)"""
+        if not self.enabled:
+            return
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current_stats.get() is not None:
+            conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = _current_stats.get()
+        if stats is None:
+            return
+        started = conn.info.get("query_started_at")
+        if started:
+            stats.db_seconds += time.perf_counter() - started.pop()
+        stats.queries += 1
+        # SELECT no SQLite informa -1: só conta o que o driver souber
+        stats.rows += max(cursor.rowcount, 0)
+
+    @contextmanager
+    def track(self) -> Iterator[QueryStats]:
+        """Conta as consultas executadas dentro do bloco"""
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        try:
+            yield stats
+        finally:
+            _current_stats.reset(token)
+
+    @contextmanager
+    def untracked(self) -> Iterator[None]:
+        """Consultas do bloco não entram na requisição em andamento (jobs executados após a resposta)"""
+        token = _current_stats.set(None)
+        try:
+            yield
+        finally:
+            _current_stats.reset(token)
+
+    def budget_for(self, route: str) -> int:
+        return self.budgets.get(route, self.default_budget)
+
+    def record(self, route: str, stats: QueryStats) -> bool:
+        """Soma a requisição aos totais da rota; False se estourou o orçamento"""
+        budget = self.budget_for(route)
+        within_budget = stats.queries <= budget
+
+        with self._lock:
+            totals = self._routes.setdefault(route, {
+                "requests": 0, "queries": 0, "max_queries": 0, "db_ms": 0.0, "rows": 0, "over_budget": 0
+            })
+            totals["requests"] += 1
+            totals["queries"] += stats.queries
+            totals["max_queries"] = max(totals["max_queries"], stats.queries)
+            totals["db_ms"] += stats.db_ms
+            totals["rows"] += stats.rows
+            if not within_budget:
+                totals["over_budget"] += 1
+
+        if not within_budget:
+            logger.warning(
+                f"{route}: {stats.queries} consultas (orçamento {budget}), "
+                f"{stats.db_ms:.1f} ms de banco, {stats.rows} linhas"
+            )
+        return within_budget
+
+    def route_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                route: {**totals, "budget": self.budget_for(route)}
+                for route, totals in self._routes.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+    def assert_route_budgets(self, prefix: str = "") -> None:
+        """Falha (AssertionError) se alguma rota do prefixo passou do orçamento
+
+        Uso nos testes: exercitar as rotas de um router com o TestClient e
+        chamar `query_instrumentation.assert_route_budgets("/dashboard")`.
+        Jobs executados em background pela própria requisição não contam
+        (JobQueueService.start_in_background).
+        """
+        violations: List[str] = [
+            f"{route}: até {totals['max_queries']} consultas (orçamento {totals['budget']})"
+            for route, totals in sorted(self.route_stats().items())
+            if route.split(" ", 1)[-1].startswith(prefix) and totals["max_queries"] > totals["budget"]
+        ]
+        assert not violations, "Orçamento de consultas excedido:\n" + "\n".join(violations)
+
+class QueryInstrumentationMiddleware:
+    """Middleware ASGI: um QueryStats por requisição e os cabeçalhos de resposta
+
+    Adiciona `X-Query-Count` e `Server-Timing` (tempo de banco e total) e
+    registra a requisição na rota correspondente. Consultas feitas depois
+    dos cabeçalhos (corpo de StreamingResponse) entram nos totais da rota,
+    mas não nos cabeçalhos.
+    """
+
+    def __init__(self, app, service: "QueryInstrumentationService" = None):
+        self.app = app
+        self.service = service or query_instrumentation
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.service.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(stats.queries).encode()))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={stats.db_ms:.1f};desc="{stats.queries} queries", app;dur={total_ms:.1f}'.encode()
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current_stats.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                self.service.record(f"{scope['method']} {route.path}", stats)
+
+# Instância global do serviço
+query_instrumentation = QueryInstrumentationService(
+    default_budget=int(os.getenv("QUERY_BUDGET_DEFAULT", "30")),
+    budgets=json.loads(os.getenv("QUERY_BUDGETS", "{}")),
+    enabled=os.getenv("QUERY_INSTRUMENTATION_ENABLED", "true").lower() != "false"
+)
@@ -0,0 +1,202 @@
+from typing import Any, Dict, Optional
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from services.tenant_versions import tenant_versions
+
+logger = logging.getLogger(__name__)
+
+class MemoryCacheBackend:
+    """Backend em memória do processo: LRU com TTL por entrada"""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def size(self) -> int:
+        return len(self._entries)
+
+class RedisCacheBackend:
+    """Backend em qualquer servidor que fale o protocolo Redis
+
+    Recebe um cliente com a interface do redis-py (get e set com ex), o
+    que permite usar um substituto local nos testes. As respostas são
+    compartilhadas por todas as instâncias da API.
+    """
+
+    def __init__(self, client, prefix: str = "response_cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        self.client.set(self.prefix + key, value, ex=ttl_seconds)
+
+    def size(self) -> int:
+        return -1
+
+class ResponseCache:
+    """Cache de respostas por tenant, invalidado por versão
+
+    A chave combina (company_id, endpoint, parâmetros, versão do tenant).
+    A versão é a de tenant_versions, lida do banco na montagem da chave:
+    as escritas chamam `bump_tenant_version` após o commit, inclusive as
+    do worker, da varredura de alertas e de outras instâncias, o que torna
+    inacessíveis todas as respostas anteriores daquele tenant sem precisar
+    apagá-las; elas saem pelo LRU/TTL. O TTL também limita quanto tempo
+    vale uma resposta que depende da data corrente.
+
+    Falhas do backend nunca derrubam a requisição: contam como falta e a
+    resposta é calculada normalmente.
+    """
+
+    def __init__(self, backend=None, ttl_seconds: int = 300, enabled: bool = True):
+        self.backend = backend or MemoryCacheBackend()
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, int]] = {}
+        self.backend_errors = 0
+
+    def bump_tenant_version(self, company_id: int) -> None:
+        """Invalida todas as respostas em cache do tenant e o ETag das listagens (tenant_versions)"""
+        try:
+            tenant_versions.bump(company_id)
+        except Exception as e:
+            logger.warning(f"Falha ao incrementar a versão do tenant {company_id}: {str(e)}")
+
+    def key(self, db: Session, company_id: int, endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Chave da resposta na versão atual do tenant (uma consulta pela chave primária)"""
+        return self._build_key(company_id, tenant_versions.current(db, company_id), endpoint, params)
+
+    async def key_async(self, db: AsyncSession, company_id: int, endpoint: str,
+                        params: Optional[Dict[str, Any]] = None) -> str:
+        """Como `key`, para rotas com sessão assíncrona"""
+        return self._build_key(company_id, await tenant_versions.current_async(db, company_id), endpoint, params)
+
+    def get(self, key: str) -> Optional[Response]:
+        """Resposta em cache para a chave, ou None"""
+        if not self.enabled:
+            return None
+
+        try:
+            content = self.backend.get(key)
+        except Exception as e:
+            self._record_error(e)
+            content = None
+
+        self._count(key, "hits" if content is not None else "misses")
+        if content is None:
+            return None
+        return Response(content=content, media_type="application/json", headers={"X-Cache": "HIT"})
+
+    def store(self, key: str, result: Any) -> Response:
+        """Serializa o resultado, guarda no cache e devolve a resposta"""
+        content = json.dumps(
+            jsonable_encoder(result), ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+
+        if self.enabled:
+            try:
+                self.backend.set(key, content, self.ttl_seconds)
+            except Exception as e:
+                self._record_error(e)
+
+        return Response(content=content, media_type="application/json", headers={"X-Cache": "MISS"})
+
+    def stats(self) -> Dict[str, Any]:
+        """Acertos, faltas e taxa de acerto no total e por endpoint"""
+        with self._lock:
+            endpoints = {
+                endpoint: {**counts, "hit_ratio": self._hit_ratio(counts)}
+                for endpoint, counts in self._metrics.items()
+            }
+            hits = sum(counts["hits"] for counts in self._metrics.values())
+            misses = sum(counts["misses"] for counts in self._metrics.values())
+
+        return {
+            "backend": type(self.backend).__name__,
+            "size": self.backend.size(),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": self._hit_ratio({"hits": hits, "misses": misses}),
+            "backend_errors": self.backend_errors,
+            "endpoints": endpoints
+        }
+
+    def _count(self, key: str, outcome: str) -> None:
+        endpoint = key.split(":")[2]
+        with self._lock:
+            counts = self._metrics.setdefault(endpoint, {"hits": 0, "misses": 0})
+            counts[outcome] += 1
+
+    def _record_error(self, error: Exception) -> None:
+        with self._lock:
+            self.backend_errors += 1
+        logger.warning(f"Erro no backend do cache de respostas: {str(error)}")
+
+    @staticmethod
+    def _build_key(company_id: int, version: int, endpoint: str, params: Optional[Dict[str, Any]]) -> str:
+        encoded_params = json.dumps(params or {}, sort_keys=True, default=str)
+        params_hash = hashlib.sha1(encoded_params.encode()).hexdigest()[:16]
+        return f"{company_id}:{version}:{endpoint}:{params_hash}"
+
+    @staticmethod
+    def _hit_ratio(counts: Dict[str, int]) -> float:
+        lookups = counts["hits"] + counts["misses"]
+        return counts["hits"] / lookups if lookups else 0.0
+
+def build_cache_backend():
+    """Backend configurado por RESPONSE_CACHE_REDIS_URL (Redis) ou LRU em memória"""
+    redis_url = os.getenv("RESPONSE_CACHE_REDIS_URL")
+    if redis_url:
+        try:
+            import redis
+            return RedisCacheBackend(redis.Redis.from_url(redis_url, socket_timeout=0.5))
+        except ImportError:
+            logger.warning("Pacote redis não instalado; usando cache de respostas em memória")
+
+    return MemoryCacheBackend(max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048")))
+
+# Instância global do serviço
+response_cache = ResponseCache(
+    backend=build_cache_backend(),
+    ttl_seconds=int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300")),
+    enabled=os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() != "false"
+)
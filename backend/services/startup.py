@@ -0,0 +1,135 @@
+from typing import Dict, Iterable, List, Optional
+import importlib
+import logging
+import os
+import threading
+import time
+
+from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
+
+from database import engine
+from models import Base
+
+logger = logging.getLogger(__name__)
+
+# Prefixo de URL de cada router (módulo em routers/), para carregá-lo sem importar
+ROUTER_PREFIXES: Dict[str, str] = {
+    "auth": "/auth",
+    "accounts": "/accounts",
+    "transactions": "/transactions",
+    "bank_import": "/bank-import",
+    "debts": "/debts",
+    "goals": "/goals",
+    "reports": "/reports",
+    "gamification": "/gamification",
+    "permissions": "/permissions",
+    "dashboard": "/dashboard",
+    "jobs": "/jobs",
+}
+
+class LazyRouterLoader:
+    """Importa e inclui cada router na primeira requisição ao seu prefixo
+
+    Depois de incluído o router fica no app como os demais; o schema do
+    OpenAPI é descartado para ser refeito com as rotas novas. As rotas de
+    documentação (openapi.json, docs, redoc) carregam todos os pendentes.
+    """
+
+    def __init__(self, app: FastAPI, modules: Iterable[str]):
+        self.app = app
+        self._pending: Dict[str, str] = {module: ROUTER_PREFIXES[module] for module in modules}
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> List[str]:
+        return list(self._pending)
+
+    def modules_for(self, path: str) -> List[str]:
+        """Routers pendentes necessários para atender o caminho"""
+        if path in (self.app.openapi_url, self.app.docs_url, self.app.redoc_url):
+            return self.pending
+        return [
+            module for module, prefix in list(self._pending.items())
+            if path == prefix or path.startswith(prefix + "/")
+        ]
+
+    def load(self, modules: Iterable[str]) -> None:
+        with self._lock:
+            for module in modules:
+                if self._pending.pop(module, None) is None:
+                    continue  # já incluído por outra requisição
+                started = time.perf_counter()
+                router_module = importlib.import_module(f"routers.{module}")
+                self.app.include_router(router_module.router)
+                logger.info(f"Router {module} carregado em {(time.perf_counter() - started) * 1000:.0f} ms")
+            self.app.openapi_schema = None
+
+    def load_all(self) -> None:
+        self.load(self.pending)
+
+class LazyRouterMiddleware:
+    """Middleware ASGI: garante que o router do caminho esteja incluído antes do roteamento
+
+    O import roda no threadpool para não travar o event loop durante o
+    carregamento; depois que todos os routers foram incluídos o custo por
+    requisição é uma checagem de lista vazia.
+    """
+
+    def __init__(self, app, loader: LazyRouterLoader):
+        self.app = app
+        self.loader = loader
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self.loader.pending:
+            modules = self.loader.modules_for(scope["path"])
+            if modules:
+                await run_in_threadpool(self.loader.load, modules)
+        await self.app(scope, receive, send)
+
+class StartupService:
+    """Modo de inicialização da aplicação (cold start em serverless)
+
+    Em desenvolvimento as tabelas são criadas na subida (`create_all`) e os
+    routers são incluídos todos de uma vez, para que um erro de import
+    apareça logo. Fora de desenvolvimento o schema vem das migrações e os
+    routers são importados só na primeira requisição ao seu prefixo
+    (LazyRouterMiddleware): uma função que recebe /auth não paga o import de
+    /bank-import (pandas, classificadores). Os dois comportamentos podem ser
+    forçados com LAZY_ROUTERS e CREATE_TABLES.
+    """
+
+    def __init__(self, environment: str = "development", lazy_routers: Optional[bool] = None,
+                 create_tables: Optional[bool] = None):
+        self.environment = environment
+        development = environment == "development"
+        self.lazy_routers = not development if lazy_routers is None else lazy_routers
+        self.create_tables_on_startup = development if create_tables is None else create_tables
+
+    def create_tables(self) -> bool:
+        """Cria as tabelas que faltam (só quando habilitado); True se executou"""
+        if not self.create_tables_on_startup:
+            return False
+        Base.metadata.create_all(bind=engine)
+        return True
+
+    def register_routers(self, app: FastAPI, modules: Iterable[str]) -> None:
+        """Inclui os routers no app, agora ou sob demanda conforme o modo"""
+        if not self.lazy_routers:
+            for module in modules:
+                app.include_router(importlib.import_module(f"routers.{module}").router)
+            return
+
+        app.add_middleware(LazyRouterMiddleware, loader=LazyRouterLoader(app, modules))
+
+def env_flag(name: str) -> Optional[bool]:
+    """Valor booleano de uma variável de ambiente; None se não definida"""
+    value = os.getenv(name)
+    return None if value is None else value.lower() != "false"
+
+# Instância global do serviço
+startup = StartupService(
+    environment=os.getenv("ENVIRONMENT", "development"),
+    lazy_routers=env_flag("LAZY_ROUTERS"),
+    create_tables=env_flag("CREATE_TABLES")
+)
@@ -0,0 +1,71 @@
+from typing import Optional
+from datetime import date
+import hashlib
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+from auth import get_current_active_user
+from database import get_db
+from models import User
+from services.tenant_versions import tenant_versions
+
+class TenantETagService:
+    """ETag fraco de listagens por tenant, derivado da versão de escrita
+
+    O validador é a versão do tenant em tenant_versions, incrementada por
+    toda escrita (response_cache.bump_tenant_version), mais o escopo da
+    requisição. Ler a versão é uma consulta pela chave primária, com custo
+    constante qualquer que seja o volume do tenant; por vir do banco, o
+    ETag é o mesmo em todas as instâncias da API.
+    """
+
+    def compute(self, db: Session, company_id: int, *scope) -> str:
+        """ETag para a versão do tenant e o escopo da requisição (rota, parâmetros...)"""
+        payload = repr((company_id, tenant_versions.current(db, company_id), scope))
+        return f'W/"{hashlib.sha1(payload.encode()).hexdigest()[:24]}"'
+
+    def matches(self, if_none_match: Optional[str], etag: str) -> bool:
+        """Comparação fraca do If-None-Match com o ETag atual"""
+        if not if_none_match:
+            return False
+
+        candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+        return "*" in candidates or self._opaque(etag) in {self._opaque(c) for c in candidates}
+
+    @staticmethod
+    def _opaque(etag: str) -> str:
+        return etag[2:] if etag.startswith("W/") else etag
+
+# Instância global do serviço
+etag_service = TenantETagService()
+
+def conditional_get(*models, daily: bool = False):
+    """Dependência de GET condicional para rotas que listam dados do tenant
+
+    Responde 304 antes de executar a rota quando o If-None-Match confere com
+    o ETag atual; senão acrescenta ETag à resposta. `daily` inclui a data
+    corrente no ETag, para respostas que dependem do dia (janelas de tempo).
+    `models` documenta as tabelas de que a resposta depende; a invalidação
+    vem da versão do tenant, incrementada por escritas em qualquer uma delas.
+    """
+
+    def check_etag(
+        request: Request,
+        response: Response,
+        current_user: User = Depends(get_current_active_user),
+        db: Session = Depends(get_db)
+    ):
+        etag = etag_service.compute(
+            db, current_user.company_id,
+            request.url.path, sorted(request.query_params.multi_items()),
+            date.today() if daily else None
+        )
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if etag_service.matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=headers)
+
+        response.headers.update(headers)
+
+    return check_etag
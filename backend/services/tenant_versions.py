@@ -0,0 +1,61 @@
+from typing import Optional
+import logging
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from database import engine
+from models import TenantVersion
+
+logger = logging.getLogger(__name__)
+
+class TenantVersionService:
+    """Versão de escrita de cada tenant, guardada no banco (tenant_versions)
+
+    `response_cache.bump_tenant_version`, chamado por todas as escritas
+    após o commit, incrementa a linha da empresa; por estar no banco, a
+    versão é a mesma em todas as instâncias da API e nos workers. Ler a
+    versão é uma consulta pela chave primária.
+    """
+
+    def __init__(self, bind: Engine):
+        self.bind = bind
+
+    def current(self, db: Session, company_id: int) -> int:
+        """Versão atual do tenant (0 se nunca houve escrita registrada)"""
+        return db.scalar(self._version_query(company_id)) or 0
+
+    async def current_async(self, db: AsyncSession, company_id: int) -> int:
+        """Como `current`, para rotas com sessão assíncrona"""
+        return await db.scalar(self._version_query(company_id)) or 0
+
+    @staticmethod
+    def _version_query(company_id: int):
+        return select(TenantVersion.version).where(TenantVersion.company_id == company_id)
+
+    def bump(self, company_id: int) -> Optional[int]:
+        """Incrementa a versão numa transação própria; retorna a nova versão"""
+        table = TenantVersion.__table__
+        with self.bind.begin() as connection:
+            dialect = connection.dialect.name
+            if dialect in ("postgresql", "sqlite"):
+                dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+                statement = dialect_insert(table).values(company_id=company_id, version=1)
+                statement = statement.on_conflict_do_update(
+                    index_elements=["company_id"], set_={"version": table.c.version + 1, "updated_at": func.now()}
+                ).returning(table.c.version)
+                return connection.execute(statement).scalar()
+
+            # Outros bancos: UPDATE e, se a linha ainda não existe, INSERT
+            result = connection.execute(
+                update(table).where(table.c.company_id == company_id).values(version=table.c.version + 1)
+            )
+            if result.rowcount == 0:
+                connection.execute(table.insert().values(company_id=company_id, version=1))
+            return None
+
+# Instância global do serviço
+tenant_versions = TenantVersionService(engine)
@@ -0,0 +1,89 @@
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Tuple
+from functools import lru_cache
+import os
+import re
+
+# Padrões compilados uma única vez (antes: re.sub com o padrão em texto a cada chamada)
+NON_LETTERS = re.compile(r'[^a-záàâãéèêíìîóòôõúùûç\s]')
+
+def clean_description(description: str) -> str:
+    """Minúsculas, só letras (com acentos do português) e espaços simples"""
+    return " ".join(NON_LETTERS.sub(" ", description.lower()).split())
+
+class NormalizedDescription(NamedTuple):
+    """Descrição normalizada e suas palavras"""
+    text: str
+    tokens: Tuple[str, ...]
+
+class DescriptionMemo:
+    """Memo LRU limitado de uma função da descrição normalizada
+
+    Extratos repetem os mesmos descritores ("PIX ENVIADO", "UBER *TRIP")
+    milhares de vezes; o resultado é calculado uma vez por texto distinto.
+    Os valores guardados são compartilhados entre as chamadas e não devem
+    ser alterados por quem os recebe.
+    """
+
+    def __init__(self, function: Callable[[str], Any], max_size: int):
+        self._cached = lru_cache(maxsize=max_size)(function)
+
+    def __call__(self, text: str) -> Any:
+        return self._cached(text)
+
+    def clear(self) -> None:
+        self._cached.cache_clear()
+
+    def stats(self) -> Dict[str, float]:
+        info = self._cached.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            "size": info.currsize,
+            "max_size": info.maxsize,
+            "hits": info.hits,
+            "misses": info.misses,
+            "hit_ratio": info.hits / lookups if lookups else 0.0
+        }
+
+class TextNormalizationService:
+    """Normalização de descrições compartilhada pelos classificadores
+
+    `normalize` memoiza descrição bruta -> (texto limpo, palavras). Cada
+    classificador registra em `memo` o cálculo das suas features sobre o
+    texto limpo (scores de palavras-chave etc.), e `stats` reúne as taxas
+    de acerto de todos os memos.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._memos: Dict[str, DescriptionMemo] = {}
+        self._normalize = self.memo("normalize", self._normalize_uncached)
+
+    def normalize(self, description: str) -> NormalizedDescription:
+        return self._normalize(description or "")
+
+    def clean(self, description: str) -> str:
+        return self.normalize(description).text
+
+    def clean_many(self, descriptions: Iterable[str]) -> List[str]:
+        """Textos limpos de um lote, para compartilhar entre os classificadores"""
+        return [self.normalize(description).text for description in descriptions]
+
+    def memo(self, name: str, function: Callable[[str], Any]) -> DescriptionMemo:
+        """Cria (ou substitui, descartando o conteúdo anterior) o memo `name`"""
+        memo = DescriptionMemo(function, self.max_size)
+        self._memos[name] = memo
+        return memo
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Tamanho e taxa de acerto de cada memo"""
+        return {name: memo.stats() for name, memo in self._memos.items()}
+
+    @staticmethod
+    def _normalize_uncached(description: str) -> NormalizedDescription:
+        text = clean_description(description)
+        return NormalizedDescription(text, tuple(text.split()))
+
+# Instância global do serviço
+text_normalizer = TextNormalizationService(
+    max_size=int(os.getenv("TEXT_NORMALIZATION_MEMO_SIZE", "10000"))
+)
@@ -0,0 +1,116 @@
+from typing import Any, Dict, List, Sequence
+from types import SimpleNamespace
+
+from sqlalchemy import Boolean, Integer, Numeric, String, bindparam, column, func, select, update, values
+from sqlalchemy.orm import Session
+from models import Transaction
+from services.ledger_rollup import ledger_rollup
+
+# Colunas carregadas pelos lotes de classificação: entrada dos modelos e
+# chave do agregado diário (para mover os valores de categoria/is_personal)
+CLASSIFICATION_COLUMNS = (
+    Transaction.id,
+    Transaction.company_id,
+    Transaction.description,
+    Transaction.amount,
+    Transaction.transaction_type,
+    Transaction.transaction_date,
+    Transaction.category,
+    Transaction.is_personal,
+    Transaction.ml_confidence,
+    Transaction.from_account_id,
+    Transaction.to_account_id
+)
+
+# Colunas que os classificadores podem gravar e seus tipos na lista VALUES
+WRITABLE_COLUMNS = {
+    "category": String(100),
+    "is_personal": Boolean(),
+    "ml_confidence": Numeric(3, 2)
+}
+
+class TransactionBatchUpdateService:
+    """Grava de uma vez o resultado da classificação em lote
+
+    Em PostgreSQL é um único UPDATE ... FROM (VALUES ...) por bloco de
+    linhas, em vez de carregar objetos ORM e deixar o flush emitir um
+    UPDATE por objeto alterado; nos demais bancos (SQLite não aceita a lista
+    de colunas no alias do VALUES) é um executemany do mesmo UPDATE. O
+    updated_at é atualizado (ETag das listagens) e o agregado diário é
+    ajustado para as linhas cuja categoria ou is_personal mudou.
+    """
+
+    def __init__(self, chunk_size: int = 5000):
+        self.chunk_size = chunk_size
+
+    def load(self, db: Session, *criteria, limit: int = 100) -> List:
+        """Carrega (só colunas) as transações a classificar"""
+        return db.execute(
+            select(*CLASSIFICATION_COLUMNS).where(*criteria).order_by(Transaction.id).limit(limit)
+        ).all()
+
+    def write(self, db: Session, rows: Sequence, changes: Sequence[Dict[str, Any]]) -> int:
+        """Aplica `changes[i]` (colunas -> valor) à transação `rows[i]`; retorna quantas mudaram
+
+        Dicionários vazios são ignorados. Não faz commit.
+        """
+        updates = [(row, change) for row, change in zip(rows, changes) if change]
+        if not updates:
+            return 0
+
+        columns = sorted({name for _, change in updates for name in change})
+        payload = [
+            {"id": row.id, **{name: change.get(name, getattr(row, name)) for name in columns}}
+            for row, change in updates
+        ]
+
+        dialect = db.get_bind().dialect.name
+        for start in range(0, len(payload), self.chunk_size):
+            self._execute(db, dialect, columns, payload[start:start + self.chunk_size])
+
+        # Mover as linhas para a nova chave do agregado (mesmo valor, outra categoria/is_personal)
+        ledger_rollup.apply(db, [
+            delta
+            for row, change in updates
+            for delta in self._rollup_deltas(row, change)
+        ])
+
+        return len(updates)
+
+    def _execute(self, db: Session, dialect: str, columns: List[str], payload: List[Dict[str, Any]]) -> None:
+        table = Transaction.__table__
+
+        if dialect == "postgresql":
+            batch = values(
+                column("id", Integer()),
+                *(column(name, WRITABLE_COLUMNS[name]) for name in columns),
+                name="batch"
+            ).data([tuple(item[name] for name in ["id", *columns]) for item in payload])
+
+            db.connection().execute(
+                update(table)
+                .where(table.c.id == batch.c.id)
+                .values({**{name: batch.c[name] for name in columns}, "updated_at": func.now()})
+            )
+            return
+
+        db.connection().execute(
+            update(table)
+            .where(table.c.id == bindparam("row_id"))
+            .values({**{name: bindparam(f"new_{name}") for name in columns}, "updated_at": func.now()}),
+            [
+                {"row_id": item["id"], **{f"new_{name}": item[name] for name in columns}}
+                for item in payload
+            ]
+        )
+
+    @staticmethod
+    def _rollup_deltas(row, change: Dict[str, Any]) -> list:
+        before_key, amount = ledger_rollup.snapshot(row)
+        after_key = ledger_rollup.key_for(SimpleNamespace(**{**row._asdict(), **change}))
+        if before_key == after_key:
+            return []
+        return [(before_key, -amount, -1), (after_key, amount, 1)]
+
+# Instância global do serviço
+transaction_batch_updater = TransactionBatchUpdateService()
@@ -0,0 +1,89 @@
+from typing import Dict, List, Optional, Set
+from decimal import Decimal
+from datetime import datetime, date
+import hashlib
+import re
+import unicodedata
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from models import Transaction, TransactionType
+
+class TransactionFingerprintService:
+    """Impressão digital de conteúdo das transações importadas
+
+    O fingerprint é um SHA-256 de (empresa, conta, dia, valor com sinal,
+    descrição normalizada, ocorrência). A ocorrência numera linhas idênticas
+    dentro do mesmo extrato (0, 1, 2...), para que duas compras iguais no
+    mesmo dia não sejam descartadas e a reimportação do arquivo continue
+    gerando os mesmos hashes. O índice único (company_id, fingerprint)
+    torna a deduplicação O(1) por linha.
+    """
+
+    _non_alphanumeric = re.compile(r"[^a-z0-9]+")
+
+    def normalize_description(self, description: Optional[str]) -> str:
+        """Minúsculas, sem acentos e com pontuação/espaços colapsados"""
+        if not description:
+            return ""
+        text = unicodedata.normalize("NFKD", description.lower())
+        text = "".join(char for char in text if not unicodedata.combining(char))
+        return self._non_alphanumeric.sub(" ", text).strip()
+
+    def compute(self, company_id: int, account_id: Optional[int], transaction_date,
+                amount, transaction_type: TransactionType,
+                normalized_description: str, occurrence: int = 0) -> str:
+        """Calcula o fingerprint (hex) a partir de campos já normalizados"""
+        signed_amount = Decimal(str(amount)).copy_abs().quantize(Decimal("0.01"))
+        if transaction_type == TransactionType.EXPENSE:
+            signed_amount = -signed_amount
+
+        payload = "|".join((
+            str(company_id),
+            str(account_id or ""),
+            self._as_day(transaction_date).isoformat(),
+            str(signed_amount),
+            normalized_description,
+            str(occurrence)
+        ))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def insert_new(self, db: Session, rows: List[Dict]) -> Set[str]:
+        """Insere as linhas ignorando fingerprints já existentes na empresa
+
+        Usa INSERT ... ON CONFLICT DO NOTHING (PostgreSQL e SQLite) e retorna
+        os fingerprints efetivamente inseridos. Não faz commit.
+        """
+        if not rows:
+            return set()
+
+        table = Transaction.__table__
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            # Core (não ORM): o RETURNING é feito em lotes de VALUES múltiplos
+            dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            statement = dialect_insert(table).on_conflict_do_nothing(
+                index_elements=["company_id", "fingerprint"]
+            ).returning(table.c.fingerprint)
+            return set(db.connection().execute(statement, rows).scalars().all())
+
+        # Outros bancos: consulta os fingerprints existentes pelo índice único
+        existing = set(db.scalars(
+            select(Transaction.fingerprint).where(
+                Transaction.company_id.in_({row["company_id"] for row in rows}),
+                Transaction.fingerprint.in_([row["fingerprint"] for row in rows])
+            )
+        ).all())
+        new_rows = [row for row in rows if row["fingerprint"] not in existing]
+        if new_rows:
+            db.connection().execute(insert(table), new_rows)
+        return {row["fingerprint"] for row in new_rows}
+
+    def _as_day(self, value) -> date:
+        if isinstance(value, datetime):
+            return value.date()
+        return value
+
+# Instância global do serviço
+fingerprint_service = TransactionFingerprintService()
@@ -0,0 +1,84 @@
+"""Configuração comum dos testes: banco SQLite temporário e dados de exemplo
+
+O engine é criado no import de database.py, então as variáveis de ambiente
+são definidas aqui, antes que qualquer módulo de teste importe a aplicação.
+"""
+
+import itertools
+import os
+import tempfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+_database_dir = tempfile.mkdtemp(prefix="test_backend_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_database_dir, 'test.db')}"
+os.environ["ENVIRONMENT"] = "development"
+os.environ["MODEL_ARTIFACT_DIR"] = os.path.join(_database_dir, "models")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from auth import get_current_active_user
+from database import SessionLocal
+from models import Account, AccountType, Company, Transaction, TransactionType, User, UserRole
+from services.ledger_rollup import ledger_rollup
+import main
+
+_company_numbers = itertools.count(1)
+
+def create_company(accounts: int, transactions_per_account: int = 3) -> User:
+    """Empresa com `accounts` contas e algumas transações recentes em cada uma; retorna o admin"""
+    number = next(_company_numbers)
+    db = SessionLocal()
+    try:
+        company = Company(name=f"Empresa {number}")
+        db.add(company)
+        db.flush()
+        user = User(
+            email=f"admin{number}@teste.com.br", hashed_password="-", full_name="Admin",
+            role=UserRole.ADMIN, company_id=company.id
+        )
+        db.add(user)
+        db.flush()
+
+        now = datetime.now()
+        for index in range(accounts):
+            account = Account(
+                name=f"Conta {index}", account_type=AccountType.BANK, balance=Decimal("1000"),
+                bank_name="Banco", company_id=company.id
+            )
+            db.add(account)
+            db.flush()
+            for day in range(transactions_per_account):
+                expense = day % 2 == 0
+                db.add(Transaction(
+                    description="mercado" if expense else "salario",
+                    amount=Decimal("50") + index,
+                    transaction_type=TransactionType.EXPENSE if expense else TransactionType.INCOME,
+                    category="Alimentação" if expense else None,
+                    transaction_date=now - timedelta(days=day),
+                    from_account_id=account.id if expense else None,
+                    to_account_id=None if expense else account.id,
+                    company_id=company.id,
+                    user_id=user.id
+                ))
+        db.flush()
+        ledger_rollup.rebuild(db, company.id)
+        db.commit()
+        db.refresh(user)
+        db.expunge(user)
+        return user
+    finally:
+        db.close()
+
+@pytest.fixture
+def client():
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+
+@pytest.fixture
+def login_as():
+    """Autentica as próximas requisições do TestClient como o usuário dado"""
+    def login(user: User) -> None:
+        main.app.dependency_overrides[get_current_active_user] = lambda: user
+    return login
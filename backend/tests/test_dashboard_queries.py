@@ -0,0 +1,31 @@
+"""Número de consultas de /dashboard/consolidated não cresce com o número de contas
+
+Uso (a partir de backend/):
+    pytest tests/test_dashboard_queries.py
+"""
+
+from fastapi.testclient import TestClient
+
+from conftest import create_company
+from models import User
+from services.query_instrumentation import query_instrumentation
+
+# Mesmo orçamento de ROUTE_QUERY_BUDGETS: fixo, independente do número de contas
+MAX_QUERIES = query_instrumentation.budget_for("GET /dashboard/consolidated")
+
+def dashboard_query_count(client: TestClient, login_as, user: User) -> int:
+    login_as(user)
+    response = client.get("/dashboard/consolidated")
+    assert response.status_code == 200, response.text
+    assert response.json()["unavailable_sections"] == []
+    return int(response.headers["x-query-count"])
+
+def test_consolidated_dashboard_query_count_is_fixed(client, login_as):
+    query_instrumentation.reset()
+
+    few = dashboard_query_count(client, login_as, create_company(accounts=5))
+    many = dashboard_query_count(client, login_as, create_company(accounts=40))
+
+    assert few <= MAX_QUERIES
+    assert many == few, f"{few} consultas com 5 contas, {many} com 40"
+    query_instrumentation.assert_route_budgets("/dashboard")
@@ -0,0 +1,174 @@
+"""Verificação de planos: consultas por empresa não podem cair em varredura sequencial
+
+Cria o schema num banco de verificação próprio (não o da aplicação),
+popula com dados sintéticos de várias empresas e roda EXPLAIN nas
+consultas mais frequentes dos routers; o teste falha se alguma delas
+varrer a tabela inteira.
+
+No PostgreSQL a verificação usa `SET LOCAL enable_seqscan = off`: com
+poucos dados o planejador prefere a varredura sequencial, mas sem
+índice utilizável ela continua sendo a única opção e aparece no plano.
+
+Uso (a partir de backend/):
+    pytest tests/test_query_plans.py
+    QUERY_PLANS_DATABASE_URL=postgresql://.../saas_check pytest tests/test_query_plans.py
+"""
+
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, event, select, func, text
+
+from database import Base
+from models import (
+    Company, User, Account, Transaction, Alert, Debt,
+    UserRole, AccountType, TransactionType, AlertType, DebtType, DebtStatus
+)
+
+CATEGORIES = ["Alimentação", "Transporte", "Saúde", "Lazer", "Casa", None]
+COMPANIES = 20
+TRANSACTIONS_PER_COMPANY = 2000
+
+def seed(connection, companies: int, transactions_per_company: int, seed_value: int = 42):
+    """Popula empresas, usuários, contas, transações, alertas e dívidas"""
+    rnd = random.Random(seed_value)
+    now = datetime(2026, 6, 30, 12, 0, 0)
+
+    connection.execute(Company.__table__.insert(), [
+        {"id": company_id, "name": f"Empresa {company_id}"} for company_id in range(1, companies + 1)
+    ])
+    connection.execute(User.__table__.insert(), [
+        {"id": company_id, "email": f"user{company_id}@example.com", "hashed_password": "x",
+         "full_name": f"Usuário {company_id}", "role": UserRole.ADMIN, "company_id": company_id}
+        for company_id in range(1, companies + 1)
+    ])
+    connection.execute(Account.__table__.insert(), [
+        {"id": company_id, "name": "Conta corrente", "account_type": AccountType.BANK,
+         "balance": Decimal("0"), "company_id": company_id}
+        for company_id in range(1, companies + 1)
+    ])
+
+    transactions = []
+    alerts = []
+    debts = []
+    for company_id in range(1, companies + 1):
+        for _ in range(transactions_per_company):
+            transaction_type = rnd.choice([TransactionType.INCOME, TransactionType.EXPENSE])
+            transactions.append({
+                "description": "Lançamento",
+                "amount": Decimal(rnd.randint(100, 100000)) / 100,
+                "transaction_type": transaction_type,
+                "category": rnd.choice(CATEGORIES),
+                "transaction_date": now - timedelta(minutes=rnd.randint(0, 60 * 24 * 365)),
+                "from_account_id": company_id if transaction_type == TransactionType.EXPENSE else None,
+                "to_account_id": company_id if transaction_type == TransactionType.INCOME else None,
+                "company_id": company_id,
+                "user_id": company_id
+            })
+        for _ in range(transactions_per_company // 10):
+            alerts.append({
+                "title": "Alerta", "message": "Mensagem", "alert_type": AlertType.DEBT_DUE,
+                "is_read": rnd.random() < 0.8, "company_id": company_id, "user_id": company_id,
+                "created_at": now - timedelta(hours=rnd.randint(0, 24 * 90))
+            })
+        for _ in range(max(transactions_per_company // 50, 1)):
+            debts.append({
+                "name": "Dívida", "debt_type": DebtType.LOAN, "total_amount": Decimal("1000"),
+                "remaining_amount": Decimal("500"), "status": rnd.choice(list(DebtStatus)),
+                "next_due_date": now + timedelta(days=rnd.randint(-30, 60)),
+                "company_id": company_id, "user_id": company_id
+            })
+
+    connection.execute(Transaction.__table__.insert(), transactions)
+    connection.execute(Alert.__table__.insert(), alerts)
+    connection.execute(Debt.__table__.insert(), debts)
+    connection.execute(text("ANALYZE"))
+
+def query_shapes(company_id: int = 1):
+    """Consultas no formato usado pelos routers (dashboard, relatórios, dívidas, alertas)"""
+    end_date = datetime(2026, 6, 30)
+    start_date = end_date - timedelta(days=30)
+
+    return [
+        ("transações por período", "transactions",
+         select(Transaction.id, Transaction.amount).where(
+             Transaction.company_id == company_id,
+             Transaction.transaction_date >= start_date,
+             Transaction.transaction_date <= end_date
+         )),
+        ("transações por tipo e período", "transactions",
+         select(func.sum(Transaction.amount)).where(
+             Transaction.company_id == company_id,
+             Transaction.transaction_type == TransactionType.EXPENSE,
+             Transaction.transaction_date >= start_date,
+             Transaction.transaction_date <= end_date
+         )),
+        ("transações por categoria", "transactions",
+         select(Transaction.category, func.sum(Transaction.amount)).where(
+             Transaction.company_id == company_id,
+             Transaction.category == "Alimentação"
+         ).group_by(Transaction.category)),
+        ("alertas não lidos", "alerts",
+         select(Alert.id, Alert.title).where(
+             Alert.company_id == company_id,
+             Alert.is_read == False
+         ).order_by(Alert.created_at.desc()).limit(5)),
+        ("dívidas vencidas", "debts",
+         select(Debt.id).where(
+             Debt.company_id == company_id,
+             Debt.status == DebtStatus.ACTIVE,
+             Debt.next_due_date < end_date
+         )),
+    ]
+
+def explain(connection, statement):
+    """Executa a consulta capturando o plano da mesma instrução SQL já com os parâmetros"""
+    dialect = connection.dialect.name
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+    plan = []
+
+    def capture(conn, cursor, statement_sql, parameters, context, executemany):
+        cursor.execute(prefix + statement_sql, parameters)
+        plan.extend(str(row[-1]) for row in cursor.fetchall())
+
+    event.listen(connection, "before_cursor_execute", capture)
+    try:
+        connection.execute(statement).all()
+    finally:
+        event.remove(connection, "before_cursor_execute", capture)
+
+    return plan
+
+def is_sequential_scan(dialect: str, table: str, plan) -> bool:
+    if dialect == "sqlite":
+        return any(line.startswith(f"SCAN {table}") for line in plan)
+    return any(f"Seq Scan on {table}" in line for line in plan)
+
+@pytest.fixture(scope="module")
+def plan_engine():
+    """Banco vazio de QUERY_PLANS_DATABASE_URL (padrão: SQLite temporário), populado uma vez"""
+    database_url = os.getenv("QUERY_PLANS_DATABASE_URL") or \
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'query_plans.db')}"
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        seed(connection, COMPANIES, TRANSACTIONS_PER_COMPANY)
+
+    yield engine
+
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+@pytest.mark.parametrize("name,table,statement", query_shapes(), ids=[shape[0] for shape in query_shapes()])
+def test_query_uses_index(plan_engine, name, table, statement):
+    with plan_engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SET LOCAL enable_seqscan = off"))
+
+        plan = explain(connection, statement)
+        assert not is_sequential_scan(connection.dialect.name, table, plan), \
+            f"{name}: varredura sequencial em {table}\n" + "\n".join(plan)
@@ -0,0 +1,35 @@
+"""Respostas em cache são invalidadas por escritas de outros processos
+
+A versão do tenant que compõe a chave vem de tenant_versions; um worker,
+a varredura de alertas ou outra instância da API incrementam essa linha
+com o seu próprio engine.
+
+Uso (a partir de backend/):
+    pytest tests/test_response_cache.py
+"""
+
+import os
+
+from sqlalchemy import create_engine
+
+from conftest import create_company
+from services.tenant_versions import TenantVersionService
+
+def test_bump_from_another_process_invalidates_cached_reports(client, login_as):
+    user = create_company(accounts=2)
+    login_as(user)
+    routes = ["/reports/monthly/2024/5", "/reports/categories", "/reports/insights", "/dashboard/quick-stats"]
+
+    for route in routes:
+        assert client.get(route).headers["x-cache"] == "MISS", route
+        assert client.get(route).headers["x-cache"] == "HIT", route
+
+    # Outro processo: engine e conexões próprios, sem nada em comum com a API
+    other_engine = create_engine(os.environ["DATABASE_URL"])
+    try:
+        TenantVersionService(other_engine).bump(user.company_id)
+    finally:
+        other_engine.dispose()
+
+    for route in routes:
+        assert client.get(route).headers["x-cache"] == "MISS", route
@@ -0,0 +1,118 @@
+"""Orçamento de consultas (ROUTE_QUERY_BUDGETS) das rotas de cada router
+
+Exercita as rotas principais de cada router com uma empresa populada e
+verifica, por prefixo, que nenhuma passou do orçamento. Jobs executados em
+background pela requisição que os criou não contam para a rota.
+
+Uso (a partir de backend/):
+    pytest tests/test_route_budgets.py
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from conftest import create_company
+from database import SessionLocal
+from models import Debt, DebtStatus, DebtType, FinancialGoal, Transaction
+from services.query_instrumentation import ROUTE_QUERY_BUDGETS, query_instrumentation
+
+def seed_debt_and_goal(company_id: int, user_id: int):
+    """Uma dívida vencida e uma meta; retorna os ids usados nas rotas"""
+    db = SessionLocal()
+    try:
+        debt = Debt(
+            name="Empréstimo", debt_type=DebtType.LOAN, total_amount=Decimal("1000"),
+            remaining_amount=Decimal("800"), installment_amount=Decimal("100"),
+            installments_total=10, installments_paid=2,
+            next_due_date=datetime.now() - timedelta(days=5), status=DebtStatus.ACTIVE,
+            company_id=company_id, user_id=user_id
+        )
+        goal = FinancialGoal(
+            name="Reserva", target_amount=Decimal("5000"), current_amount=Decimal("1000"),
+            target_date=datetime.now() + timedelta(days=180), company_id=company_id, user_id=user_id
+        )
+        db.add_all([debt, goal])
+        db.commit()
+        transaction = db.query(Transaction).filter(Transaction.company_id == company_id).first()
+        return {
+            "debt": debt.id, "goal": goal.id,
+            "transaction": transaction.id, "account": transaction.from_account_id or transaction.to_account_id
+        }
+    finally:
+        db.close()
+
+# Rotas de cada router: (método, caminho, corpo); {debt}, {goal}, {transaction} e {account} são ids da empresa
+ROUTER_REQUESTS = {
+    "/dashboard": [
+        ("GET", "/dashboard/consolidated", None),
+        ("GET", "/dashboard/accounts-overview", None),
+        ("GET", "/dashboard/quick-stats", None),
+    ],
+    "/transactions": [
+        ("GET", "/transactions/", None),
+        ("GET", "/transactions/{transaction}", None),
+        ("GET", "/transactions/summary/by-category", None),
+        ("POST", "/transactions/", {
+            "description": "mercado", "amount": "42.50", "transaction_type": "expense",
+            "category": "Alimentação", "transaction_date": datetime.now().isoformat(),
+            "from_account_id": "{account}"
+        }),
+    ],
+    "/reports": [
+        ("GET", "/reports/dashboard", None),
+        ("GET", "/reports/monthly/{year}/{month}", None),
+        ("GET", "/reports/categories", None),
+        ("GET", "/reports/cash-flow", None),
+        ("GET", "/reports/insights", None),
+        ("GET", "/reports/alert-settings", None),
+    ],
+    "/debts": [
+        ("GET", "/debts/", None),
+        ("GET", "/debts/{debt}", None),
+        ("GET", "/debts/summary/overview", None),
+        ("POST", "/debts/check-overdue", None),
+    ],
+    "/accounts": [
+        ("GET", "/accounts/", None),
+        ("GET", "/accounts/summary/balances", None),
+    ],
+    "/goals": [
+        ("GET", "/goals/", None),
+        ("GET", "/goals/{goal}", None),
+        ("GET", "/goals/summary/overview", None),
+        ("GET", "/goals/{goal}/progress-history", None),
+    ],
+    "/bank-import": [
+        ("GET", "/bank-import/connections", None),
+        ("GET", "/bank-import/supported-banks", None),
+        ("POST", "/bank-import/categorize-all", None),
+    ],
+}
+
+@pytest.fixture(scope="module")
+def budget_company():
+    query_instrumentation.reset()
+    user = create_company(accounts=3, transactions_per_account=10)
+    today = datetime.now()
+    ids = {**seed_debt_and_goal(user.company_id, user.id), "year": today.year, "month": today.month}
+    return user, ids
+
+@pytest.mark.parametrize("prefix", list(ROUTER_REQUESTS))
+def test_router_routes_within_query_budget(client, login_as, budget_company, prefix):
+    user, ids = budget_company
+    login_as(user)
+
+    for method, path, body in ROUTER_REQUESTS[prefix]:
+        if body is not None:
+            body = {field: value.format(**ids) for field, value in body.items()}
+        response = client.request(method, path.format(**ids), json=body)
+        assert response.status_code < 400, f"{method} {path}: {response.status_code} {response.text}"
+
+    query_instrumentation.assert_route_budgets(prefix)
+
+def test_every_budgeted_route_is_exercised():
+    requested = {f"{method} {path}" for requests in ROUTER_REQUESTS.values() for method, path, _ in requests}
+    missing = [route for route in ROUTE_QUERY_BUDGETS if route not in requested]
+    assert not missing, f"Rotas com orçamento sem teste: {missing}"
@@ -0,0 +1,116 @@
+"""Worker da fila de jobs (services/job_queue.py)
+
+Sobe um pool de processos que consultam a tabela jobs e executam os jobs
+disponíveis (importações de extrato, categorizações em lote, verificação
+de dívidas em atraso). Cada processo tem a sua própria conexão com o banco;
+vários workers, em uma ou mais máquinas, podem rodar ao mesmo tempo.
+
+Um processo extra agenda a varredura de alertas (services/alert_sweeper.py)
+a cada ALERT_SWEEP_INTERVAL_SECONDS; com vários workers, só um executa cada
+intervalo.
+
+Uso (a partir de backend/):
+    python worker.py --processes 4
+    python worker.py --processes 4 --no-scheduler
+"""
+
+import argparse
+import logging
+import multiprocessing
+import signal
+import sys
+import threading
+import time
+
+logger = logging.getLogger("worker")
+
+def run_worker(index: int, poll_interval: float) -> None:
+    """Laço de um processo do pool: executa jobs até receber SIGTERM/SIGINT"""
+    # Processos criados com spawn não herdam a configuração de logging do pai
+    logging.basicConfig(level=logging.INFO)
+
+    # Os routers registram os handlers dos jobs ao serem importados
+    from routers import bank_import, debts  # noqa: F401
+    from services.job_queue import job_queue
+
+    def stop(signum, frame):
+        # O job em execução termina o bloco atual e volta para a fila
+        job_queue.stopping.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info(f"Worker {index} iniciado")
+    while not job_queue.stopping.is_set():
+        try:
+            # Sem prazo: o job roda até o fim; o checkpoint de cada bloco renova o lease
+            if not job_queue.run_next():
+                time.sleep(poll_interval)
+        except Exception as e:
+            logger.error(f"Worker {index}: {str(e)}")
+            time.sleep(poll_interval)
+    logger.info(f"Worker {index} encerrado")
+
+def run_scheduler(poll_interval: float) -> None:
+    """Laço do agendador: dispara a varredura de alertas uma vez por intervalo"""
+    logging.basicConfig(level=logging.INFO)
+
+    from services.alert_sweeper import alert_sweeper
+
+    stopping = threading.Event()
+
+    def stop(signum, frame):
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info("Agendador de alertas iniciado")
+    while not stopping.is_set():
+        try:
+            metrics = alert_sweeper.run_scheduled()
+            if metrics is not None:
+                logger.info(f"Varredura de alertas: {metrics}")
+        except Exception as e:
+            logger.error(f"Agendador de alertas: {str(e)}")
+        stopping.wait(min(poll_interval, alert_sweeper.interval_seconds))
+    logger.info("Agendador de alertas encerrado")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--no-scheduler", action="store_true", help="não agenda a varredura de alertas")
+    parser.add_argument("--scheduler-interval", type=float, default=60.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    # spawn: cada processo cria o seu engine (conexões não são herdadas do pai)
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_worker, args=(index, args.poll_interval), name=f"job-worker-{index}")
+        for index in range(args.processes)
+    ]
+    if not args.no_scheduler:
+        processes.append(
+            context.Process(target=run_scheduler, args=(args.scheduler_interval,), name="alert-scheduler")
+        )
+    for process in processes:
+        process.start()
+
+    def stop(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for process in processes:
+        process.join()
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())